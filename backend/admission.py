@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Hashable, Optional, Tuple
+
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Rejections are logged as one summary line per interval, never per request
+LOG_INTERVAL = 10.0
+# Most idle buckets one acquire() sweeps, so the cost of a sweep is spread over requests
+SWEEP_STEP = 256
+
+
+class TokenBuckets:
+    """Token buckets for any number of keys, ``rate`` tokens/second up to ``burst``.
+
+    Each key costs one dict entry holding (tokens, updated). Every acquire
+    moves its key to the end of the dict, so the dict is ordered by
+    ``updated`` and the least recently used key is always first. A bucket
+    that has been idle long enough to refill is indistinguishable from a new
+    one, so idle entries are swept from the front, at most ``SWEEP_STEP`` per
+    call; when the table is over ``max_keys``, the front entry is evicted.
+    Either way an acquire costs O(1), however many keys are tracked.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.refill_seconds = burst / rate
+        # An OrderedDict finds its first key in O(1); a dict would skip over every deleted slot
+        self._buckets: 'OrderedDict[Hashable, Tuple[float, float]]' = OrderedDict()
+        self._next_sweep = 0.0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Take a token for ``key``; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        entry = self._buckets.pop(key, None)
+        tokens = self.burst if entry is None else min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+        # Re-inserted, so the order is least recently used first
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        if now >= self._next_sweep:
+            self.sweep(now)
+        return wait
+
+    def sweep(self, now: float, limit: int = SWEEP_STEP):
+        """Drop up to ``limit`` idle buckets; the next sweep is due when the oldest remaining one goes idle."""
+        for _ in range(limit):
+            key = next(iter(self._buckets), None)
+            if key is None:
+                self._next_sweep = now + self.refill_seconds
+                return
+            updated = self._buckets[key][1]
+            if updated + self.refill_seconds > now:
+                self._next_sweep = updated + self.refill_seconds
+                return
+            del self._buckets[key]
+
+
+class RateLimiter:
+    """Per-client_name and per-remote-address token buckets for status ingestion.
+
+    A rate of 0 disables that limit.
+    """
+
+    def __init__(self, client_rate: float, client_burst: float, address_rate: float, address_burst: float,
+                 max_keys: int = 100_000, registry: Optional[MetricsRegistry] = None):
+        self.limits = {}
+        if client_rate > 0:
+            self.limits['client_name'] = TokenBuckets(client_rate, client_burst, max_keys)
+        if address_rate > 0:
+            self.limits['address'] = TokenBuckets(address_rate, address_burst, max_keys)
+        registry = registry or MetricsRegistry()
+        self.rejections = registry.counter('rate_limit_rejections_total', 'Requests rejected with 429', ('key',))
+        for kind in self.limits:
+            self.rejections.labels(kind)
+        registry.gauge('rate_limit_tracked_keys', 'Keys with a live token bucket',
+                       func=lambda: sum(len(buckets) for buckets in self.limits.values())).labels()
+        self._rejected: Counter = Counter()
+        self._next_log = time.monotonic() + LOG_INTERVAL
+
+    def check(self, address: Optional[str], client_name: Optional[str] = None) -> float:
+        """Returns 0 when the request may proceed, else the Retry-After in seconds."""
+        now = time.monotonic()
+        wait = 0.0
+        for kind, key in (('address', address), ('client_name', client_name)):
+            buckets = self.limits.get(kind)
+            if buckets is None or key is None:
+                continue
+            key_wait = buckets.acquire(key, now)
+            if key_wait:
+                self.rejections.labels(kind).inc()
+                self._rejected[(kind, key)] += 1
+                wait = max(wait, key_wait)
+        if self._rejected and now >= self._next_log:
+            self._log(now)
+        return wait
+
+    def _log(self, now: float):
+        top = ", ".join(f"{kind}={key!r}: {count}" for (kind, key), count in self._rejected.most_common(5))
+        logger.warning("Rate limited %d requests from %d keys in the last %.0fs (%s)",
+                       sum(self._rejected.values()), len(self._rejected), LOG_INTERVAL, top)
+        self._rejected.clear()
+        self._next_log = now + LOG_INTERVAL
+
+
+class Overloaded(Exception):
+    """Raised by AdmissionLimiter when a request is shed; ``retry_after`` is in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Bounds how many requests use the database at once.
+
+    Up to ``max_concurrency`` requests run; later ones wait in FIFO order. A
+    request that has waited ``max_wait`` seconds, or arrives to find
+    ``max_queue`` already waiting, is shed with Overloaded instead of adding
+    to everyone's latency (and to Motor's pool wait queue).
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float,
+                 registry: Optional[MetricsRegistry] = None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        registry = registry or MetricsRegistry()
+        registry.gauge('admission_in_flight', 'Requests holding a database admission slot',
+                       func=lambda: self.in_flight).labels()
+        registry.gauge('admission_queue_depth', 'Requests waiting for a database admission slot',
+                       func=lambda: len(self._waiters)).labels()
+        self.queue_wait = registry.histogram('admission_queue_wait_seconds', 'Time spent waiting for a slot')
+        self.shed = registry.counter('admission_shed_total', 'Requests shed with 503', ('reason',))
+        self._shed_count = 0
+        self._next_log = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.queue_wait.labels().observe(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject('queue_full')
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                self._reject('queue_timeout')
+            # Granted a slot just as the wait timed out; keep it
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        self.queue_wait.labels().observe(time.perf_counter() - start)
+
+    def release(self):
+        # The slot passes straight to the next waiter, so in_flight stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _reject(self, reason: str):
+        self.shed.labels(reason).inc()
+        self._shed_count += 1
+        now = time.monotonic()
+        if now >= self._next_log:
+            logger.warning("Shedding load: %d requests rejected (%s; %d in flight, %d queued)",
+                           self._shed_count, reason, self.in_flight, len(self._waiters))
+            self._shed_count = 0
+            self._next_log = now + LOG_INTERVAL
+        raise Overloaded(reason, max(1.0, self.max_wait))
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
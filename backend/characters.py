@@ -0,0 +1,184 @@
+import csv
+import gzip
+import hashlib
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+# Output fields, in the same shape frontend/src/data/characterData.js builds
+FIELDS = (
+    'id', 'chapter', 'name', 'location', 'context', 'mainTeaching', 'miraculousManifestations',
+    'mainDialogue', 'presentAssembly', 'spiritualProgression', 'transition', 'uniqueElements',
+    'modelUrl', 'imageUrl', 'available', 'type', 'tags', 'description',
+)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+CSV_COLUMNS = {
+    'location': 'LOCALIZAÇÃO',
+    'context': 'CONTEXTO',
+    'mainTeaching': 'ENSINAMENTO PRINCIPAL',
+    'miraculousManifestations': 'MANIFESTAÇÕES MIRACULOSAS',
+    'mainDialogue': 'DIÁLOGO PRINCIPAL',
+    'presentAssembly': 'ASSEMBLEIA PRESENTE',
+    'spiritualProgression': 'PROGRESSÃO ESPIRITUAL',
+    'transition': 'TRANSIÇÃO',
+    'uniqueElements': 'ELEMENTOS ÚNICOS',
+}
+
+CHAPTER_RE = re.compile(r'CAPÍTULO (\d+)')
+
+# Serialized projections kept per distinct field selection
+MAX_CACHED_PROJECTIONS = 64
+
+
+def extract_tags(row: Dict[str, str]) -> List[str]:
+    name = row.get('PERSONAGEM CENTRAL') or ''
+    tags = []
+    if 'Buda' in name or 'Buddha' in name:
+        tags.append('Buddha')
+    if 'Bodhisattva' in name:
+        tags.append('Bodhisattva')
+    if 'bhikṣu' in name or 'monge' in name:
+        tags.append('Monk')
+    if 'bhikṣuṇī' in name or 'monja' in name:
+        tags.append('Nun')
+    if 'Rei' in name or 'King' in name:
+        tags.append('Ruler')
+    if 'mercador' in name or 'comerciante' in name:
+        tags.append('Merchant')
+    return tags or ['Character']
+
+
+def create_description(row: Dict[str, str]) -> str:
+    context = row.get('CONTEXTO') or ''
+    teaching = row.get('ENSINAMENTO PRINCIPAL') or ''
+    if context:
+        return context[:200] + '...'
+    if teaching:
+        return teaching[:200] + '...'
+    return 'A mystical character from the universal wisdom tradition.'
+
+
+class SerializedBody:
+    """A response body serialized once, with its gzip variant and ETag."""
+
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+    @classmethod
+    def prebuilt(cls, body, gzipped, etag: str) -> 'SerializedBody':
+        """One built elsewhere, e.g. memoryviews into a shared snapshot."""
+        serialized = cls.__new__(cls)
+        serialized.body, serialized.gzipped, serialized.etag = body, gzipped, etag
+        return serialized
+
+
+class CharacterStore:
+    """The chapter dataset parsed once per process, or attached from a snapshot shared by all workers.
+
+    Rows are kept as tuples in ``FIELDS`` order; serialized bodies for each
+    requested field projection are built lazily and cached. Bodies for the
+    default projection can come prebuilt from the snapshot instead.
+    """
+
+    def __init__(self, rows: List[tuple], shared: Optional[Dict[Tuple, SerializedBody]] = None):
+        self.rows = rows
+        self.by_chapter: Dict[int, tuple] = {}
+        for row in rows:
+            # Some chapters span several rows; like the frontend lookup, the first one wins
+            self.by_chapter.setdefault(row[FIELD_INDEX['chapter']], row)
+        self._shared = shared or {}
+        self._cache: 'OrderedDict[Tuple, SerializedBody]' = OrderedDict()
+
+    @classmethod
+    def from_csv(cls, path: Path) -> 'CharacterStore':
+        with open(path, encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            rows = []
+            for index, row in enumerate(reader):
+                if not any((value or '').strip() for value in row.values()):
+                    continue
+                match = CHAPTER_RE.search(row.get('Capítulo') or '')
+                chapter = int(match.group(1)) if match else index + 1
+                values = {
+                    'id': f'character-{chapter}',
+                    'chapter': chapter,
+                    'name': row.get('PERSONAGEM CENTRAL') or f'Character {chapter}',
+                    'modelUrl': f'/api/models/modelo{chapter}.glb',
+                    'imageUrl': f'/images/character-{chapter}.jpg',
+                    'available': True,
+                    'type': 'Character',
+                    'tags': extract_tags(row),
+                    'description': create_description(row),
+                }
+                for field, column in CSV_COLUMNS.items():
+                    values[field] = row.get(column) or ''
+                rows.append(tuple(values[name] for name in FIELDS))
+        return cls(rows)
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'CharacterStore':
+        """Attach to a shared_state.Snapshot written from ``shared_bodies()``."""
+        shared = {}
+        for key, (body, gzipped, etag) in snapshot.bodies().items():
+            kind, _, chapter = key.partition('/')
+            cache_key = ('list', FIELDS) if kind == 'list' else ('chapter', int(chapter), FIELDS)
+            shared[cache_key] = SerializedBody.prebuilt(body, gzipped, etag)
+        return cls(snapshot.rows(), shared)
+
+    def shared_bodies(self) -> Dict[str, Tuple[bytes, bytes, str]]:
+        """The default-projection list and chapter bodies, keyed as a snapshot stores them."""
+        bodies = {'list': self.list_body(FIELDS)}
+        for chapter in self.by_chapter:
+            bodies[f'chapter/{chapter}'] = self.chapter_body(chapter, FIELDS)
+        return {key: (body.body, body.gzipped, body.etag) for key, body in bodies.items()}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def documents(self) -> List[dict]:
+        return [dict(zip(FIELDS, row)) for row in self.rows]
+
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+        """Validate a comma-separated field list; raises ValueError on unknown names."""
+        if not fields:
+            return FIELDS
+        selected = tuple(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+        unknown = [f for f in selected if f not in FIELD_INDEX]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return selected or FIELDS
+
+    def _project(self, row: tuple, fields: Sequence[str]) -> dict:
+        return {name: row[FIELD_INDEX[name]] for name in fields}
+
+    def _cached(self, key: Tuple, build) -> SerializedBody:
+        shared = self._shared.get(key)
+        if shared is not None:
+            return shared
+        body = self._cache.get(key)
+        if body is None:
+            body = SerializedBody(orjson.dumps(build()))
+            self._cache[key] = body
+            if len(self._cache) > MAX_CACHED_PROJECTIONS:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return body
+
+    def list_body(self, fields: Tuple[str, ...]) -> SerializedBody:
+        return self._cached(('list', fields), lambda: [self._project(row, fields) for row in self.rows])
+
+    def chapter_body(self, chapter: int, fields: Tuple[str, ...]) -> Optional[SerializedBody]:
+        row = self.by_chapter.get(chapter)
+        if row is None:
+            return None
+        return self._cached(('chapter', chapter, fields), lambda: self._project(row, fields))
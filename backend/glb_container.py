@@ -0,0 +1,123 @@
+"""The GLB container: a 12-byte header, a JSON chunk and an optional BIN chunk.
+
+Parsing and the JSON-only model summary live here, without NumPy, so the
+backend (/api/models/{name}/meta) and the asset tools in the repository
+root (glb.py) read GLBs the same way.
+"""
+
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+import orjson
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+CHUNK_JSON = b'JSON'
+CHUNK_BIN = b'BIN\x00'
+HEADER = struct.Struct('<4sII')
+CHUNK_HEADER = struct.Struct('<I4s')
+
+
+def check_header(data) -> int:
+    """Validate the GLB header at the start of ``data``; returns the total length it declares."""
+    if len(data) < HEADER.size:
+        raise ValueError("Not a GLB file")
+    magic, version, total_length = HEADER.unpack_from(data, 0)
+    if magic != GLB_MAGIC:
+        raise ValueError("Not a GLB file")
+    if version != GLB_VERSION:
+        raise ValueError(f"Unsupported GLB version {version}")
+    return total_length
+
+
+def parse_chunks(data) -> Tuple[dict, memoryview]:
+    """Return (gltf JSON dict, BIN chunk) from GLB bytes, a memoryview or an mmap.
+
+    The BIN chunk is a memoryview into ``data``, so nothing is copied; it is
+    empty when the file has none.
+    """
+    total_length = min(check_header(data), len(data))
+    view = memoryview(data)
+    gltf = None
+    binary = view[0:0]
+    offset = HEADER.size
+    while offset + CHUNK_HEADER.size <= total_length:
+        chunk_length, chunk_type = CHUNK_HEADER.unpack_from(data, offset)
+        start = offset + CHUNK_HEADER.size
+        if chunk_type == CHUNK_JSON:
+            gltf = orjson.loads(view[start:start + chunk_length])
+        elif chunk_type == CHUNK_BIN:
+            binary = view[start:start + chunk_length]
+        offset = start + chunk_length
+    if gltf is None:
+        raise ValueError("GLB has no JSON chunk")
+    return gltf, binary
+
+
+def read_glb_json(path: Path) -> Tuple[dict, int, int]:
+    """Read only the header and JSON chunk; returns (gltf, file length, BIN chunk length).
+
+    The binary buffer is never read, only the header of its chunk.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size + CHUNK_HEADER.size)
+        if len(header) < HEADER.size + CHUNK_HEADER.size:
+            raise ValueError("Not a GLB file")
+        total_length = check_header(header)
+        chunk_length, chunk_type = CHUNK_HEADER.unpack_from(header, HEADER.size)
+        if chunk_type != CHUNK_JSON:
+            raise ValueError("GLB does not start with a JSON chunk")
+        gltf = orjson.loads(f.read(chunk_length))
+        bin_header = f.read(CHUNK_HEADER.size)
+    bin_length = 0
+    if len(bin_header) == CHUNK_HEADER.size:
+        length, chunk_type = CHUNK_HEADER.unpack(bin_header)
+        bin_length = length if chunk_type == CHUNK_BIN else 0
+    return gltf, total_length, bin_length
+
+
+def summarize(gltf: dict, total_length: int, bin_length: Optional[int]) -> dict:
+    """Node names, bounds, triangle counts and textures, all from the JSON chunk."""
+    accessors = gltf.get('accessors', [])
+    buffer_views = gltf.get('bufferViews', [])
+    meshes = []
+    bounds_min, bounds_max = None, None
+    for mesh in gltf.get('meshes', []):
+        primitives = []
+        for primitive in mesh.get('primitives', []):
+            attributes = primitive.get('attributes', {})
+            position = accessors[attributes['POSITION']] if 'POSITION' in attributes else {}
+            count = accessors[primitive['indices']]['count'] if 'indices' in primitive else position.get('count', 0)
+            primitives.append({
+                'attributes': sorted(attributes),
+                'vertices': position.get('count', 0),
+                'triangles': count // 3 if primitive.get('mode', 4) == 4 else 0,
+                'material': primitive.get('material'),
+            })
+            if 'min' in position and 'max' in position:
+                bounds_min = position['min'] if bounds_min is None else [min(a, b) for a, b in zip(bounds_min, position['min'])]
+                bounds_max = position['max'] if bounds_max is None else [max(a, b) for a, b in zip(bounds_max, position['max'])]
+        meshes.append({'name': mesh.get('name'), 'primitives': primitives})
+    images = []
+    for image in gltf.get('images', []):
+        view = image.get('bufferView')
+        images.append({
+            'name': image.get('name'),
+            'mimeType': image.get('mimeType'),
+            'bytes': buffer_views[view]['byteLength'] if view is not None else None,
+        })
+    return {
+        'bytes': total_length,
+        'binBytes': bin_length,
+        'generator': gltf.get('asset', {}).get('generator'),
+        'nodes': [node.get('name') for node in gltf.get('nodes', [])],
+        'meshes': meshes,
+        'triangles': sum(p['triangles'] for m in meshes for p in m['primitives']),
+        'vertices': sum(p['vertices'] for m in meshes for p in m['primitives']),
+        # In mesh-local coordinates, as given by the POSITION accessors
+        'bounds': {'min': bounds_min, 'max': bounds_max} if bounds_min is not None else None,
+        'images': images,
+        'materials': [m.get('name') for m in gltf.get('materials', [])],
+        'extensionsUsed': gltf.get('extensionsUsed', []),
+    }
@@ -0,0 +1,101 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+import orjson
+
+from characters import SerializedBody
+
+MEDIA_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpg': 'image/jpeg'}
+# Names written by create_image_variants.py: {image}-{variant}.{hash}.{ext}
+HASHED_NAME_RE = re.compile(r'^[A-Za-z0-9_-]+\.[0-9a-f]{10}\.(avif|webp|jpg)$')
+
+
+def parse_accept(header: Optional[str]) -> Dict[str, float]:
+    """Media ranges of an Accept header mapped to their q-values, e.g. {'image/webp': 1.0, '*/*': 0.8}."""
+    ranges = {}
+    for part in (header or '').split(','):
+        media_range, *params = part.split(';')
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        ranges[media_range] = q
+    return ranges
+
+
+def accept_quality(ranges: Dict[str, float], media_type: str, explicit: bool = False) -> float:
+    """q-value of ``media_type`` from its most specific matching range; 0 when none matches.
+
+    With ``explicit`` only an exact match counts: browsers that cannot decode AVIF
+    or WebP still send image/* and */*, so a wildcard says nothing about those.
+    """
+    if media_type in ranges:
+        return ranges[media_type]
+    if explicit:
+        return 0.0
+    for wildcard in (media_type.split('/')[0] + '/*', '*/*'):
+        if wildcard in ranges:
+            return ranges[wildcard]
+    return 0.0
+
+
+class ImageVariants:
+    """Responsive image variants and their manifest, as written by create_image_variants.py.
+
+    The manifest is re-read whenever its mtime changes, so regenerating the
+    variants does not need a restart.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / 'manifest.json'
+        self._mtime_ns = None
+        self._manifest: dict = {}
+        self._body: Optional[SerializedBody] = None
+
+    def _refresh(self) -> bool:
+        try:
+            mtime_ns = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            self._mtime_ns, self._manifest, self._body = None, {}, None
+            return False
+        if mtime_ns != self._mtime_ns:
+            body = self.manifest_path.read_bytes()
+            self._manifest = orjson.loads(body)
+            self._body = SerializedBody(body)
+            self._mtime_ns = mtime_ns
+        return True
+
+    def manifest_body(self) -> Optional[SerializedBody]:
+        return self._body if self._refresh() else None
+
+    def negotiate(self, image: str, variant: str, accept: str) -> Optional[str]:
+        """Filename of the best format of ``image``/``variant`` the client accepts; JPEG is the fallback."""
+        if not self._refresh():
+            return None
+        entry = self._manifest.get('images', {}).get(image)
+        if not entry or variant not in entry['variants']:
+            return None
+        files = entry['variants'][variant]['formats']
+        # Without an Accept header anything goes, but only the JPEG is safe to assume
+        ranges = parse_accept(accept) if accept else {'*/*': 1.0}
+        best, best_q = None, 0.0
+        # Manifest order is the order of preference when q-values tie
+        for ext in self._manifest.get('formats', ()):
+            if ext not in files:
+                continue
+            q = accept_quality(ranges, MEDIA_TYPES[ext], explicit=ext != 'jpg')
+            if q > best_q:
+                best, best_q = ext, q
+        if best is None:
+            best = 'jpg'
+        return files.get(best, {}).get('file')
@@ -0,0 +1,207 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond DB commands up to slow requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Sharded:
+    """Per-thread storage so hot-path updates never take a lock.
+
+    Each thread writes only to its own shard; a scrape sums all shards. The only
+    lock is taken once per thread, when its shard is first created.
+    """
+
+    def __init__(self, factory: Callable[[], list]):
+        self._factory = factory
+        self._local = threading.local()
+        self._shards: List[list] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> list:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def shards(self) -> List[list]:
+        with self._lock:
+            return list(self._shards)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # Shard layout: [bucket counts..., +Inf count, sum]
+        width = len(self.buckets) + 1
+        self._data = _Sharded(lambda: [0] * width + [0.0])
+
+    def observe(self, value: float):
+        shard = self._data.shard()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def collect(self) -> Tuple[List[int], float]:
+        width = len(self.buckets) + 1
+        counts = [0] * width
+        total = 0.0
+        for shard in self._data.shards():
+            for i in range(width):
+                counts[i] += shard[i]
+            total += shard[-1]
+        return counts, total
+
+
+class Counter:
+    def __init__(self):
+        self._data = _Sharded(lambda: [0])
+
+    def inc(self, amount: float = 1):
+        self._data.shard()[0] += amount
+
+    def collect(self) -> float:
+        return sum(shard[0] for shard in self._data.shards())
+
+
+class Gauge:
+    """A value owned by the event loop thread (or computed on scrape via ``func``)."""
+
+    def __init__(self, func: Optional[Callable[[], float]] = None):
+        self.value = 0
+        self._func = func
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def collect(self) -> float:
+        return self._func() if self._func else self.value
+
+
+class Family:
+    """A named metric with a fixed set of label names, one child per label combination."""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 factory: Optional[Callable[[], object]] = None):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        for values, child in list(self._children.items()):
+            if self.kind == 'histogram':
+                counts, total = child.collect()
+                cumulative = 0
+                for bound, count in zip(child.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                    yield f'{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}'
+                yield f'{self.name}_sum{_labels(self.labelnames, values)} {total}'
+                yield f'{self.name}_count{_labels(self.labelnames, values)} {cumulative}'
+            else:
+                yield f'{self.name}{_labels(self.labelnames, values)} {child.collect()}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: List[Family] = []
+
+    def _add(self, family: Family) -> Family:
+        self._families.append(family)
+        return family
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Family:
+        return self._add(Family('histogram', name, documentation, labelnames, lambda: Histogram(buckets)))
+
+    def counter(self, name, documentation, labelnames=()) -> Family:
+        return self._add(Family('counter', name, documentation, labelnames, Counter))
+
+    def gauge(self, name, documentation, labelnames=(), func=None) -> Family:
+        return self._add(Family('gauge', name, documentation, labelnames, lambda: Gauge(func)))
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class HTTPMetrics:
+    def __init__(self, registry: MetricsRegistry):
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'HTTP request latency', ('method', 'route', 'status'))
+        self.sizes = registry.histogram(
+            'http_response_size_bytes', 'HTTP response body size', ('method', 'route'), SIZE_BUCKETS)
+        self.in_flight = registry.gauge('http_requests_in_flight', 'Requests currently being served').labels()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and response sizes per route.
+
+    The route label is the matched path template (``/api/status``), not the raw
+    URL, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight.dec()
+            route = scope.get('route')
+            route_path = getattr(route, 'path', None) or 'unmatched'
+            method = scope['method']
+            metrics.latency.labels(method, route_path, str(status)).observe(time.perf_counter() - start)
+            metrics.sizes.labels(method, route_path).observe(size)
@@ -0,0 +1,96 @@
+import threading
+from collections import Counter
+
+from pymongo import monitoring
+
+from metrics import MetricsRegistry
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool activity for every server the client talks to.
+
+    PyMongo calls listeners from its own threads, so counters are updated under
+    a lock and read back as a plain dict snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._open = Counter()
+        self._in_use = Counter()
+
+    def _bump(self, key, address=None, open_delta=0, in_use_delta=0):
+        with self._lock:
+            self._counts[key] += 1
+            if address is not None:
+                self._open[address] += open_delta
+                self._in_use[address] += in_use_delta
+
+    def pool_created(self, event):
+        self._bump('pools_created')
+
+    def pool_ready(self, event):
+        self._bump('pools_ready')
+
+    def pool_cleared(self, event):
+        self._bump('pools_cleared')
+
+    def pool_closed(self, event):
+        self._bump('pools_closed')
+
+    def connection_created(self, event):
+        self._bump('connections_created', event.address, open_delta=1)
+
+    def connection_ready(self, event):
+        self._bump('connections_ready')
+
+    def connection_closed(self, event):
+        self._bump('connections_closed', event.address, open_delta=-1)
+
+    def connection_check_out_started(self, event):
+        self._bump('checkouts_started')
+
+    def connection_check_out_failed(self, event):
+        self._bump('checkouts_failed')
+
+    def connection_checked_out(self, event):
+        self._bump('checkouts', event.address, in_use_delta=1)
+
+    def connection_checked_in(self, event):
+        self._bump('checkins', event.address, in_use_delta=-1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self._counts,
+                'open_connections': sum(self._open.values()),
+                'in_use_connections': sum(self._in_use.values()),
+                'servers': {
+                    f"{host}:{port}": {'open': self._open[(host, port)], 'in_use': self._in_use[(host, port)]}
+                    for host, port in self._open
+                },
+            }
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """Records per-command counts, failures and durations into the metrics registry.
+
+    Motor runs commands on executor threads; the histograms are sharded per
+    thread, so recording here never contends with the request path.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.durations = registry.histogram(
+            'mongodb_command_duration_seconds', 'MongoDB command duration', ('command',))
+        self.failures = registry.counter(
+            'mongodb_command_failures_total', 'Failed MongoDB commands', ('command',))
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.durations.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.durations.labels(event.command_name).observe(event.duration_micros / 1e6)
+        self.failures.labels(event.command_name).inc()
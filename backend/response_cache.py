@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Rough per-entry bookkeeping cost counted against the memory cap on top of the body
+ENTRY_OVERHEAD = 256
+
+
+class CacheEntry:
+    __slots__ = ('body', 'etag', 'headers', 'expires', 'size')
+
+    def __init__(self, body: bytes, headers: Dict[str, str], expires: float):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.headers = headers
+        self.expires = expires
+        self.size = len(body) + ENTRY_OVERHEAD
+
+
+class ResponseCache:
+    """TTL + LRU cache of serialized response bodies, bounded by total bytes.
+
+    Concurrent misses for the same key share a single fill, so a burst of
+    pollers costs one database query. ``invalidate()`` bumps a generation
+    counter: entries are dropped, and fills that started before the
+    invalidation are handed to their waiters but never stored.
+
+    With a ``shared_generation`` counter (shared_state.SharedCounter) the
+    invalidation is broadcast: every process using the same counter drops
+    its entries the next time it looks one up.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_bytes: int = 32 * 1024 * 1024, shared_generation=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.shared_generation = shared_generation
+        self._shared_seen = shared_generation.value if shared_generation is not None else 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._inflight: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """The live entry for ``key``, or None; a probe that misses is not counted."""
+        self._sync()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self._remove(key)
+        return None
+
+    async def get_or_fill(self, key: Hashable,
+                          fill: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]) -> CacheEntry:
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        self.misses += 1
+        flight_key = (self._generation, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(flight_key, fill))
+            self._inflight[flight_key] = task
+        # Shielded so a disconnecting client does not cancel the fill other waiters share
+        return await asyncio.shield(task)
+
+    async def _fill(self, flight_key, fill) -> CacheEntry:
+        generation, key = flight_key
+        try:
+            body, headers = await fill()
+            entry = CacheEntry(body, headers, time.monotonic() + self.ttl)
+            self._sync()
+            if generation == self._generation and self.ttl > 0:
+                self._store(key, entry)
+            return entry
+        finally:
+            self._inflight.pop(flight_key, None)
+
+    def _store(self, key, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _sync(self):
+        # Another process invalidated since we last looked
+        if self.shared_generation is not None:
+            shared = self.shared_generation.value
+            if shared != self._shared_seen:
+                self._shared_seen = shared
+                self._invalidate_local()
+
+    def _invalidate_local(self):
+        self._generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def invalidate(self):
+        self._invalidate_local()
+        if self.shared_generation is not None:
+            self._shared_seen = self.shared_generation.increment()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
@@ -0,0 +1,228 @@
+import bisect
+import heapq
+import html
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Field weights for BM25F: short identifying fields count for more than long narrative ones
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'tags': 2.5,
+    'location': 2.0,
+    'description': 1.0,
+    'context': 1.0,
+    'mainTeaching': 1.0,
+    'miraculousManifestations': 0.6,
+    'mainDialogue': 0.6,
+    'presentAssembly': 0.6,
+    'spiritualProgression': 0.6,
+    'transition': 0.4,
+    'uniqueElements': 0.6,
+}
+# Fields tried, in order, when picking the snippet for a hit
+SNIPPET_FIELDS = ('name', 'description', 'mainTeaching', 'context', 'location', 'uniqueElements',
+                  'spiritualProgression', 'miraculousManifestations', 'mainDialogue', 'presentAssembly',
+                  'transition', 'tags')
+
+K1 = 1.2
+B = 0.75
+SNIPPET_CHARS = 160
+MAX_PREFIX_EXPANSIONS = 20
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOPWORDS = frozenset('''
+a ao aos as com como da das de dela dele do dos e ela ele em entre era essa esse esta este eu foi
+ha isso isto ja la mais mas me mesmo na nas nem no nos o os ou para pela pelo por qual que se
+sem ser seu seus sua suas tambem te um uma umas uns the of and to in is
+'''.split())
+
+# Portuguese plural endings (after diacritic folding) and their singular replacements
+PLURAL_RULES = (
+    ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+    ('ns', 'm'), ('les', 'l'), ('res', 'r'), ('zes', 'z'),
+)
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics, so Mañjuśrī and Manjusri compare equal."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(token: str) -> str:
+    """Light Portuguese stemmer: plural removal, then adverb and gender/number vowels."""
+    if len(token) < 4:
+        return token
+    for suffix, replacement in PLURAL_RULES:
+        if token.endswith(suffix):
+            token = token[:-len(suffix)] + replacement
+            break
+    else:
+        if token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+    if len(token) > 7 and token.endswith('mente'):
+        token = token[:-5]
+    if len(token) > 4 and token[-1] in 'aeo':
+        token = token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[Tuple[str, int, int]]:
+    """Return (stem, start, end) for every indexable token, with offsets into ``text``."""
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        folded = fold(match.group())
+        if folded in STOPWORDS:
+            continue
+        tokens.append((stem(folded), match.start(), match.end()))
+    return tokens
+
+
+def query_terms(query: str, prefix: bool) -> Tuple[List[str], Optional[str]]:
+    folded = [fold(t) for t in TOKEN_RE.findall(query)]
+    if not folded:
+        return [], None
+    # The last token may still be being typed, so it is also matched as a prefix
+    last = folded[-1] if prefix else None
+    terms = [stem(t) for t in folded if t not in STOPWORDS]
+    return terms, last
+
+
+class SearchIndex:
+    """Inverted index over the chapter documents with BM25F ranking.
+
+    Per-document contributions are precomputed, so a query only walks the
+    postings of its terms. Token offsets are kept per document so snippets
+    are cut without re-tokenizing the matched fields.
+    """
+
+    def __init__(self, documents: Sequence[Dict]):
+        self.documents = list(documents)
+        n_docs = len(self.documents)
+        field_lengths = defaultdict(list)
+        analyzed = []
+        surface_counts = defaultdict(Counter)
+
+        for doc in self.documents:
+            per_field = {}
+            for field in FIELD_WEIGHTS:
+                value = doc.get(field) or ''
+                text = ' '.join(value) if isinstance(value, list) else str(value)
+                tokens = analyze(text)
+                per_field[field] = (text, tokens)
+                field_lengths[field].append(len(tokens))
+                for match in TOKEN_RE.finditer(text):
+                    surface_counts[fold(match.group())][match.group()] += 1
+            analyzed.append(per_field)
+
+        avg_length = {field: (sum(lengths) / len(lengths)) or 1.0 for field, lengths in field_lengths.items()}
+
+        # BM25F: length-normalized, weighted term frequency summed across fields
+        weighted_tf = defaultdict(dict)
+        self.offsets: List[Dict[str, List[Tuple[str, int, int]]]] = []
+        for doc_id, per_field in enumerate(analyzed):
+            doc_offsets = defaultdict(list)
+            for field, (text, tokens) in per_field.items():
+                if not tokens:
+                    continue
+                norm = 1 - B + B * len(tokens) / avg_length[field]
+                for term, count in Counter(t for t, _, _ in tokens).items():
+                    weighted_tf[term][doc_id] = weighted_tf[term].get(doc_id, 0.0) + FIELD_WEIGHTS[field] * count / norm
+                for term, start, end in tokens:
+                    doc_offsets[term].append((field, start, end))
+            self.offsets.append(doc_offsets)
+
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for term, docs in weighted_tf.items():
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = [(doc_id, idf * tf * (K1 + 1) / (K1 + tf)) for doc_id, tf in docs.items()]
+
+        # Typeahead: folded surface forms in sorted order, each mapped to its stem and display spelling
+        self.vocabulary = sorted(t for t in surface_counts if t not in STOPWORDS)
+        self.vocabulary_stems = [stem(t) for t in self.vocabulary]
+        self.display_forms = {t: surface_counts[t].most_common(1)[0][0] for t in self.vocabulary}
+        self.texts = [{field: text for field, (text, _) in per_field.items()} for per_field in analyzed]
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + '\uffff', lo)
+        return lo, hi
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        lo, hi = self._prefix_range(prefix)
+        stems = dict.fromkeys(self.vocabulary_stems[lo:hi])
+        ranked = sorted(stems, key=lambda s: -len(self.postings.get(s, ())))
+        return ranked[:MAX_PREFIX_EXPANSIONS]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        folded = fold(prefix.strip())
+        if not folded:
+            return []
+        lo, hi = self._prefix_range(folded)
+        candidates = self.vocabulary[lo:hi]
+        candidates.sort(key=lambda t: -len(self.postings.get(stem(t), ())))
+        return [self.display_forms[t] for t in candidates[:limit]]
+
+    def search(self, query: str, k: int = 10, prefix: bool = True) -> List[Dict]:
+        terms, last = query_terms(query, prefix)
+        scores = defaultdict(float)
+        matched_terms = set()
+        for term in terms:
+            for doc_id, contribution in self.postings.get(term, ()):
+                scores[doc_id] += contribution
+            matched_terms.add(term)
+        if last and len(last) >= 2:
+            for term in self.expand_prefix(last):
+                if term in matched_terms:
+                    continue
+                # Completions score a little below an exact match of the typed word
+                for doc_id, contribution in self.postings.get(term, ()):
+                    scores[doc_id] += 0.8 * contribution
+                matched_terms.add(term)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self._hit(doc_id, score, matched_terms) for doc_id, score in top]
+
+    def _hit(self, doc_id: int, score: float, terms: set) -> Dict:
+        doc = self.documents[doc_id]
+        offsets = self.offsets[doc_id]
+        spans = defaultdict(list)
+        for term in terms:
+            for field, start, end in offsets.get(term, ()):
+                spans[field].append((start, end))
+        field = next((f for f in SNIPPET_FIELDS if spans.get(f)), 'description')
+        return {
+            'id': doc.get('id'),
+            'chapter': doc.get('chapter'),
+            'name': doc.get('name'),
+            'score': round(score, 4),
+            'field': field,
+            'snippet': self._snippet(self.texts[doc_id].get(field, ''), sorted(spans.get(field, []))),
+        }
+
+    @staticmethod
+    def _snippet(text: str, spans: List[Tuple[int, int]]) -> str:
+        """Cut a window around the first match and wrap matches in <mark>; the rest is HTML-escaped."""
+        if not spans:
+            return html.escape(text[:SNIPPET_CHARS]) + ('…' if len(text) > SNIPPET_CHARS else '')
+        start = max(spans[0][0] - SNIPPET_CHARS // 4, 0)
+        if start:
+            space = text.rfind(' ', 0, start)
+            start = space + 1 if space >= 0 else start
+        end = min(start + SNIPPET_CHARS, len(text))
+        parts = ['…'] if start else []
+        cursor = start
+        for span_start, span_end in spans:
+            if span_start < cursor or span_end > end:
+                continue
+            parts.append(html.escape(text[cursor:span_start]))
+            parts.append('<mark>' + html.escape(text[span_start:span_end]) + '</mark>')
+            cursor = span_end
+        parts.append(html.escape(text[cursor:end]))
+        if end < len(text):
+            parts.append('…')
+        return ''.join(parts)
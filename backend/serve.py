@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Run the backend with one worker process per available CPU.
+
+    python backend/serve.py [--workers N] [--host HOST] [--port PORT]
+
+With more than one worker, the chapter dataset is parsed and serialized once
+here and written to a snapshot in /dev/shm that every worker maps, rather than
+each worker building its own copy. The same directory holds the counter
+workers use to invalidate each other's GET /api/status caches. It is removed
+when the server exits.
+
+What is shared is deliberately narrow:
+
+- Only the serialized /api/characters bodies (default projection) are served
+  from the shared pages. Each worker still decodes its own copy of the rows
+  and builds its own search index from them, so those cost memory and
+  startup time once per worker.
+- Each worker keeps its own GET /api/status cache. Only the generation
+  counter is shared, so a write in one worker makes every worker refill.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from characters import CharacterStore
+from settings import ROOT_DIR, Settings
+from shared_state import SNAPSHOT_NAME, write_snapshot
+
+logger = logging.getLogger('serve')
+
+# cgroup v2 CPU limit: "<quota> <period>" in microseconds, or "max <period>" when unlimited
+CGROUP_CPU_MAX = Path('/sys/fs/cgroup/cpu.max')
+
+
+def cpu_count() -> int:
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        quota, period = CGROUP_CPU_MAX.read_text().split()
+        if quota != 'max':
+            count = min(count, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def prepare_shared_state(settings: Settings) -> Path:
+    """Write the chapter snapshot the workers share and return its directory."""
+    shm = Path('/dev/shm')
+    directory = Path(tempfile.mkdtemp(prefix='backend-', dir=shm if shm.is_dir() else None))
+    store = CharacterStore.from_csv(settings.characters_csv)
+    write_snapshot(directory / SNAPSHOT_NAME, store.rows, store.shared_bodies())
+    logger.info("Shared %d characters with the workers through %s", len(store), directory)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: WEB_WORKERS, else one per CPU)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    settings = Settings.from_env()
+    workers = args.workers or settings.web_workers or cpu_count()
+
+    shared_dir = None
+    if workers > 1 and not settings.shared_state_dir:
+        shared_dir = prepare_shared_state(settings)
+        # Workers are spawned, not forked; they read it through Settings.from_env()
+        os.environ['SHARED_STATE_DIR'] = str(shared_dir)
+    try:
+        logger.info("Starting %d worker%s", workers, '' if workers == 1 else 's')
+        uvicorn.run('server:app', host=args.host, port=args.port, workers=workers, app_dir=str(ROOT_DIR))
+    finally:
+        if shared_dir is not None:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
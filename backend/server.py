@@ -1,26 +1,407 @@
-from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+from fastapi import (APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket,
+                     WebSocketDisconnect)
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from contextlib import aclosing, asynccontextmanager, suppress
+import asyncio
+import functools
+import math
+import time
 import logging
-from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, ValidationError
+from typing import Callable, List, Optional, Tuple
 import uuid
-from datetime import datetime
+import base64
+from collections import defaultdict
+from datetime import datetime, timedelta
 
+import orjson
+from admission import AdmissionLimiter, Overloaded, RateLimiter
+from characters import CharacterStore, SerializedBody
+from images import HASHED_NAME_RE, MEDIA_TYPES, ImageVariants
+from metrics import HTTPMetrics, MetricsMiddleware, MetricsRegistry
+from response_cache import ResponseCache, etag_matches
+from search import SearchIndex
+from settings import Settings
+from shared_state import SNAPSHOT_NAME, STATUS_GENERATION_NAME, SharedCounter, Snapshot
+from static_assets import ModelMetadata, StaticAssets, file_response
+from status_spool import RecordTooLarge, SpoolFull, StatusSpool, insert_status_docs, upsert_status_docs
+from status_stream import OVERFLOW, RESET, StatusBroadcaster, StatusChangeStream
+from streaming_json import iter_json_array, iter_ndjson
+from write_buffer import WriteBuffer, WriteBufferFull
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+# Importing this module has no side effects: configuration is read, logging set up
+# and resources created by create_app(), and Mongo is only connected (and Motor/PyMongo
+# only imported) when the app's lifespan starts.
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
+
+# Pagination limits for GET /api/status
+STATUS_PAGE_MAX = 1000
+STATUS_SORT = [("timestamp", -1), ("id", -1)]
+# Documents are written by this service only, so reads project to the model fields
+# and are serialized as-is instead of being re-validated row by row
+STATUS_PROJECTION = {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}
+# Longest client_name accepted by the status write endpoints
+CLIENT_NAME_MAX_LENGTH = 256
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# pymongo.ASCENDING / DESCENDING
+ASCENDING, DESCENDING = 1, -1
+# Indexes the status handlers rely on, ensured at startup, as IndexModel (keys, options)
+STATUS_INDEXES = [
+    # Newest-first listing and keyset pagination; also serves timestamp range scans
+    (STATUS_SORT, {"name": "timestamp_id_desc"}),
+    # Per-client history and the summary/clients aggregations
+    ([("client_name", ASCENDING), ("timestamp", DESCENDING)], {"name": "client_timestamp"}),
+]
+# Time-series collections cannot carry unique indexes
+STATUS_UNIQUE_ID_INDEX = ([("id", ASCENDING)], {"name": "id_unique", "unique": True})
+STATUS_TTL_INDEX_NAME = "timestamp_ttl"
+ROLLUP_INDEXES = [
+    ([("client_name", ASCENDING), ("minute", ASCENDING)], {"name": "client_minute", "unique": True}),
+    ([("minute", ASCENDING)], {"name": "minute"}),
+]
+# Rollups expire with the status checks they count
+ROLLUP_TTL_INDEX_NAME = "minute_ttl"
+# status_meta document recording since when status_rollups is maintained, and whether
+# the checks written before that have been folded in
+ROLLUP_STATE_ID = "rollups"
+ROLLUP_BACKFILL_BATCH = 1000
+
+CHARACTERS_CACHE_CONTROL = "public, max-age=300"
+# Content-hashed names and ?v=<version> URLs (as returned by /api/models/{n}/meta) never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMAGE_MANIFEST_CACHE_CONTROL = "public, max-age=60"
+# Unversioned model and image URLs revalidate
+ASSET_CACHE_CONTROL = "public, max-age=300"
+MODEL_NAME_PATTERN = r'^[A-Za-z0-9_-]+(\.lod\d+)?\.glb$'
+IMAGE_NAME_PATTERN = r'^[A-Za-z0-9_-]+(\.[0-9a-f]{10})?\.(avif|webp|jpg)$'
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+def create_mongo_client(settings: Settings, event_listeners: list):
+    if not settings.mongo_url:
+        raise RuntimeError("MONGO_URL is not set")
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    options = dict(
+        maxPoolSize=settings.mongo_max_pool_size,
+        minPoolSize=settings.mongo_min_pool_size,
+        waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+        readPreference=settings.mongo_read_preference,
+        event_listeners=event_listeners,
+    )
+    if settings.mongo_compressors:
+        options['compressors'] = settings.mongo_compressors
+    return AsyncIOMotorClient(settings.mongo_url, **options)
+
+class Resources:
+    """Everything one app instance owns.
+
+    Caches, metrics and static file indexes are created with the app; the
+    character data, Mongo client and write buffer are set up by ``start()``
+    when the lifespan begins. ``mongo_client_factory(settings, event_listeners)``
+    can be swapped in tests, e.g. for mongomock-motor.
+    """
+
+    def __init__(self, settings: Settings, mongo_client_factory: Optional[Callable] = None):
+        self.settings = settings
+        self.mongo_client_factory = mongo_client_factory or create_mongo_client
+
+        # Metrics exposed in Prometheus text format at /api/metrics
+        self.metrics_registry = MetricsRegistry()
+        self.http_metrics = HTTPMetrics(self.metrics_registry)
+        self.pool_stats = None
+        self.command_stats = None
+
+        # Under serve.py, state shared with the other worker processes
+        self.status_generation = None
+        self.snapshot = None
+        if settings.shared_state_dir:
+            self.status_generation = SharedCounter(settings.shared_state_dir / STATUS_GENERATION_NAME)
+
+        self.status_cache = ResponseCache(
+            ttl=settings.status_cache_ttl_ms / 1000,
+            max_bytes=settings.status_cache_max_bytes,
+            shared_generation=self.status_generation,
+        )
+        self.image_variants = ImageVariants(settings.image_variants_dir)
+        # Static models and images, with Range, ETag and pre-compressed (.br/.gz) variants
+        self.model_files = StaticAssets(settings.models_dirs, MODEL_NAME_PATTERN)
+        self.image_files = StaticAssets([settings.image_variants_dir, settings.images_dir], IMAGE_NAME_PATTERN)
+        self.model_metadata = ModelMetadata()
+        # Live status events for /api/status/stream and /api/status/ws
+        self.status_stream = StatusBroadcaster(settings.status_stream_queue_size,
+                                               settings.status_stream_catchup_max, self.metrics_registry)
+        self.status_changes = None
+        # Without a change stream, handlers publish the writes this process makes
+        self.publish_locally = False
+        # Per-client ingestion limits, and admission control in front of the MongoDB handlers
+        self.rate_limiter = RateLimiter(
+            settings.rate_limit_client_per_s, settings.rate_limit_client_burst,
+            settings.rate_limit_address_per_s, settings.rate_limit_address_burst,
+            settings.rate_limit_max_keys, self.metrics_registry,
+        )
+        self.admission = AdmissionLimiter(
+            settings.db_max_concurrency or settings.mongo_max_pool_size,
+            max_queue=settings.db_queue_max,
+            max_wait=settings.db_queue_target_ms / 1000,
+            registry=self.metrics_registry,
+        )
+
+        # Durable ingestion through a local write-ahead log, opened by start()
+        self.status_spool = None
+        if settings.status_spool_dir:
+            self.status_spool = StatusSpool(
+                settings.status_spool_dir,
+                segment_size=settings.status_spool_segment_mb * 1024 * 1024,
+                max_bytes=settings.status_spool_max_mb * 1024 * 1024,
+                sync_interval=settings.status_spool_sync_ms / 1000,
+                registry=self.metrics_registry,
+            )
+
+        # status_meta's rollup state while rollups are on: {"since": ..., "backfilled": ...}
+        self.rollup_state = None
+        self._rollup_backfill: Optional[asyncio.Task] = None
+
+        self.character_store = None
+        self.search_index = None
+        self.client = None
+        self.db = None
+        self.status_writer = None
+        self._register_gauges()
+
+    def _pool_snapshot(self) -> dict:
+        return self.pool_stats.snapshot() if self.pool_stats else {}
+
+    def _register_gauges(self):
+        registry = self.metrics_registry
+        registry.gauge('mongodb_pool_open_connections', 'Open MongoDB connections',
+                       func=lambda: self._pool_snapshot().get('open_connections', 0)).labels()
+        registry.gauge('mongodb_pool_in_use_connections', 'MongoDB connections checked out',
+                       func=lambda: self._pool_snapshot().get('in_use_connections', 0)).labels()
+        registry.gauge('mongodb_pool_checkouts_failed', 'MongoDB connection check-outs that failed',
+                       func=lambda: self._pool_snapshot().get('checkouts_failed', 0)).labels()
+        registry.gauge('status_write_queue_depth', 'Status documents waiting for a batch insert',
+                       func=lambda: self.status_writer.depth if self.status_writer else 0).labels()
+        registry.gauge('status_cache_hits', 'GET /api/status responses served from cache',
+                       func=lambda: self.status_cache.hits).labels()
+        registry.gauge('status_cache_misses', 'GET /api/status responses that needed a query',
+                       func=lambda: self.status_cache.misses).labels()
+        registry.gauge('status_cache_bytes', 'Bytes held by the GET /api/status cache',
+                       func=lambda: self.status_cache.size_bytes).labels()
+
+    def _load_characters(self):
+        settings = self.settings
+        snapshot_path = settings.shared_state_dir / SNAPSHOT_NAME if settings.shared_state_dir else None
+        if snapshot_path is not None and snapshot_path.exists():
+            # Serialized bodies stay in the mapping every worker shares; the rows and the
+            # search index built from them below are still per worker
+            self.snapshot = Snapshot(snapshot_path)
+            self.character_store = CharacterStore.from_snapshot(self.snapshot)
+            source = snapshot_path
+        else:
+            self.character_store = CharacterStore.from_csv(settings.characters_csv)
+            source = settings.characters_csv
+        self.search_index = SearchIndex(self.character_store.documents())
+        logger.info("Loaded %d characters from %s (%d search terms)",
+                    len(self.character_store), source, len(self.search_index.postings))
+
+    async def start(self):
+        # Parsing the dataset is CPU work, so it runs on a thread while Mongo connects
+        await asyncio.gather(asyncio.to_thread(self._load_characters), self._start_mongo())
+
+    async def _start_mongo(self):
+        settings = self.settings
+        if not settings.db_name:
+            raise RuntimeError("DB_NAME is not set")
+        from mongo_monitoring import CommandStatsListener, PoolStatsListener
+        if self.pool_stats is None:
+            self.pool_stats = PoolStatsListener()
+            self.command_stats = CommandStatsListener(self.metrics_registry)
+        self.client = self.mongo_client_factory(settings, [self.pool_stats, self.command_stats])
+        self.db = self.client[settings.db_name]
+
+        # Concurrent pings each check out their own connection, so the pool is warm
+        # before the first request; a failed ping aborts startup instead of serving errors
+        await asyncio.gather(*(self.client.admin.command('ping')
+                               for _ in range(max(settings.mongo_min_pool_size, 1))))
+        await ensure_status_collection(self.db, settings)
+        if settings.status_rollups:
+            await self._start_rollups()
+        await self._start_status_stream()
+
+        self.status_writer = WriteBuffer(
+            self.db.status_checks,
+            max_batch=settings.status_write_batch_size,
+            flush_interval=settings.status_write_flush_ms / 1000,
+            max_queue=settings.status_write_queue_size,
+            on_flush=functools.partial(record_status_rollups, self.db) if settings.status_rollups else None,
+        )
+        self.status_writer.start()
+        if self.status_spool is not None:
+            # Recovery scans whatever a previous run left behind, so it stays off the event loop
+            await asyncio.to_thread(self.status_spool.open)
+            self.status_spool.start(self._replay_status_docs, settings.status_write_batch_size)
+        logger.info("MongoDB ready: %s", self.pool_stats.snapshot())
+
+    async def _start_rollups(self):
+        self.rollup_state = await start_status_rollups(self.db)
+        if not self.rollup_state["backfilled"]:
+            # Until it is done, checks from before rollups were turned on are counted from status_checks
+            self._rollup_backfill = asyncio.create_task(self._backfill_rollups())
+
+    async def _backfill_rollups(self):
+        since = self.rollup_state["since"]
+        try:
+            minutes = await backfill_status_rollups(self.db, since - timedelta(minutes=1))
+        except Exception:
+            logger.exception("Backfilling status_rollups failed; it is retried on the next start")
+            return
+        await self.db.status_meta.update_one({"_id": ROLLUP_STATE_ID, "since": since},
+                                             {"$set": {"backfilled": True}})
+        self.rollup_state = dict(self.rollup_state, backfilled=True)
+        logger.info("Backfilled %d client-minutes of status_rollups", minutes)
+
+    async def _start_status_stream(self):
+        source = self.settings.status_stream_source
+        if source != 'local':
+            changes = StatusChangeStream(self.db.status_checks, self.status_stream)
+            try:
+                await changes.open()
+            except Exception as e:
+                if source == 'changestream':
+                    raise
+                with suppress(Exception):
+                    await changes.close()
+                logger.info("Change streams unavailable (%s); status streams only see this process's writes", e)
+                if self.settings.shared_state_dir:
+                    logger.warning("Running with several workers: /api/status/stream and /api/status/ws "
+                                   "clients miss writes handled by other workers")
+            else:
+                self.status_changes = changes
+        self.publish_locally = self.status_changes is None
+
+    async def _replay_status_docs(self, docs: List[dict]):
+        if self.settings.status_timeseries:
+            docs = await insert_status_docs(self.db.status_checks, docs)
+        else:
+            docs = await upsert_status_docs(self.db.status_checks, docs)
+        await self.status_written(docs)
+
+    async def status_written(self, docs: List[dict]):
+        """Refresh what depends on status_checks once ``docs`` are stored: cached pages, streams, rollups."""
+        if not docs:
+            return
+        self.status_cache.invalidate()
+        if self.publish_locally:
+            for doc in docs:
+                self.status_stream.publish(doc)
+        if self.settings.status_rollups:
+            try:
+                await record_status_rollups(self.db, docs)
+            except Exception:
+                logger.exception("Failed to update status rollups for a batch of %d documents", len(docs))
+
+    async def close(self):
+        if self._rollup_backfill is not None:
+            self._rollup_backfill.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._rollup_backfill
+            self._rollup_backfill = None
+        if self.status_changes is not None:
+            await self.status_changes.close()
+            self.status_changes = None
+        if self.status_spool is not None:
+            # Drains what it can while MongoDB is still connected; the rest is replayed on the next start
+            await self.status_spool.close()
+        if self.status_writer is not None:
+            await self.status_writer.close()
+            self.status_writer = None
+        if self.client is not None:
+            self.client.close()
+            self.client = self.db = None
+        if self.status_generation is not None:
+            self.status_generation.close()
+            self.status_generation = None
 
-# Create the main app without a prefix
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    resources: Resources = app.state.resources
+    await resources.start()
+    try:
+        yield
+    finally:
+        await resources.close()
+
+async def get_resources(request: Request) -> Resources:
+    return request.app.state.resources
+
+def retry_after(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+def check_rate_limit(request: Request, client_name: Optional[str]):
+    address = request.client.host if request.client else None
+    wait = request.app.state.resources.rate_limiter.check(address, client_name)
+    if wait:
+        raise HTTPException(status_code=429, detail="Too many requests", headers=retry_after(wait))
+
+async def limit_status_rate(request: Request):
+    """Rate limit a single status write by remote address and client_name, before it queues for a slot."""
+    # FastAPI decodes JSON bodies with request.json() on this same Request before solving
+    # dependencies, and Starlette keeps the result, so this does not parse the body again.
+    # Validation happens in the handler
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    client_name = body.get("client_name") if isinstance(body, dict) else None
+    check_rate_limit(request, client_name if isinstance(client_name, str) else None)
+
+async def limit_address_rate(request: Request):
+    check_rate_limit(request, None)
+
+async def acquire_admission(admission: AdmissionLimiter):
+    """Take a database admission slot, or shed the request with 503 when the queue is too slow."""
+    try:
+        await admission.acquire()
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail="Server is overloaded", headers=retry_after(e.retry_after))
+
+async def admit(request: Request):
+    """Hold a database admission slot while the handler runs.
+
+    The slot is released once the handler returns, before a streamed body is
+    sent; handlers that stream from MongoDB use AdmittedStreamingResponse instead.
+    """
+    admission = request.app.state.resources.admission
+    await acquire_admission(admission)
+    try:
+        yield
+    finally:
+        admission.release()
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """A StreamingResponse that releases an admission slot only once its body is done (or abandoned)."""
+
+    def __init__(self, content, admission: AdmissionLimiter, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Closes the Motor cursor before the slot passes to the next request
+            with suppress(Exception):
+                await self.body_iterator.aclose()
+            self.admission.release()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -33,43 +414,673 @@ class StatusCheck(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class StatusCheckCreate(BaseModel):
+    client_name: str = Field(max_length=CLIENT_NAME_MAX_LENGTH)
+
+class StatusBucket(BaseModel):
+    client_name: str
+    bucket: datetime
+    count: int
+
+class StatusClient(BaseModel):
     client_name: str
+    last_seen: datetime
+    count: int
+
+class StatusBatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class StatusBatchResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    results: List[StatusBatchItemResult] = []
 
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
 
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
+@api_router.get("/health")
+async def health(resources: Resources = Depends(get_resources)):
+    await resources.client.admin.command('ping')
+    return {"status": "ok", "mongo_pool": resources.pool_stats.snapshot()}
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(resources: Resources = Depends(get_resources)):
+    return PlainTextResponse(resources.metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.post("/status", response_model=StatusCheck, dependencies=[Depends(limit_status_rate), Depends(admit)])
+async def create_status_check(input: StatusCheckCreate, resources: Resources = Depends(get_resources)):
+    status_doc = StatusCheck(client_name=input.client_name).model_dump()
+    # Serialize before the insert adds Mongo's _id to the document
+    body = orjson.dumps(status_doc)
+    if resources.status_spool is not None:
+        # Acknowledged once it is on local disk; it reaches MongoDB when the spool is replayed
+        try:
+            await resources.status_spool.append([status_doc])
+        except SpoolFull:
+            raise HTTPException(status_code=503, detail="Status spool is full", headers=retry_after(1))
+        except RecordTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        return Response(content=body, media_type="application/json")
+    try:
+        await resources.status_writer.submit(status_doc)
+    except WriteBufferFull:
+        raise HTTPException(status_code=503, detail="Status write queue is full",
+                            headers=retry_after(resources.status_writer.enqueue_timeout))
+    resources.status_cache.invalidate()
+    if resources.publish_locally:
+        resources.status_stream.publish(status_doc)
+    return Response(content=body, media_type="application/json")
+
+def format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+
+async def insert_status_chunk(resources: Resources, chunk: list, result: StatusBatchResult):
+    """Validate a chunk of raw items and write the valid ones with a single insert_many (or spool append).
+
+    Items over their client_name's rate limit fail individually, like invalid ones.
+    """
+    from pymongo.errors import BulkWriteError
+
+    docs, pending, chunk_results = [], [], []
+    for index, item in chunk:
+        if isinstance(item, ValueError):
+            chunk_results.append(StatusBatchItemResult(index=index, error=f"Invalid JSON: {item}"))
+            continue
+        try:
+            status_create = StatusCheckCreate.model_validate(item)
+        except ValidationError as e:
+            chunk_results.append(StatusBatchItemResult(index=index, error=format_validation_error(e)))
+            continue
+        # Each item costs a token from its client's bucket, as a single POST /api/status would
+        if resources.rate_limiter.check(None, status_create.client_name):
+            chunk_results.append(StatusBatchItemResult(index=index, error="Too many requests"))
+            continue
+        status_doc = StatusCheck(client_name=status_create.client_name).model_dump()
+        docs.append(status_doc)
+        pending.append(StatusBatchItemResult(index=index, id=status_doc["id"]))
+
+    failed = {}
+    if docs and resources.status_spool is not None:
+        try:
+            await resources.status_spool.append(docs)
+        except (SpoolFull, RecordTooLarge) as e:
+            failed = dict.fromkeys(range(len(docs)), str(e))
+    elif docs:
+        try:
+            await resources.db.status_checks.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {err['index']: err.get('errmsg', 'write error') for err in e.details.get('writeErrors', [])}
+        await resources.status_written([doc for position, doc in enumerate(docs) if position not in failed])
+    for position, item_result in enumerate(pending):
+        if position in failed:
+            item_result.id = None
+            item_result.error = failed[position]
+        chunk_results.append(item_result)
+
+    chunk_results.sort(key=lambda r: r.index)
+    failures = sum(1 for r in chunk_results if r.error)
+    result.results.extend(chunk_results)
+    result.failed += failures
+    result.inserted += len(chunk_results) - failures
+
+@api_router.post("/status/batch", response_model=StatusBatchResult, response_model_exclude_none=True,
+                 dependencies=[Depends(limit_address_rate), Depends(admit)])
+async def create_status_checks_batch(request: Request, resources: Resources = Depends(get_resources)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        items = iter_ndjson(request.stream())
+    else:
+        items = iter_json_array(request.stream())
+
+    max_items = resources.settings.status_batch_max_items
+    chunk_size = resources.settings.status_batch_chunk_size
+    result = StatusBatchResult()
+    chunk = []
+    index = 0
+    try:
+        async for item in items:
+            if index >= max_items:
+                if chunk:
+                    await insert_status_chunk(resources, chunk, result)
+                return JSONResponse(status_code=413, content={
+                    "detail": f"Batch exceeds {max_items} items; the remainder was not read",
+                    **result.model_dump(exclude_none=True),
+                })
+            chunk.append((index, item))
+            index += 1
+            if len(chunk) >= chunk_size:
+                await insert_status_chunk(resources, chunk, result)
+                chunk = []
+    except ValueError as e:
+        if chunk:
+            await insert_status_chunk(resources, chunk, result)
+        return JSONResponse(status_code=400, content={
+            "detail": f"Malformed request body: {e}",
+            **result.model_dump(exclude_none=True),
+        })
+
+    if chunk:
+        await insert_status_chunk(resources, chunk, result)
+    return result
+
+def date_bucket(date: str, unit: str) -> dict:
+    """Truncate ``date`` to the start of its UTC minute, hour or day (what $dateTrunc does on MongoDB 5.0+)."""
+    parts = {"year": {"$year": date}, "month": {"$month": date}, "day": {"$dayOfMonth": date}}
+    if unit in ("hour", "minute"):
+        parts["hour"] = {"$hour": date}
+    if unit == "minute":
+        parts["minute"] = {"$minute": date}
+    return {"$dateFromParts": parts}
+
+def range_match(field: str, intervals: List[Tuple[Optional[datetime], Optional[datetime]]]) -> Optional[dict]:
+    """A filter for ``field`` in any of the half-open [lo, hi) intervals (None is unbounded); None if there are none."""
+    conditions = []
+    for lo, hi in intervals:
+        if lo is not None and hi is not None and lo >= hi:
+            continue
+        bounds = {}
+        if lo is not None:
+            bounds["$gte"] = lo
+        if hi is not None:
+            bounds["$lt"] = hi
+        conditions.append({field: bounds} if bounds else {})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+def clip(intervals, lo: Optional[datetime], hi: Optional[datetime]):
+    """``intervals`` intersected with [lo, hi)."""
+    clipped = []
+    for start, end in intervals:
+        if lo is not None:
+            start = lo if start is None else max(start, lo)
+        if hi is not None:
+            end = hi if end is None else min(end, hi)
+        clipped.append((start, end))
+    return clipped
+
+def status_count_sources(resources: Resources, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> List[Tuple[object, dict, str, dict]]:
+    """Where the checks stored in [since, until) are counted: (collection, filter, time field, count).
+
+    Without rollups that is status_checks alone. With them, status_rollups covers
+    the minutes from the rollup state's ``since`` on and, once the backfill is
+    done, those before the minute preceding it; the rest is counted from
+    status_checks.
+    """
+    state = resources.rollup_state
+    raw = (resources.db.status_checks, "timestamp", {"$sum": 1})
+    if state is None:
+        plan = [(raw, [(None, None)])]
+    else:
+        rollups = (resources.db.status_rollups, "minute", {"$sum": "$count"})
+        rollups_since = state["since"]
+        # The minute before ``since`` may hold checks from before and after rollups were turned on
+        split = rollups_since - timedelta(minutes=1)
+        if state["backfilled"]:
+            plan = [(rollups, [(None, split), (rollups_since, None)]), (raw, [(split, rollups_since)])]
+        else:
+            plan = [(rollups, [(rollups_since, None)]), (raw, [(None, rollups_since)])]
+    sources = []
+    for (collection, time_field, count_expr), intervals in plan:
+        match = range_match(time_field, clip(intervals, since, until))
+        if match is not None:
+            sources.append((collection, match, time_field, count_expr))
+    return sources
+
+async def record_status_rollups(db, docs: List[dict]):
+    """Fold a batch of inserted documents into per-minute counters with one bulk_write."""
+    from pymongo import UpdateOne
+
+    counts = defaultdict(int)
+    last_seen = {}
+    for doc in docs:
+        key = (doc["client_name"], doc["timestamp"].replace(second=0, microsecond=0))
+        counts[key] += 1
+        if key not in last_seen or doc["timestamp"] > last_seen[key]:
+            last_seen[key] = doc["timestamp"]
+    if not counts:
+        return
+    await db.status_rollups.bulk_write([
+        UpdateOne(
+            {"client_name": client_name, "minute": minute},
+            {"$inc": {"count": count}, "$max": {"last_seen": last_seen[(client_name, minute)]}},
+            upsert=True,
+        )
+        for (client_name, minute), count in counts.items()
+    ], ordered=False)
+
+async def start_status_rollups(db) -> dict:
+    """The status_meta rollup state; the first start records ``since``, the next minute boundary."""
+    from pymongo import ReturnDocument
+
+    since = datetime.utcnow().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    return await db.status_meta.find_one_and_update(
+        {"_id": ROLLUP_STATE_ID}, {"$setOnInsert": {"since": since, "backfilled": False}},
+        upsert=True, return_document=ReturnDocument.AFTER)
+
+async def backfill_status_rollups(db, before: datetime):
+    """Fold the checks stored before ``before`` into status_rollups.
+
+    Counts are set rather than incremented, so a backfill that is interrupted,
+    or runs on several workers at once, leaves the same result.
+    """
+    from pymongo import UpdateOne
+
+    pipeline = [
+        {"$match": {"timestamp": {"$lt": before}}},
+        {"$group": {
+            "_id": {"client_name": "$client_name", "minute": date_bucket("$timestamp", "minute")},
+            "count": {"$sum": 1},
+            "last_seen": {"$max": "$timestamp"},
+        }},
+    ]
+    batch = []
+    minutes = 0
+    async for row in db.status_checks.aggregate(pipeline, allowDiskUse=True):
+        batch.append(UpdateOne(row["_id"], {"$set": {"count": row["count"], "last_seen": row["last_seen"]}},
+                               upsert=True))
+        if len(batch) >= ROLLUP_BACKFILL_BATCH:
+            await db.status_rollups.bulk_write(batch, ordered=False)
+            minutes += len(batch)
+            batch = []
+    if batch:
+        await db.status_rollups.bulk_write(batch, ordered=False)
+        minutes += len(batch)
+    return minutes
+
+@api_router.get("/status/summary", response_model=List[StatusBucket], dependencies=[Depends(admit)])
+async def get_status_summary(
+    bucket: str = Query("minute", pattern="^(minute|hour|day)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    client_name: Optional[str] = None,
+    resources: Resources = Depends(get_resources),
+):
+    """Checks per client per time bucket, grouped inside MongoDB.
+
+    At most STATUS_SUMMARY_MAX_BUCKETS buckets are returned, oldest first; the
+    response carries ``X-Truncated: true`` when there were more.
+    """
+    until = until or datetime.utcnow()
+    since = since or until - timedelta(days=1)
+    max_buckets = resources.settings.status_summary_max_buckets
+
+    counts = defaultdict(int)
+    for collection, match, time_field, count_expr in status_count_sources(resources, since, until):
+        if client_name:
+            match = {**match, "client_name": client_name}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"client_name": "$client_name", "bucket": date_bucket(f"${time_field}", bucket)},
+                "count": count_expr,
+            }},
+            {"$sort": {"_id.bucket": 1, "_id.client_name": 1}},
+            # One past the cap tells whether anything was cut off
+            {"$limit": max_buckets + 1},
+        ]
+        async for row in collection.aggregate(pipeline):
+            counts[(row["_id"]["bucket"], row["_id"]["client_name"])] += row["count"]
+
+    keys = sorted(counts)
+    buckets = [{"client_name": client, "bucket": start, "count": counts[(start, client)]}
+               for start, client in keys[:max_buckets]]
+    headers = {"X-Truncated": "true"} if len(keys) > max_buckets else None
+    return Response(content=orjson.dumps(buckets), media_type="application/json", headers=headers)
+
+@api_router.get("/status/clients", response_model=List[StatusClient], dependencies=[Depends(admit)])
+async def get_status_clients(resources: Resources = Depends(get_resources)):
+    """Last-seen time and total check count for every client."""
+    clients = {}
+    for collection, match, time_field, count_expr in status_count_sources(resources):
+        last_seen_field = "last_seen" if time_field == "minute" else time_field
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": "$client_name", "last_seen": {"$max": f"${last_seen_field}"}, "count": count_expr}},
+        ]
+        async for row in collection.aggregate(pipeline):
+            client = clients.setdefault(row["_id"], {"client_name": row["_id"], "last_seen": row["last_seen"],
+                                                     "count": 0})
+            client["last_seen"] = max(client["last_seen"], row["last_seen"])
+            client["count"] += row["count"]
+    return Response(content=orjson.dumps([clients[name] for name in sorted(clients)]), media_type="application/json")
+
+def encode_status_cursor(doc: dict) -> str:
+    raw = f"{doc['timestamp'].isoformat()}|{doc['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def parse_status_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        ts, last_id = raw.split('|', 1)
+        return datetime.fromisoformat(ts), last_id
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def decode_status_cursor(cursor: str) -> dict:
+    """Turn an opaque cursor into a keyset filter on (timestamp, id), newest first."""
+    last_ts, last_id = parse_status_cursor(cursor)
+    return {"$or": [
+        {"timestamp": {"$lt": last_ts}},
+        {"timestamp": last_ts, "id": {"$lt": last_id}},
+    ]}
+
+async def stream_status_checks(db, query: dict, limit: Optional[int]):
+    cursor = db.status_checks.find(query, STATUS_PROJECTION).sort(STATUS_SORT)
+    if limit:
+        cursor = cursor.limit(limit)
+    async for status_check in cursor:
+        yield orjson.dumps(status_check, option=orjson.OPT_APPEND_NEWLINE)
+
+async def load_status_page(db, query: dict, limit: int):
+    status_checks = await db.status_checks.find(query, STATUS_PROJECTION).sort(STATUS_SORT).limit(limit).to_list(limit)
+    headers = {}
+    if len(status_checks) == limit:
+        headers["X-Next-Cursor"] = encode_status_cursor(status_checks[-1])
+    return orjson.dumps(status_checks), headers
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
-
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+async def get_status_checks(
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    if_none_match: Optional[str] = Header(None),
+    resources: Resources = Depends(get_resources),
+):
+    query = decode_status_cursor(cursor) if cursor else {}
+    admission = resources.admission
+
+    # NDJSON streams straight from the Motor cursor and is only bounded by an explicit limit,
+    # so it keeps its admission slot until the last document has been sent
+    if format == "ndjson":
+        await acquire_admission(admission)
+        return AdmittedStreamingResponse(stream_status_checks(resources.db, query, limit), admission,
+                                         media_type="application/x-ndjson")
+
+    limit = min(limit or STATUS_PAGE_MAX, STATUS_PAGE_MAX)
+    key = (limit, cursor)
+    # Cache hits and 304s never touch MongoDB, so only a fill waits for an admission slot
+    entry = resources.status_cache.get(key)
+    if entry is None:
+        await acquire_admission(admission)
+        try:
+            entry = await resources.status_cache.get_or_fill(key, lambda: load_status_page(resources.db, query, limit))
+        finally:
+            admission.release()
+    # no-cache lets browsers keep the body but revalidate every poll with If-None-Match
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+async def follow_status(resources: Resources, after: Optional[str]):
+    """Status events published after the one with id ``after``, then live ones as they are published.
+
+    Missed events come from the broadcaster's history, not MongoDB. Yields None
+    when nothing happened for a heartbeat interval; RESET when ``after`` is no
+    longer known and the client should reload; OVERFLOW, as the last item,
+    when it fell behind the live stream.
+    """
+    settings = resources.settings
+    subscription, missed = resources.status_stream.subscribe(after)
+    try:
+        if after is not None:
+            if missed is None:
+                yield RESET
+            else:
+                for event in missed:
+                    yield event
+        while True:
+            item = await subscription.get(settings.status_stream_heartbeat_s)
+            yield item
+            if item is OVERFLOW:
+                return
+    finally:
+        subscription.close()
+
+@api_router.get("/status/stream")
+async def stream_status(
+    after: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    resources: Resources = Depends(get_resources),
+):
+    """New status checks as Server-Sent Events.
+
+    Each event's id is a resume token: a reconnecting EventSource sends it as
+    Last-Event-ID (or pass ``?after=<id>``) and first receives what it missed.
+    ``reset`` means too much was missed (or the server restarted) and the
+    client should reload GET /api/status; ``overflow`` ends a stream that fell
+    too far behind.
+    """
+    resume_from = last_event_id or after
+
+    async def events():
+        yield b"retry: 2000\n\n"
+        async with aclosing(follow_status(resources, resume_from)) as items:
+            async for item in items:
+                if item is None:
+                    yield b": heartbeat\n\n"
+                elif item is RESET:
+                    yield b"event: reset\ndata: {}\n\n"
+                elif item is OVERFLOW:
+                    yield b"event: overflow\ndata: {}\n\n"
+                else:
+                    yield item.sse
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@api_router.websocket("/status/ws")
+async def status_websocket(websocket: WebSocket, after: Optional[str] = None):
+    """The WebSocket variant of /api/status/stream: JSON messages of type status, reset or heartbeat."""
+    resources: Resources = websocket.app.state.resources
+    await websocket.accept()
+    try:
+        async with aclosing(follow_status(resources, after)) as items:
+            async for item in items:
+                if item is None:
+                    await websocket.send_text('{"type":"heartbeat"}')
+                elif item is RESET:
+                    await websocket.send_text('{"type":"reset"}')
+                elif item is OVERFLOW:
+                    # 1013 "try again later": reconnect with ?after=<last id>
+                    await websocket.close(code=1013)
+                    return
+                else:
+                    await websocket.send_text(item.ws)
+    except WebSocketDisconnect:
+        pass
+
+class BufferResponse(Response):
+    """A Response whose body may be a memoryview, e.g. into the shared snapshot, sent without copying."""
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, memoryview) else super().render(content)
+
+def serialized_response(request: Request, serialized: SerializedBody, cache_control: str) -> Response:
+    """Serve a pre-serialized body with ETag revalidation and its precomputed gzip variant."""
+    headers = {"ETag": serialized.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), serialized.etag):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return BufferResponse(content=serialized.gzipped, media_type="application/json", headers=headers)
+    return BufferResponse(content=serialized.body, media_type="application/json", headers=headers)
+
+def parse_character_fields(fields: Optional[str]):
+    try:
+        return CharacterStore.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/characters")
+async def get_characters(request: Request, fields: Optional[str] = None, resources: Resources = Depends(get_resources)):
+    """All chapters; ``fields`` is a comma-separated projection, e.g. ``id,name,tags,imageUrl``."""
+    return serialized_response(request, resources.character_store.list_body(parse_character_fields(fields)),
+                               CHARACTERS_CACHE_CONTROL)
+
+@api_router.get("/characters/{chapter}")
+async def get_character(request: Request, chapter: int, fields: Optional[str] = None,
+                        resources: Resources = Depends(get_resources)):
+    serialized = resources.character_store.chapter_body(chapter, parse_character_fields(fields))
+    if serialized is None:
+        raise HTTPException(status_code=404, detail=f"Chapter {chapter} not found")
+    return serialized_response(request, serialized, CHARACTERS_CACHE_CONTROL)
+
+@api_router.get("/characters/{chapter}/image")
+async def get_character_image(request: Request, chapter: int, variant: str = Query("card", pattern="^[a-z]+$"),
+                              resources: Resources = Depends(get_resources)):
+    """Redirect to the best format of a character image variant the client accepts (AVIF, WebP, then JPEG)."""
+    filename = resources.image_variants.negotiate(f"character-{chapter}", variant, request.headers.get("accept"))
+    if filename is None:
+        raise HTTPException(status_code=404, detail=f"No {variant} image for chapter {chapter}")
+    return RedirectResponse(f"/api/images/{filename}", status_code=307,
+                            headers={"Cache-Control": IMAGE_MANIFEST_CACHE_CONTROL, "Vary": "Accept"})
+
+@api_router.get("/images/manifest")
+async def get_image_manifest(request: Request, resources: Resources = Depends(get_resources)):
+    serialized = resources.image_variants.manifest_body()
+    if serialized is None:
+        raise HTTPException(status_code=404, detail="Image variants have not been generated")
+    return serialized_response(request, serialized, IMAGE_MANIFEST_CACHE_CONTROL)
+
+@api_router.api_route("/images/{filename}", methods=["GET", "HEAD"])
+async def get_image(request: Request, filename: str, resources: Resources = Depends(get_resources)):
+    """Serve a character image; content-hashed variants can be cached forever, since a changed image gets a new name."""
+    info = await resources.image_files.lookup(filename)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.match(filename) else ASSET_CACHE_CONTROL
+    return file_response(info, request.method, request.headers, MEDIA_TYPES[filename.rsplit('.', 1)[1]],
+                         cache_control, compressible=False)
+
+@api_router.api_route("/models/{filename}", methods=["GET", "HEAD"])
+async def get_model(request: Request, filename: str, v: Optional[str] = None,
+                    resources: Resources = Depends(get_resources)):
+    """Serve a GLB model with Range support and pre-compressed variants."""
+    info = await resources.model_files.lookup(filename)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    cache_control = IMMUTABLE_CACHE_CONTROL if v == info.version else ASSET_CACHE_CONTROL
+    return file_response(info, request.method, request.headers, "model/gltf-binary", cache_control)
+
+@api_router.get("/models/{chapter}/meta")
+async def get_model_meta(request: Request, chapter: int, resources: Resources = Depends(get_resources)):
+    """Nodes, bounds, triangle counts and textures of a chapter's model, read from its JSON chunk only."""
+    filename = f"modelo{chapter}.glb"
+    info = await resources.model_files.lookup(filename)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"No model for chapter {chapter}")
+    try:
+        body = await resources.model_metadata.get(info, f"/api/models/{filename}?v={info.version}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Unreadable model: {e}")
+    return serialized_response(request, body, ASSET_CACHE_CONTROL)
+
+@api_router.get("/search")
+async def search_characters(
+    q: str = Query(..., min_length=1, max_length=200),
+    k: int = Query(10, ge=1, le=50),
+    prefix: bool = True,
+    resources: Resources = Depends(get_resources),
+):
+    """Ranked chapter search; snippets mark matched words with <mark>."""
+    start = time.perf_counter()
+    results = resources.search_index.search(q, k=k, prefix=prefix)
+    took_ms = (time.perf_counter() - start) * 1000
+    return Response(content=orjson.dumps({"query": q, "took_ms": round(took_ms, 3), "results": results}),
+                    media_type="application/json")
+
+@api_router.get("/search/suggest")
+async def suggest_search_terms(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50),
+                               resources: Resources = Depends(get_resources)):
+    return resources.search_index.suggest(q, limit)
+
+async def ensure_status_collection(db, settings: Settings):
+    """Create status_checks (optionally as time-series) and bring its indexes and retention in line."""
+    from pymongo import IndexModel
+    from pymongo.errors import OperationFailure
+
+    retention_seconds = int(settings.status_retention_days * 86400)
+    existing = await db.list_collection_names()
+
+    if "status_checks" not in existing and settings.status_timeseries:
+        options = {"timeseries": {"timeField": "timestamp", "metaField": "client_name", "granularity": "seconds"}}
+        if retention_seconds:
+            options["expireAfterSeconds"] = retention_seconds
+        await db.create_collection("status_checks", **options)
+        logger.info("Created status_checks as a time-series collection")
+
+    is_timeseries = False
+    if settings.status_timeseries:
+        collection_info = await db.list_collections(filter={"name": "status_checks"}).to_list(1)
+        is_timeseries = bool(collection_info) and collection_info[0].get("type") == "timeseries"
+    if settings.status_timeseries and not is_timeseries and "status_checks" in existing:
+        logger.warning("STATUS_TIMESERIES is set but status_checks already exists as a regular collection; "
+                       "migrate it manually to switch storage")
+
+    indexes = list(STATUS_INDEXES)
+    if not is_timeseries:
+        indexes.append(STATUS_UNIQUE_ID_INDEX)
+    try:
+        await db.status_checks.create_indexes([IndexModel(keys, **options) for keys, options in indexes])
+    except OperationFailure as e:
+        logger.error("Could not create status_checks indexes: %s", e)
+
+    if is_timeseries:
+        if retention_seconds:
+            await db.command("collMod", "status_checks", expireAfterSeconds=retention_seconds)
+    else:
+        await ensure_ttl_index(db, "status_checks", "timestamp", STATUS_TTL_INDEX_NAME, retention_seconds)
+
+    if settings.status_rollups:
+        await db.status_rollups.create_indexes([IndexModel(keys, **options) for keys, options in ROLLUP_INDEXES])
+        await ensure_ttl_index(db, "status_rollups", "minute", ROLLUP_TTL_INDEX_NAME, retention_seconds)
+    else:
+        # Writes made now are not rolled up, so turning rollups back on starts over
+        await db.status_meta.delete_one({"_id": ROLLUP_STATE_ID})
+
+async def ensure_ttl_index(db, collection_name: str, field: str, index_name: str, retention_seconds: int):
+    collection = db[collection_name]
+    current = (await collection.index_information()).get(index_name)
+    if not retention_seconds:
+        if current:
+            await collection.drop_index(index_name)
+        return
+    if current is None:
+        await collection.create_index([(field, DESCENDING)], name=index_name, expireAfterSeconds=retention_seconds)
+    elif current.get("expireAfterSeconds") != retention_seconds:
+        # Changing the retention of an existing TTL index is done in place with collMod
+        await db.command("collMod", collection_name, index={
+            "keyPattern": {field: DESCENDING}, "expireAfterSeconds": retention_seconds})
+
+def create_app(settings: Optional[Settings] = None, mongo_client_factory: Optional[Callable] = None) -> FastAPI:
+    """Build the app. Nothing is connected or loaded until its lifespan starts."""
+    configure_logging()
+    app = FastAPI(lifespan=lifespan)
+    app.state.resources = resources = Resources(settings or Settings.from_env(), mongo_client_factory)
+
+    # Include the router in the main app
+    app.include_router(api_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.add_middleware(MetricsMiddleware, metrics=resources.http_metrics)
+    return app
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+def __getattr__(name):
+    # `uvicorn server:app` builds the default app on first access rather than at import
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
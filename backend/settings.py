@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+FRONTEND_DIR = ROOT_DIR.parent / 'frontend'
+
+
+def env_flag(value: str) -> bool:
+    return value.lower() in ('1', 'true', 'yes')
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Backend configuration. Reading it is the only place the environment is consulted.
+
+    ``Settings.from_env()`` is what the server uses; tests can build one directly,
+    e.g. ``Settings(db_name='test', characters_csv=path)``.
+    """
+
+    mongo_url: Optional[str] = None
+    db_name: Optional[str] = None
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10
+    mongo_wait_queue_timeout_ms: int = 2000
+    mongo_server_selection_timeout_ms: int = 5000
+    # Comma-separated, in order of preference, e.g. "zstd,snappy,zlib"
+    mongo_compressors: str = ''
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    mongo_read_preference: str = 'primary'
+
+    # Status writes are coalesced into insert_many batches
+    status_write_batch_size: int = 500
+    status_write_flush_ms: float = 5.0
+    status_write_queue_size: int = 10000
+    # Serialized GET /api/status pages, invalidated whenever a write lands
+    status_cache_ttl_ms: float = 2000.0
+    status_cache_max_bytes: int = 32 * 1024 * 1024
+    # Retention: 0 keeps status checks forever, otherwise a TTL removes older documents
+    status_retention_days: float = 0.0
+    # Store status_checks as a time-series collection when it is first created (MongoDB 5.0+)
+    status_timeseries: bool = False
+    # Per-client, per-minute counters maintained on every write for /summary and /clients
+    status_rollups: bool = False
+    status_summary_max_buckets: int = 10000
+    # Where /api/status/stream gets new inserts from: 'changestream', 'local' (this process's
+    # own writes) or 'auto' (a change stream when the deployment supports one)
+    status_stream_source: str = 'auto'
+    # Events a subscriber may fall behind by before it is dropped
+    status_stream_queue_size: int = 256
+    # Recent events kept in memory for reconnecting clients; one that missed more is told to reload
+    status_stream_catchup_max: int = 1000
+    status_stream_heartbeat_s: float = 15.0
+    # Durable ingestion: when set, status writes are appended to a write-ahead log in this
+    # directory and acknowledged once it is synced, and replayed into MongoDB in the background
+    status_spool_dir: Optional[Path] = None
+    status_spool_segment_mb: int = 16
+    # Writes are refused with 503 once this much is waiting to be replayed
+    status_spool_max_mb: int = 1024
+    status_spool_sync_ms: float = 2.0
+    # Bulk ingest limits for POST /api/status/batch
+    status_batch_max_items: int = 10000
+    status_batch_chunk_size: int = 500
+    # Token buckets on status ingestion, requests/second and burst; a rate of 0 disables the limit.
+    # The address limit is off by default since clients behind one proxy share an address
+    rate_limit_client_per_s: float = 50.0
+    rate_limit_client_burst: float = 100.0
+    rate_limit_address_per_s: float = 0.0
+    rate_limit_address_burst: float = 200.0
+    rate_limit_max_keys: int = 100000
+    # Handlers that use MongoDB run at most this many at once (0: mongo_max_pool_size); the rest
+    # queue, and are shed with a 503 once they have waited db_queue_target_ms
+    db_max_concurrency: int = 0
+    db_queue_max: int = 1000
+    db_queue_target_ms: float = 100.0
+
+    # Worker processes started by serve.py; 0 uses every CPU this process may run on.
+    # Rate limits, admission slots and the status spool apply per worker
+    web_workers: int = 0
+    # Set by serve.py for its workers: the chapter snapshot they map and the counter
+    # that broadcasts GET /api/status cache invalidations between them
+    shared_state_dir: Optional[Path] = None
+
+    # Chapter dataset served by /api/characters, parsed once at startup
+    characters_csv: Path = FRONTEND_DIR / 'src' / 'data' / 'caps.csv'
+    # Responsive character images written by create_image_variants.py
+    image_variants_dir: Path = FRONTEND_DIR / 'public' / 'images' / 'variants'
+    images_dir: Path = FRONTEND_DIR / 'public' / 'images'
+    # Searched in order: the texture-compressed models build_assets.py writes to public/models
+    # shadow the source models they were made from
+    models_dirs: Tuple[Path, ...] = field(default_factory=lambda: (
+        FRONTEND_DIR / 'public' / 'models', FRONTEND_DIR / 'src' / 'data' / 'models', FRONTEND_DIR / 'public',
+    ))
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'Settings':
+        """Settings from ``environ``; by default os.environ after loading backend/.env."""
+        if environ is None:
+            load_dotenv(ROOT_DIR / '.env')
+            environ = os.environ
+        defaults = cls()
+        options = {}
+        for name, value in environ.items():
+            attribute = name.lower()
+            if attribute not in cls.__dataclass_fields__ or attribute == 'models_dirs':
+                continue
+            current = getattr(defaults, attribute)
+            if isinstance(current, bool):
+                options[attribute] = env_flag(value)
+            elif isinstance(current, Path) or cls.__dataclass_fields__[attribute].type == Optional[Path]:
+                options[attribute] = Path(value)
+            elif current is None or isinstance(current, str):
+                options[attribute] = value
+            else:
+                options[attribute] = type(current)(value)
+        if environ.get('MODELS_DIRS'):
+            options['models_dirs'] = tuple(Path(p) for p in environ['MODELS_DIRS'].split(os.pathsep) if p)
+        return cls(**options)
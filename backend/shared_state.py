@@ -0,0 +1,117 @@
+import fcntl
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import orjson
+
+# Files serve.py puts in SHARED_STATE_DIR for its worker processes
+SNAPSHOT_NAME = 'characters.snapshot'
+STATUS_GENERATION_NAME = 'status-cache.generation'
+
+SNAPSHOT_MAGIC = b'CHARSNP1'
+# magic, length of the JSON index that follows; blobs start right after the index
+SNAPSHOT_HEADER = struct.Struct('<8sQ')
+COUNTER = struct.Struct('<Q')
+
+Span = Tuple[int, int]
+
+
+def write_snapshot(path: Path, rows: List[tuple], bodies: Dict[str, Tuple[bytes, bytes, str]]):
+    """Write the dataset ``rows`` and pre-serialized ``bodies`` ({key: (body, gzipped, etag)}) to one file.
+
+    The file is written next to ``path`` and renamed into place, so workers never map a partial snapshot.
+    """
+    blobs: List[bytes] = []
+    offset = 0
+
+    def add(data: bytes) -> Span:
+        nonlocal offset
+        blobs.append(data)
+        offset += len(data)
+        return offset - len(data), len(data)
+
+    index = {'rows': add(orjson.dumps(rows)), 'bodies': {}}
+    for key, (body, gzipped, etag) in bodies.items():
+        index['bodies'][key] = {'body': add(body), 'gzipped': add(gzipped), 'etag': etag}
+    index_bytes = orjson.dumps(index)
+
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """A snapshot file mapped read-only. Blobs are memoryviews into the mapping.
+
+    Every process that opens the same file shares its pages (in /dev/shm they
+    are never even on disk), so N workers hold one copy of the blobs. Only
+    ``bodies()`` are views; ``rows()`` decodes a private copy, from which each
+    worker also builds its own search index.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = SNAPSHOT_HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        self._data_start = SNAPSHOT_HEADER.size + index_length
+        self._view = memoryview(self._map)
+        self.index = orjson.loads(self._view[SNAPSHOT_HEADER.size:self._data_start])
+
+    def blob(self, span: Span) -> memoryview:
+        start = self._data_start + span[0]
+        return self._view[start:start + span[1]]
+
+    def rows(self) -> List[tuple]:
+        return [tuple(row) for row in orjson.loads(self.blob(self.index['rows']))]
+
+    def bodies(self) -> Dict[str, Tuple[memoryview, memoryview, str]]:
+        return {key: (self.blob(entry['body']), self.blob(entry['gzipped']), entry['etag'])
+                for key, entry in self.index['bodies'].items()}
+
+
+class SharedCounter:
+    """A 64-bit counter in a small memory-mapped file that several processes share.
+
+    Increments hold an exclusive flock so concurrent writers never lose one;
+    reads are a plain load from the mapping. A torn read can only make the
+    value look changed, which callers treat as one more invalidation. Only
+    the counter is shared: each worker's cache keeps its own entries and
+    refills them after any worker increments it.
+    """
+
+    def __init__(self, path: Path):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(self._fd).st_size < COUNTER.size:
+                os.ftruncate(self._fd, COUNTER.size)
+            self._map = mmap.mmap(self._fd, COUNTER.size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    @property
+    def value(self) -> int:
+        return COUNTER.unpack_from(self._map, 0)[0]
+
+    def increment(self) -> int:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            value = self.value + 1
+            COUNTER.pack_into(self._map, 0, value)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return value
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
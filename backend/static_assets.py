@@ -0,0 +1,241 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import anyio
+import orjson
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from characters import SerializedBody
+from glb_container import read_glb_json, summarize
+from response_cache import etag_matches
+
+CHUNK_SIZE = 256 * 1024
+# Pre-built encodings, in order of preference; files are named <asset>.br / <asset>.gz
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+MAX_CACHED_FILES = 256
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class StaticFile:
+    """What is known about one file on disk: a content-hash ETag and its pre-compressed siblings."""
+
+    __slots__ = ('path', 'size', 'mtime_ns', 'etag', 'version', 'encoded')
+
+    def __init__(self, path: Path, size: int, mtime_ns: int, digest: str, encoded: Dict[str, Tuple[Path, int]]):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.version = digest[:12]
+        self.etag = '"' + digest + '"'
+        self.encoded = encoded
+
+
+class StaticAssets:
+    """Files under a set of directories, looked up by bare filename.
+
+    Content hashes (ETags) and the list of pre-compressed variants are
+    computed once per file and kept until the file's size or mtime changes.
+    """
+
+    def __init__(self, directories: Sequence[Path], name_pattern: str):
+        self.directories = [Path(d) for d in directories]
+        self.name_re = re.compile(name_pattern)
+        self._files: 'OrderedDict[Path, StaticFile]' = OrderedDict()
+
+    def find(self, filename: str) -> Optional[Path]:
+        if not self.name_re.match(filename):
+            return None
+        for directory in self.directories:
+            path = directory / filename
+            if path.is_file():
+                return path
+        return None
+
+    def _describe(self, path: Path, stat: os.stat_result) -> StaticFile:
+        digest = hashlib.blake2b(digest_size=12)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        encoded = {}
+        for encoding, suffix in ENCODINGS:
+            try:
+                encoded_stat = os.stat(str(path) + suffix)
+            except FileNotFoundError:
+                continue
+            # A variant older than its source is stale; serve the original instead
+            if encoded_stat.st_mtime_ns >= stat.st_mtime_ns:
+                encoded[encoding] = (Path(str(path) + suffix), encoded_stat.st_size)
+        return StaticFile(path, stat.st_size, stat.st_mtime_ns, digest.hexdigest(), encoded)
+
+    async def lookup(self, filename: str) -> Optional[StaticFile]:
+        path = self.find(filename)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        info = self._files.get(path)
+        if info is None or info.size != stat.st_size or info.mtime_ns != stat.st_mtime_ns:
+            # Hashing a few MB is done off the event loop, once per file version
+            info = await anyio.to_thread.run_sync(self._describe, path, stat)
+            self._files[path] = info
+            if len(self._files) > MAX_CACHED_FILES:
+                self._files.popitem(last=False)
+        else:
+            self._files.move_to_end(path)
+        return info
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single ``bytes=`` range.
+
+    Returns None when the header is absent or not something we honour (the
+    full file is then sent), and raises ValueError for unsatisfiable ranges.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(0) == 'bytes=-':
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or (last and int(last) < start):
+            raise ValueError("Range not satisfiable")
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Range not satisfiable")
+        start, end = max(size - suffix, 0), size - 1
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """Sends ``count`` bytes of a file starting at ``offset``.
+
+    Uses the ASGI zero-copy extension (sendfile) when the server offers it,
+    otherwise reads with pread in a worker thread, CHUNK_SIZE at a time.
+    """
+
+    def __init__(self, path: Path, offset: int, count: int, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None, media_type: Optional[str] = None,
+                 send_body: bool = True):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.headers['content-length'] = str(count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if not self.send_body or self.count == 0:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            if 'http.response.zerocopy' in scope.get('extensions', {}):
+                await send({'type': 'http.response.zerocopy', 'file': fd,
+                            'offset': self.offset, 'count': self.count})
+                return
+            position, remaining = self.offset, self.count
+            while remaining:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, remaining), position)
+                if not chunk:
+                    break
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining:
+                # The file shrank underneath us; end the body rather than hang the client
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            os.close(fd)
+
+
+def file_response(info: StaticFile, method: str, request_headers, media_type: str, cache_control: str,
+                  compressible: bool = True) -> Response:
+    """Conditional, range and pre-compressed handling for one static file.
+
+    Range requests always get the identity encoding, like nginx's gzip_static,
+    so byte offsets always refer to the file itself. Each encoding has its own
+    ETag, as the bodies differ.
+    """
+    headers = {'Cache-Control': cache_control, 'Accept-Ranges': 'bytes'}
+    if compressible and info.encoded:
+        headers['Vary'] = 'Accept-Encoding'
+    send_body = method != 'HEAD'
+
+    if etag_matches(request_headers.get('if-none-match'), info.etag):
+        headers['ETag'] = info.etag
+        return Response(status_code=304, headers=headers)
+
+    range_header = request_headers.get('range')
+    if_range = request_headers.get('if-range')
+    if range_header and (not if_range or if_range == info.etag):
+        try:
+            byte_range = parse_range(range_header, info.size)
+        except ValueError:
+            headers['Content-Range'] = f"bytes */{info.size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            headers['ETag'] = info.etag
+            headers['Content-Range'] = f"bytes {start}-{end}/{info.size}"
+            return FileRangeResponse(info.path, start, end - start + 1, status_code=206, headers=headers,
+                                     media_type=media_type, send_body=send_body)
+
+    path, size, etag = info.path, info.size, info.etag
+    if compressible and info.encoded:
+        accepted = accepted_encodings(request_headers.get('accept-encoding', ''))
+        for encoding, _ in ENCODINGS:
+            if encoding in info.encoded and encoding in accepted:
+                path, size = info.encoded[encoding]
+                etag = info.etag[:-1] + '-' + encoding + '"'
+                headers['Content-Encoding'] = encoding
+                break
+
+    headers['ETag'] = etag
+    if etag_matches(request_headers.get('if-none-match'), etag):
+        headers.pop('Content-Encoding', None)
+        return Response(status_code=304, headers=headers)
+    return FileRangeResponse(path, 0, size, headers=headers, media_type=media_type, send_body=send_body)
+
+
+def accepted_encodings(header: str) -> List[str]:
+    accepted = []
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class ModelMetadata:
+    """Serialized glb_container.summarize() per model file, rebuilt only when the file changes."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_FILES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Path, Tuple[int, int, SerializedBody]]' = OrderedDict()
+
+    async def get(self, info: StaticFile, url: str) -> SerializedBody:
+        cached = self._entries.get(info.path)
+        if cached is not None and cached[0] == info.size and cached[1] == info.mtime_ns:
+            self._entries.move_to_end(info.path)
+            return cached[2]
+        gltf, total_length, bin_length = await anyio.to_thread.run_sync(read_glb_json, info.path)
+        metadata = summarize(gltf, total_length, bin_length)
+        metadata['url'] = url
+        metadata['etag'] = info.etag
+        body = SerializedBody(orjson.dumps(metadata))
+        self._entries[info.path] = (info.size, info.mtime_ns, body)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
@@ -0,0 +1,425 @@
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import zlib
+from contextlib import suppress
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Every record is <payload length><crc32 of payload><payload>; a zero length marks the end
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT_SUFFIX = '.log'
+CHECKPOINT_NAME = 'checkpoint'
+LOCK_NAME = '.lock'
+MIN_SEGMENT_SIZE = 1024 * 1024
+MAX_REPLAY_BACKOFF = 5.0
+
+
+class SpoolFull(Exception):
+    """Raised when the unreplayed backlog has reached the spool's size limit."""
+
+
+class RecordTooLarge(ValueError):
+    """Raised for a document whose record would not fit in one segment."""
+
+
+def encode_record(doc: dict) -> bytes:
+    payload = orjson.dumps(doc)
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_record(payload: bytes) -> dict:
+    doc = orjson.loads(payload)
+    doc["timestamp"] = datetime.fromisoformat(doc["timestamp"])
+    return doc
+
+
+class Segment:
+    """One preallocated log file, memory-mapped for appends and reads.
+
+    A new segment is written from offset 0; an existing one is scanned on open
+    and ends at the first empty header or checksum mismatch, which is where a
+    crash cut the last write short. Recovered segments are never appended to.
+    """
+
+    def __init__(self, path: Path, seq: int, size: int = 0):
+        self.path = path
+        self.seq = seq
+        create = size > 0
+        fd = os.open(path, (os.O_RDWR | os.O_CREAT) if create else os.O_RDWR, 0o644)
+        try:
+            if create:
+                if hasattr(os, 'posix_fallocate'):
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self.map = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        self.end = 0 if create else self._scan()
+        self.synced = self.end
+        self.sealed = not create
+
+    def _scan(self) -> int:
+        offset = 0
+        while offset + RECORD_HEADER.size <= self.size:
+            length, crc = RECORD_HEADER.unpack_from(self.map, offset)
+            start = offset + RECORD_HEADER.size
+            if length == 0 or start + length > self.size or zlib.crc32(self.map[start:start + length]) != crc:
+                break
+            offset = start + length
+        return offset
+
+    def append(self, record: bytes) -> bool:
+        end = self.end + len(record)
+        if end > self.size:
+            return False
+        self.map[self.end:end] = record
+        self.end = end
+        return True
+
+    def records(self, offset: int, limit: int) -> Tuple[List[bytes], int]:
+        """Up to ``limit`` payloads from ``offset``, and the offset after the last one."""
+        payloads = []
+        while offset < self.end and len(payloads) < limit:
+            length, _ = RECORD_HEADER.unpack_from(self.map, offset)
+            start = offset + RECORD_HEADER.size
+            payloads.append(self.map[start:start + length])
+            offset = start + length
+        return payloads, offset
+
+    def sync(self, end: int):
+        # msync wants a page-aligned start; only the pages written since the last sync are flushed
+        start = self.synced - self.synced % mmap.PAGESIZE
+        if end > start:
+            self.map.flush(start, end - start)
+        self.synced = max(self.synced, end)
+
+    def close(self):
+        self.map.close()
+
+
+class StatusSpool:
+    """A segmented, append-only write-ahead log of status documents.
+
+    ``append`` writes documents into the active memory-mapped segment and
+    returns once they are on disk. Syncs are batched: appends arriving within
+    ``sync_interval`` of each other share one msync. A replayer task drains
+    the log into MongoDB in order, ``batch_size`` documents per bulk write,
+    and records how far it got in a checkpoint file; segments behind the
+    checkpoint are deleted. After a restart, replay resumes from the
+    checkpoint, so documents may be written twice and the writes must be
+    idempotent (upserts on ``id``).
+
+    Each process owns one spool, held with a flock: the first takes
+    ``directory`` itself, further workers take ``directory/worker-N``.
+    """
+
+    def __init__(self, directory: Path, segment_size: int = 16 * 1024 * 1024,
+                 max_bytes: int = 1024 * 1024 * 1024, sync_interval: float = 0.002,
+                 registry: Optional[MetricsRegistry] = None):
+        self.base_directory = Path(directory)
+        self.directory = self.base_directory
+        self._lock_fd: Optional[int] = None
+        self.segment_size = max(segment_size, MIN_SEGMENT_SIZE)
+        self.max_bytes = max_bytes
+        self.sync_interval = sync_interval
+        self.segments: Dict[int, Segment] = {}
+        self.active: Optional[Segment] = None
+        # Replay position: the segment and offset of the next record to write to MongoDB
+        self.position: Tuple[int, int] = (0, 0)
+        self.backlog_bytes = 0
+        self.backlog_records = 0
+        self._sync_waiters: List[asyncio.Future] = []
+        self._dirty: Set[Segment] = set()
+        self._syncing: Set[Segment] = set()
+        self._sync_needed: Optional[asyncio.Event] = None
+        self._appended: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        registry = registry or MetricsRegistry()
+        registry.gauge('status_spool_backlog_bytes', 'Spooled status bytes not yet written to MongoDB',
+                       func=lambda: self.backlog_bytes).labels()
+        registry.gauge('status_spool_backlog_records', 'Spooled status checks not yet written to MongoDB',
+                       func=lambda: self.backlog_records).labels()
+        registry.gauge('status_spool_segments', 'Spool segment files on disk',
+                       func=lambda: len(self.segments)).labels()
+        self.syncs = registry.histogram('status_spool_sync_seconds', 'Time to msync appended records').labels()
+        self.replayed = registry.counter('status_spool_replayed_total',
+                                         'Spooled status checks written to MongoDB').labels()
+        self.replay_errors = registry.counter('status_spool_replay_errors_total',
+                                              'Failed attempts to write a spooled batch to MongoDB').labels()
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"{seq:016d}{SEGMENT_SUFFIX}"
+
+    def open(self):
+        """Recover existing segments and start a fresh one. Blocking file I/O; run it off the event loop."""
+        self.directory = self._claim_directory()
+        self.segments = {}
+        self.backlog_bytes = self.backlog_records = 0
+        position = self._read_checkpoint()
+        for path in sorted(self.directory.glob('*' + SEGMENT_SUFFIX)):
+            seq = int(path.stem)
+            # Empty files are left by a crash between creating a segment and preallocating it
+            if seq < position[0] or path.stat().st_size == 0:
+                path.unlink()
+                continue
+            self.segments[seq] = Segment(path, seq)
+        first = min(self.segments, default=position[0])
+        self.position = position if position[0] == first else (first, 0)
+        for segment in self.segments.values():
+            offset = self.position[1] if segment.seq == self.position[0] else 0
+            payloads, _ = segment.records(offset, segment.size)
+            self.backlog_bytes += max(segment.end - offset, 0)
+            self.backlog_records += len(payloads)
+        if self.backlog_records:
+            logger.info("Recovered %d spooled status checks (%d bytes) from %s",
+                        self.backlog_records, self.backlog_bytes, self.directory)
+        self._roll_over()
+
+    def _claim_directory(self) -> Path:
+        slot = 0
+        while True:
+            directory = self.base_directory if slot == 0 else self.base_directory / f"worker-{slot}"
+            directory.mkdir(parents=True, exist_ok=True)
+            fd = os.open(directory / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                slot += 1
+                continue
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+            self._lock_fd = fd
+            return directory
+
+    def _read_checkpoint(self) -> Tuple[int, int]:
+        try:
+            seq, offset = (self.directory / CHECKPOINT_NAME).read_text().split()
+            return int(seq), int(offset)
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+
+    def _write_checkpoint(self):
+        # Losing a checkpoint only means replaying some documents again, so it is not fsynced
+        path = self.directory / CHECKPOINT_NAME
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(f"{self.position[0]} {self.position[1]}\n")
+        os.replace(tmp_path, path)
+
+    def _roll_over(self):
+        if self.active is not None:
+            self.active.sealed = True
+        seq = max(self.segments, default=self.position[0] - 1) + 1
+        self.active = self.segments[seq] = Segment(self._segment_path(seq), seq, self.segment_size)
+
+    def start(self, write_batch: Callable[[List[dict]], Awaitable], batch_size: int = 500):
+        """Start syncing appends and replaying the log through ``write_batch(docs)``."""
+        self._sync_needed = asyncio.Event()
+        self._appended = asyncio.Event()
+        self._appended.set()
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._sync_loop()),
+                       asyncio.create_task(self._replay_loop(write_batch, batch_size))]
+
+    async def append(self, docs: List[dict]):
+        if self._closing or not self._tasks:
+            raise RuntimeError("Status spool is not running")
+        if self.backlog_bytes >= self.max_bytes:
+            raise SpoolFull(f"Status spool holds {self.backlog_bytes} unreplayed bytes")
+        # Every record is checked before any is written, so a rejected batch leaves no trace
+        records = [encode_record(doc) for doc in docs]
+        for record in records:
+            if len(record) > self.segment_size:
+                raise RecordTooLarge(f"A {len(record) - RECORD_HEADER.size} byte status check does not fit "
+                                     f"in a {self.segment_size} byte spool segment")
+        for record in records:
+            if not self.active.append(record):
+                self._dirty.add(self.active)
+                self._roll_over()
+                self.active.append(record)
+            self.backlog_bytes += len(record)
+            self.backlog_records += 1
+        self._dirty.add(self.active)
+        waiter = asyncio.get_running_loop().create_future()
+        self._sync_waiters.append(waiter)
+        self._sync_needed.set()
+        self._appended.set()
+        await waiter
+
+    async def _sync_loop(self):
+        while True:
+            await self._sync_needed.wait()
+            if not self._closing:
+                # Appends that arrive meanwhile share this sync
+                await asyncio.sleep(self.sync_interval)
+            self._sync_needed.clear()
+            waiters, self._sync_waiters = self._sync_waiters, []
+            pending = [(segment, segment.end) for segment in self._dirty]
+            self._syncing, self._dirty = set(self._dirty), set()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            try:
+                await asyncio.to_thread(lambda: [segment.sync(end) for segment, end in pending])
+            except Exception as e:
+                logger.exception("Failed to sync the status spool")
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                self.syncs.observe(loop.time() - start)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+            finally:
+                self._syncing = set()
+            if self._closing and not self._dirty and not self._sync_waiters:
+                return
+
+    def _read_batch(self, limit: int) -> Tuple[List[bytes], Tuple[int, int]]:
+        seq, offset = self.position
+        payloads = []
+        while len(payloads) < limit:
+            segment = self.segments[seq]
+            more, offset = segment.records(offset, limit - len(payloads))
+            payloads.extend(more)
+            if offset < segment.end or not segment.sealed:
+                break
+            seq, offset = seq + 1, 0
+        return payloads, (seq, offset)
+
+    def _advance(self, position: Tuple[int, int], records: int):
+        replayed_bytes = 0
+        seq, offset = self.position
+        while (seq, offset) != position:
+            segment = self.segments[seq]
+            if seq == position[0]:
+                replayed_bytes += position[1] - offset
+                break
+            replayed_bytes += segment.end - offset
+            seq, offset = seq + 1, 0
+        self.position = position
+        self.backlog_bytes -= replayed_bytes
+        self.backlog_records -= records
+        self._write_checkpoint()
+        # Fully replayed, sealed segments are dropped once no sync is using them
+        for seq in [seq for seq in self.segments if seq < position[0]]:
+            segment = self.segments[seq]
+            if segment in self._syncing or segment in self._dirty:
+                continue
+            del self.segments[seq]
+            segment.close()
+            segment.path.unlink()
+
+    async def _replay_loop(self, write_batch: Callable[[List[dict]], Awaitable], batch_size: int):
+        backoff = 0.0
+        while True:
+            await self._appended.wait()
+            payloads, position = self._read_batch(batch_size)
+            if not payloads:
+                if position != self.position:
+                    self._advance(position, 0)
+                if self._closing:
+                    return
+                self._appended.clear()
+                continue
+            try:
+                await write_batch([decode_record(payload) for payload in payloads])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.replay_errors.inc()
+                backoff = min(max(backoff * 2, 0.1), MAX_REPLAY_BACKOFF)
+                logger.exception("Replaying %d spooled status checks failed; retrying in %.1fs",
+                                 len(payloads), backoff)
+                await asyncio.sleep(backoff)
+                continue
+            backoff = 0.0
+            self.replayed.inc(len(payloads))
+            self._advance(position, len(payloads))
+
+    async def close(self, drain_timeout: float = 5.0):
+        """Stop accepting appends, give the replayer ``drain_timeout`` to catch up, and close the files.
+
+        Whatever has not been replayed stays on disk for the next start.
+        """
+        if self._tasks:
+            self._closing = True
+            sync_task, replay_task = self._tasks
+            self._appended.set()
+            try:
+                await asyncio.wait_for(asyncio.shield(replay_task), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Status spool closed with %d status checks still to replay", self.backlog_records)
+                replay_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await replay_task
+            # The sync loop exits once everything appended is on disk
+            self._sync_needed.set()
+            await sync_task
+            self._tasks = []
+        for segment in self.segments.values():
+            segment.close()
+        self.segments = {}
+        self.active = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+def drop_rejected(docs: List[dict], error) -> Set[int]:
+    """Log the documents a BulkWriteError rejected and return their indexes.
+
+    A document the server rejects would fail the same way on every retry, so it is dropped.
+    """
+    rejected = set()
+    for write_error in error.details.get('writeErrors', []):
+        rejected.add(write_error['index'])
+        logger.error("Dropping spooled status check %s: %s",
+                     docs[write_error['index']]["id"], write_error.get('errmsg', 'write error'))
+    return rejected
+
+
+async def upsert_status_docs(collection, docs: List[dict]) -> List[dict]:
+    """Write replayed documents idempotently; returns the ones that were not already stored."""
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    try:
+        result = await collection.bulk_write(
+            [UpdateOne({"id": doc["id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs], ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        drop_rejected(docs, e)
+        upserted = {upsert['index']: upsert['_id'] for upsert in e.details.get('upserted', [])}
+    return [docs[index] for index in sorted(upserted)]
+
+
+async def insert_status_docs(collection, docs: List[dict]) -> List[dict]:
+    """Write replayed documents where upserts are not available (time-series collections).
+
+    Returns the documents that were stored. A batch that partly fails is not
+    retried, since that would insert its stored documents again; a crash
+    before the checkpoint can still store a document twice.
+    """
+    from pymongo.errors import BulkWriteError
+
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        rejected = drop_rejected(docs, e)
+        return [doc for index, doc in enumerate(docs) if index not in rejected]
+    return docs
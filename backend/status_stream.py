@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Fields a status event carries; the same projection GET /api/status serves
+EVENT_FIELDS = ("id", "client_name", "timestamp")
+# Put in a subscriber's queue in place of the events it was too slow to take
+OVERFLOW = object()
+# Sent instead of a replay when a reconnecting client missed too many events
+RESET = object()
+
+
+class StatusEvent:
+    """One status document, serialized once and shared by every subscriber."""
+
+    __slots__ = ('id', 'doc', 'sse', 'ws')
+
+    def __init__(self, event_id: str, doc: dict):
+        self.id = event_id
+        self.doc = doc
+        data = orjson.dumps(doc)
+        self.sse = b"id: " + event_id.encode('ascii') + b"\nevent: status\ndata: " + data + b"\n\n"
+        self.ws = orjson.dumps({"type": "status", "id": event_id, "status": doc}).decode('utf-8')
+
+
+def truncate_to_millis(ts: datetime) -> datetime:
+    # MongoDB stores milliseconds; events carry the timestamp GET /api/status would return
+    return ts.replace(microsecond=ts.microsecond - ts.microsecond % 1000)
+
+
+class Subscription:
+    """A subscriber's bounded queue. ``get`` returns an event, OVERFLOW, or None on timeout."""
+
+    def __init__(self, broadcaster: 'StatusBroadcaster', queue_size: int):
+        self.broadcaster = broadcaster
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+    async def get(self, timeout: Optional[float] = None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broadcaster.subscribers.discard(self)
+
+
+class StatusBroadcaster:
+    """Fans new status documents out to every stream subscriber.
+
+    ``publish`` never waits: each subscriber has a bounded queue, and one that
+    falls ``queue_size`` events behind is dropped with OVERFLOW so it cannot
+    hold memory or slow anyone else down.
+
+    Events are numbered in the order they are published, which is the order
+    their writes were committed, and the last ``history_size`` are kept so a
+    client reconnecting with the id of the last event it saw can be sent what
+    it missed. Event ids are the change stream's resume tokens when events
+    come from one (the same on every worker watching the deployment), else a
+    sequence number prefixed with this process's epoch, which no other
+    process or restart will recognize.
+    """
+
+    def __init__(self, queue_size: int = 256, history_size: int = 1000,
+                 registry: Optional[MetricsRegistry] = None):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self.history: Deque[StatusEvent] = deque(maxlen=history_size)
+        # Sequence number of every event in ``history``, by id
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = 0
+        self._epoch = os.urandom(4).hex()
+        registry = registry or MetricsRegistry()
+        registry.gauge('status_stream_subscribers', 'Open /api/status/stream and /api/status/ws connections',
+                       func=lambda: len(self.subscribers)).labels()
+        self.events = registry.counter('status_stream_events_total', 'Status events published').labels()
+        self.dropped = registry.counter('status_stream_dropped_total',
+                                        'Subscribers dropped for falling behind').labels()
+
+    def subscribe(self, after: Optional[str] = None) -> Tuple[Subscription, Optional[List[StatusEvent]]]:
+        """A new subscription, and the events published since the one with id ``after``.
+
+        The missed events are None when ``after`` is no longer (or never was)
+        in the history. Nothing is published between taking them and
+        subscribing, so they join up with the subscription's first event.
+        """
+        missed = None
+        if after is not None:
+            sequence = self._sequence.get(after)
+            if sequence is not None:
+                first = self._next_sequence - len(self.history)
+                missed = list(itertools.islice(self.history, sequence + 1 - first, None))
+        subscription = Subscription(self, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription, missed
+
+    def publish(self, doc: dict, event_id: Optional[str] = None):
+        """Send ``doc`` to every subscriber, as the event ``event_id`` (by default the next sequence number)."""
+        self.events.inc()
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        doc = {field: doc[field] for field in EVENT_FIELDS}
+        doc["timestamp"] = truncate_to_millis(doc["timestamp"])
+        event = StatusEvent(event_id or f"{self._epoch}-{sequence}", doc)
+        if len(self.history) == self.history.maxlen and self.history:
+            del self._sequence[self.history[0].id]
+        if self.history.maxlen:
+            self.history.append(event)
+            self._sequence[event.id] = sequence
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(OVERFLOW)
+        subscription.close()
+        self.dropped.inc()
+
+
+class StatusChangeStream:
+    """Tails inserts into status_checks with one change stream shared by all subscribers.
+
+    ``open`` fails when the deployment has no change streams (a standalone
+    mongod); the caller then publishes from the request handlers instead.
+    The stream's resume token is kept, so after an error it picks up where
+    it left off rather than missing inserts.
+    """
+
+    PIPELINE = [{"$match": {"operationType": "insert"}}]
+    RETRY_DELAY = 1.0
+
+    def __init__(self, collection, broadcaster: StatusBroadcaster):
+        self.collection = collection
+        self.broadcaster = broadcaster
+        self.resume_token = None
+        self._stream = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self):
+        self._stream = self.collection.watch(self.PIPELINE)
+        # The first getMore is what fails on deployments without change streams
+        change = await self._stream.try_next()
+        self._handle(change)
+        self._task = asyncio.create_task(self._tail())
+
+    def _handle(self, change):
+        if change is not None:
+            # The change's own resume token is its event id
+            self.broadcaster.publish(change["fullDocument"], change["_id"]["_data"])
+        if self._stream is not None and self._stream.resume_token is not None:
+            self.resume_token = self._stream.resume_token
+
+    async def _tail(self):
+        while True:
+            try:
+                if self._stream is None:
+                    self._stream = self.collection.watch(self.PIPELINE, resume_after=self.resume_token)
+                while self._stream.alive:
+                    self._handle(await self._stream.try_next())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("status_checks change stream failed; resuming in %.0fs", self.RETRY_DELAY)
+                await asyncio.sleep(self.RETRY_DELAY)
+            if self._stream is not None:
+                await self._stream.close()
+                self._stream = None
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._stream is not None:
+            await self._stream.close()
+            self._stream = None
@@ -0,0 +1,110 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Union
+
+# Largest single item we are willing to hold in memory while waiting for it to complete
+MAX_ITEM_BYTES = 64 * 1024
+# Characters that may continue a number, so one that ends a chunk may still be incomplete ("12" of "12.5")
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class StreamingJSONError(ValueError):
+    """The body is not a well-formed JSON array and parsing cannot continue."""
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Union[Any, ValueError]]:
+    """Yield one decoded value per non-empty line.
+
+    A line that fails to decode yields the ``ValueError`` instead of aborting, so
+    a single bad line only fails its own item.
+    """
+    buf = b''
+    async for chunk in chunks:
+        buf += chunk
+        lines = buf.split(b'\n')
+        buf = lines.pop()
+        if len(buf) > MAX_ITEM_BYTES or any(len(line) > MAX_ITEM_BYTES for line in lines):
+            raise StreamingJSONError(f"NDJSON line exceeds {MAX_ITEM_BYTES} bytes")
+        for line in lines:
+            if line.strip():
+                yield _loads_line(line)
+    if buf.strip():
+        yield _loads_line(buf)
+
+
+def _loads_line(line: bytes) -> Union[Any, ValueError]:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield the elements of a top-level JSON array as soon as each one is complete."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    state = 'start'  # start -> value_or_end -> comma_or_end -> value -> ... -> end
+    eof = False
+    chunk_iter = chunks.__aiter__()
+
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n':
+            pos += 1
+
+        if pos < len(buf):
+            ch = buf[pos]
+            if state == 'start':
+                if ch != '[':
+                    raise StreamingJSONError("Expected a JSON array")
+                pos += 1
+                state = 'value_or_end'
+                continue
+            if state in ('value_or_end', 'comma_or_end') and ch == ']':
+                pos += 1
+                state = 'end'
+                continue
+            if state == 'comma_or_end':
+                if ch != ',':
+                    raise StreamingJSONError(f"Expected ',' or ']' at offset {pos}")
+                pos += 1
+                state = 'value'
+                continue
+            if state in ('value_or_end', 'value'):
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    end = None
+                # A value that runs to the end of the buffer, or a number followed by
+                # what could be more of it, may still be incomplete
+                if end is not None and not eof and (end == len(buf) or (
+                        type(value) in (int, float) and buf[end] in NUMBER_CHARS)):
+                    end = None
+                if end is not None:
+                    if end - pos > MAX_ITEM_BYTES:
+                        raise StreamingJSONError(f"JSON array item exceeds {MAX_ITEM_BYTES} bytes")
+                    yield value
+                    pos = end
+                    state = 'comma_or_end'
+                    continue
+                if eof:
+                    raise StreamingJSONError(f"Malformed JSON value at offset {pos}")
+                if len(buf) - pos > MAX_ITEM_BYTES:
+                    raise StreamingJSONError(f"JSON array item exceeds {MAX_ITEM_BYTES} bytes")
+            elif state == 'end':
+                raise StreamingJSONError("Unexpected data after the JSON array")
+
+        if eof:
+            if state != 'end':
+                raise StreamingJSONError("Unexpected end of JSON array")
+            return
+
+        # Need more input: drop what has been consumed and read the next chunk
+        buf = buf[pos:]
+        pos = 0
+        try:
+            buf += text.decode(await chunk_iter.__anext__())
+        except StopAsyncIteration:
+            buf += text.decode(b'', final=True)
+            eof = True
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBufferFull(Exception):
+    """Raised when the buffer stays full for longer than the enqueue timeout."""
+
+
+class WriteBuffer:
+    """Coalesces single-document inserts into ``insert_many`` batches.
+
+    Callers ``await submit(doc)`` and get back once their own document has been
+    acknowledged by MongoDB. A batch is flushed as soon as it reaches
+    ``max_batch`` documents or ``flush_interval`` seconds after its first one
+    arrived, whichever comes first.
+
+    ``on_flush`` is awaited with the successfully inserted documents of each
+    batch after their callers have been released; its failures are logged and
+    never reported to the writers.
+    """
+
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 0.005,
+                 max_queue: int = 10000, enqueue_timeout: float = 1.0,
+                 on_flush: Optional[Callable[[List[dict]], Awaitable]] = None):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, doc: dict):
+        if self._task is None or self._closing:
+            raise RuntimeError("Write buffer is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((doc, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise WriteBufferFull(f"Write queue full ({self._max_queue} pending)")
+        await future
+
+    async def close(self):
+        """Stop accepting writes and flush everything already queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]):
+        # Imported here so importing this module does not load the driver
+        from pymongo.errors import BulkWriteError
+
+        docs = [doc for doc, _ in batch]
+        failed = {}
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                failed[error['index']] = error.get('errmsg', 'write error')
+        except Exception as e:
+            logger.exception("Batch insert of %d documents failed", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(RuntimeError(failed[index]))
+            else:
+                future.set_result(None)
+
+        if self.on_flush:
+            try:
+                await self.on_flush([doc for index, doc in enumerate(docs) if index not in failed])
+            except Exception:
+                logger.exception("on_flush hook failed for a batch of %d documents", len(docs))
@@ -2,12 +2,27 @@
 """
 Backend API Testing Script for Buddhist Character App
 Tests FastAPI backend functionality, database operations, and CORS configuration
+
+Run with --benchmark to load-test /api/status instead, e.g.
+    python backend_test.py --benchmark --offline --workers 32 --duration 10 --output run.json
+
+or with --startup to time cold starts of the app (import, first ready request)
+against a budget; it exits non-zero when the median run is over budget.
 """
 
+import argparse
+import asyncio
+import os
+import random
 import requests
 import json
+import logging
+import math
+import statistics
+import subprocess
 import sys
 from datetime import datetime
+from pathlib import Path
 import time
 
 # Get backend URL from frontend .env file
@@ -268,7 +283,343 @@ class BackendTester:
         # Return overall success status
         return failed_tests == 0
 
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+# Per-request timeout, in seconds, for both the network and the in-process client
+REQUEST_TIMEOUT_S = 30
+
+class BackendBenchmark:
+    """Concurrent load generator for GET/POST /api/status.
+
+    Runs against a deployed URL, or fully offline against the FastAPI app
+    in-process (mongomock-motor by default, or a local mongod via --mongo-url).
+    """
+
+    def __init__(self, workers=16, rate=None, duration=10.0, post_ratio=0.5, page_size=100,
+                 url=None, offline=False, mongo_url=None):
+        self.workers = workers
+        self.rate = rate
+        self.duration = duration
+        self.post_ratio = post_ratio
+        self.page_size = page_size
+        self.url = url
+        self.offline = offline
+        self.mongo_url = mongo_url
+        self.samples = {'GET /api/status': [], 'POST /api/status': []}
+        self.errors = {'GET /api/status': 0, 'POST /api/status': 0}
+        self.started = 0.0
+
+    def load_app(self):
+        """Import backend/server.py and build an app whose Mongo client is the offline store."""
+        sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+        if self.mongo_url:
+            os.environ['MONGO_URL'] = self.mongo_url
+            os.environ['DB_NAME'] = os.environ.get('BENCH_DB_NAME', 'status_benchmark')
+        import server
+        if self.mongo_url:
+            return server, server.create_app()
+        from mongomock_motor import AsyncMongoMockClient
+        return server, server.create_app(mongo_client_factory=lambda settings, listeners: AsyncMongoMockClient())
+
+    async def worker(self, client, schedule, deadline):
+        loop = asyncio.get_running_loop()
+        while True:
+            index = next(schedule)
+            intended = None
+            if self.rate:
+                # Open-loop pacing: latency is measured from the scheduled start so a
+                # slow server cannot hide queueing delay (coordinated omission)
+                intended = self.started + index / self.rate
+                delay = intended - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if loop.time() >= deadline:
+                return
+
+            is_post = random.random() < self.post_ratio
+            name = 'POST /api/status' if is_post else 'GET /api/status'
+            start = intended if intended is not None else loop.time()
+            if is_post:
+                request = client.post('/api/status', json={'client_name': f'bench-{index % 100}'})
+            else:
+                request = client.get('/api/status', params={'limit': self.page_size})
+            try:
+                # ASGITransport ignores the client's timeout, so it is enforced here for both modes
+                response = await asyncio.wait_for(request, REQUEST_TIMEOUT_S)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                self.samples[name].append(loop.time() - start)
+            else:
+                self.errors[name] += 1
+
+    async def drive(self, client):
+        loop = asyncio.get_running_loop()
+        self.started = loop.time()
+        deadline = self.started + self.duration
+        schedule = iter(range(10 ** 12))
+        await asyncio.gather(*(self.worker(client, schedule, deadline) for _ in range(self.workers)))
+        return loop.time() - self.started
+
+    async def run_async(self):
+        import httpx
+        if self.offline:
+            server, app = self.load_app()
+            # No connection pool in-process: concurrency is bounded by the number of workers alone
+            async with server.lifespan(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                             base_url='http://benchmark') as client:
+                    return await self.drive(client)
+        limits = httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers)
+        async with httpx.AsyncClient(base_url=self.url, limits=limits, timeout=REQUEST_TIMEOUT_S) as client:
+            return await self.drive(client)
+
+    def run(self):
+        target = 'in-process app (' + ('mongod ' + self.mongo_url if self.mongo_url else 'mongomock-motor') + ')' \
+            if self.offline else self.url
+        print(f"🚀 Benchmarking /api/status against {target}")
+        print(f"   workers={self.workers} rate={self.rate or 'unbounded'}/s duration={self.duration}s "
+              f"post_ratio={self.post_ratio}")
+
+        # The backend's logging setup would otherwise log every request at INFO inside the timed loop
+        httpx_logger = logging.getLogger('httpx')
+        level = httpx_logger.level
+        httpx_logger.setLevel(logging.WARNING)
+        try:
+            elapsed = asyncio.run(self.run_async())
+        finally:
+            httpx_logger.setLevel(level)
+        return self.summarize(elapsed, target)
+
+    def summarize(self, elapsed, target):
+        results = {
+            'started_at': datetime.now().isoformat(),
+            'target': target,
+            'config': {
+                'workers': self.workers, 'rate': self.rate, 'duration': self.duration,
+                'post_ratio': self.post_ratio, 'page_size': self.page_size,
+            },
+            'elapsed_seconds': elapsed,
+            'endpoints': {},
+        }
+        print("\n" + "=" * 60)
+        print("📊 BENCHMARK SUMMARY")
+        print("=" * 60)
+        for name, samples in self.samples.items():
+            samples.sort()
+            stats = {
+                'requests': len(samples),
+                'errors': self.errors[name],
+                'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+                'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None,
+            }
+            if samples:
+                stats.update({
+                    'p50_ms': percentile(samples, 50) * 1000,
+                    'p95_ms': percentile(samples, 95) * 1000,
+                    'p99_ms': percentile(samples, 99) * 1000,
+                    'max_ms': samples[-1] * 1000,
+                })
+                print(f"{name:<18} {stats['throughput_rps']:>9.1f} req/s  p50 {stats['p50_ms']:.2f} ms  "
+                      f"p95 {stats['p95_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms  errors {stats['errors']}")
+            else:
+                print(f"{name:<18} no successful requests  errors {stats['errors']}")
+            results['endpoints'][name] = stats
+        return results
+
+# Cold-start budgets for --startup, in milliseconds (median of the runs)
+STARTUP_IMPORT_BUDGET_MS = 1000
+STARTUP_READY_BUDGET_MS = 2000
+
+# Runs in a fresh interpreter: import the server, build the app, start its lifespan and
+# serve one request. Prints the phase timings as JSON.
+STARTUP_PROBE = r"""
+import asyncio, json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import server
+imported = time.perf_counter()
+
+def mock_client(settings, listeners):
+    # Imported here so, like Motor, it counts towards the lifespan rather than create_app
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()
+
+app = server.create_app(mongo_client_factory=None if os.environ.get('MONGO_URL') else mock_client)
+created = time.perf_counter()
+
+async def first_request():
+    import httpx
+    async with server.lifespan(app):
+        lifespan_started = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://startup') as client:
+            response = await client.get('/api/characters/1')
+            response.raise_for_status()
+        return lifespan_started, time.perf_counter()
+
+lifespan_started, ready = asyncio.run(first_request())
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'lifespan_ms': (lifespan_started - created) * 1000,
+    'first_request_ms': (ready - lifespan_started) * 1000,
+    'in_process_ms': (ready - started) * 1000,
+}))
+"""
+
+class StartupBenchmark:
+    """Times cold starts of backend/server.py, one fresh interpreter per run.
+
+    ready_ms is measured from spawning the interpreter to the first successful
+    response, so it includes interpreter startup. Mongo is mongomock-motor
+    unless a mongo_url is given.
+    """
+
+    def __init__(self, runs=5, mongo_url=None, import_budget_ms=STARTUP_IMPORT_BUDGET_MS,
+                 ready_budget_ms=STARTUP_READY_BUDGET_MS):
+        self.runs = runs
+        self.mongo_url = mongo_url
+        self.import_budget_ms = import_budget_ms
+        self.ready_budget_ms = ready_budget_ms
+        self.backend_dir = str(Path(__file__).parent / 'backend')
+
+    def environment(self):
+        env = dict(os.environ)
+        env.pop('MONGO_URL', None)
+        if self.mongo_url:
+            env['MONGO_URL'] = self.mongo_url
+        env.setdefault('DB_NAME', 'startup_benchmark')
+        return env
+
+    def probe(self):
+        spawned = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', STARTUP_PROBE, self.backend_dir], env=self.environment(),
+                                capture_output=True, text=True, check=True)
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        timings['ready_ms'] = (time.perf_counter() - spawned) * 1000
+        return timings
+
+    def slowest_imports(self, count=10):
+        """Top-level imports of ``import server`` by cumulative time, from ``python -X importtime``."""
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import server'], cwd=self.backend_dir,
+                                env=self.environment(), capture_output=True, text=True, check=True)
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Direct imports of server are indented by one level
+            if name.startswith('   ') and not name.startswith('     '):
+                imports.append((int(cumulative) / 1000, name.strip()))
+        return sorted(imports, reverse=True)[:count]
+
+    def measure(self):
+        """Time ``runs`` cold starts; returns (runs, median of each phase, budgets exceeded)."""
+        runs = [self.probe() for _ in range(self.runs)]
+        summary = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        failures = []
+        if summary['import_ms'] > self.import_budget_ms:
+            failures.append(f"import {summary['import_ms']:.0f} ms > {self.import_budget_ms} ms")
+        if summary['ready_ms'] > self.ready_budget_ms:
+            failures.append(f"ready {summary['ready_ms']:.0f} ms > {self.ready_budget_ms} ms")
+        return runs, summary, failures
+
+    def run(self):
+        print(f"🚀 Timing {self.runs} cold starts of backend/server.py "
+              f"({'mongod ' + self.mongo_url if self.mongo_url else 'mongomock-motor'})")
+        runs, summary, failures = self.measure()
+
+        print("\n" + "=" * 60)
+        print("📊 STARTUP SUMMARY (median)")
+        print("=" * 60)
+        for key, value in summary.items():
+            print(f"{key:<18} {value:>9.1f} ms")
+        print("\nSlowest imports of `import server`:")
+        for cumulative_ms, name in self.slowest_imports():
+            print(f"  {cumulative_ms:>8.1f} ms  {name}")
+
+        for failure in failures:
+            print(f"❌ Over budget: {failure}")
+        if not failures:
+            print(f"✅ Within budget (import {self.import_budget_ms} ms, ready {self.ready_budget_ms} ms)")
+        return {'started_at': datetime.now().isoformat(), 'runs': runs, 'median': summary,
+                'budget': {'import_ms': self.import_budget_ms, 'ready_ms': self.ready_budget_ms},
+                'passed': not failures}
+
+def compare_results(previous, current):
+    """Print the change in throughput and tail latency between two saved runs."""
+    print("\n📈 Compared to previous run:")
+    for name, stats in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        parts = []
+        for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(key) and stats.get(key) is not None:
+                change = (stats[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {change:+.1f}%")
+        print(f"  {name}: " + ", ".join(parts))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--benchmark', action='store_true', help='load-test /api/status instead of running the checks')
+    parser.add_argument('--startup', action='store_true', help='time cold starts of the app against a budget')
+    parser.add_argument('--runs', type=int, default=5, help='with --startup, number of cold starts')
+    parser.add_argument('--import-budget-ms', type=float, default=STARTUP_IMPORT_BUDGET_MS,
+                        help='with --startup, maximum median import time')
+    parser.add_argument('--ready-budget-ms', type=float, default=STARTUP_READY_BUDGET_MS,
+                        help='with --startup, maximum median time to the first response')
+    parser.add_argument('--workers', type=int, default=16, help='concurrent client workers')
+    parser.add_argument('--rate', type=float, default=None, help='target requests/second across all workers')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--post-ratio', type=float, default=0.5, help='fraction of requests that are POSTs')
+    parser.add_argument('--page-size', type=int, default=100, help='limit used for GET requests')
+    parser.add_argument('--url', help='backend base URL (defaults to REACT_APP_BACKEND_URL)')
+    parser.add_argument('--offline', action='store_true', help='run against the app in-process')
+    parser.add_argument('--mongo-url', help='with --offline or --startup, use this mongod instead of mongomock-motor')
+    parser.add_argument('--output', help='write benchmark results as JSON to this file')
+    parser.add_argument('--compare', help='previous benchmark JSON to compare against')
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+
+    if args.startup:
+        results = StartupBenchmark(runs=args.runs, mongo_url=args.mongo_url, import_budget_ms=args.import_budget_ms,
+                                   ready_budget_ms=args.ready_budget_ms).run()
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n💾 Results saved to {args.output}")
+        sys.exit(0 if results['passed'] else 1)
+
+    if args.benchmark:
+        url = None
+        if not args.offline:
+            url = args.url or get_backend_url()
+            if not url:
+                print("❌ Could not get backend URL; pass --url or --offline")
+                sys.exit(1)
+        benchmark = BackendBenchmark(
+            workers=args.workers, rate=args.rate, duration=args.duration, post_ratio=args.post_ratio,
+            page_size=args.page_size, url=url, offline=args.offline, mongo_url=args.mongo_url,
+        )
+        results = benchmark.run()
+        if args.compare:
+            with open(args.compare) as f:
+                compare_results(json.load(f), results)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n💾 Results saved to {args.output}")
+        sys.exit(0)
+
     tester = BackendTester()
     success = tester.run_all_tests()
     
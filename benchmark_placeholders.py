@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the placeholder image generators.
+Compares the original per-row ImageDraw rendering (copied below) with the
+NumPy versions in create_universal_images.py and create_character_images.py,
+in images/sec at several sizes. JPEG encoding is included unless
+--render-only is given, which times drawing alone.
+
+    python benchmark_placeholders.py [--render-only] [size ...]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from create_character_images import CHARACTERS, create_placeholder_image
+from create_universal_images import CHARACTER_COUNT, create_universal_placeholder
+
+SIZES = (400, 1024, 2048)
+
+
+# Original implementations, kept verbatim for comparison
+def legacy_universal_placeholder(character_number, output_path, size=(400, 400)):
+    """Create a dark-themed placeholder image for a universal character."""
+    
+    # Dark theme color palette
+    dark_colors = [
+        (15, 23, 42),    # slate-900
+        (30, 41, 59),    # slate-800
+        (51, 65, 85),    # slate-700
+        (71, 85, 105),   # slate-600
+    ]
+    
+    accent_colors = [
+        (139, 92, 246),  # violet-500
+        (59, 130, 246),  # blue-500
+        (6, 182, 212),   # cyan-500
+        (16, 185, 129),  # emerald-500
+        (245, 158, 11),  # amber-500
+        (244, 63, 94),   # rose-500
+    ]
+    
+    # Create base image with dark gradient
+    img = Image.new('RGB', size, dark_colors[0])
+    draw = ImageDraw.Draw(img)
+    
+    # Create a subtle dark gradient
+    for i in range(size[1]):
+        alpha = i / size[1]
+        r = int(dark_colors[0][0] + alpha * (dark_colors[1][0] - dark_colors[0][0]))
+        g = int(dark_colors[0][1] + alpha * (dark_colors[1][1] - dark_colors[0][1]))
+        b = int(dark_colors[0][2] + alpha * (dark_colors[1][2] - dark_colors[0][2]))
+        draw.line([(0, i), (size[0], i)], fill=(r, g, b))
+    
+    # Add decorative elements
+    center_x, center_y = size[0] // 2, size[1] // 2
+    
+    # Choose accent color based on character number
+    accent_color = accent_colors[character_number % len(accent_colors)]
+    
+    # Create geometric pattern
+    if character_number % 4 == 0:
+        # Circle pattern
+        for radius in [60, 80, 100]:
+            draw.ellipse(
+                [center_x - radius, center_y - radius,
+                 center_x + radius, center_y + radius],
+                outline=accent_color + (100,), width=2
+            )
+    elif character_number % 4 == 1:
+        # Square pattern
+        for size_offset in [50, 70, 90]:
+            draw.rectangle(
+                [center_x - size_offset, center_y - size_offset,
+                 center_x + size_offset, center_y + size_offset],
+                outline=accent_color + (100,), width=2
+            )
+    elif character_number % 4 == 2:
+        # Triangle pattern
+        for offset in [40, 60, 80]:
+            points = [
+                (center_x, center_y - offset),
+                (center_x - offset, center_y + offset),
+                (center_x + offset, center_y + offset)
+            ]
+            draw.polygon(points, outline=accent_color + (100,), width=2)
+    else:
+        # Diamond pattern
+        for offset in [45, 65, 85]:
+            points = [
+                (center_x, center_y - offset),
+                (center_x + offset, center_y),
+                (center_x, center_y + offset),
+                (center_x - offset, center_y)
+            ]
+            draw.polygon(points, outline=accent_color + (100,), width=2)
+    
+    # Add chapter number
+    try:
+        font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 48)
+        font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
+    except:
+        font_large = ImageFont.load_default()
+        font_small = ImageFont.load_default()
+    
+    # Chapter number
+    chapter_text = str(character_number)
+    text_bbox = draw.textbbox((0, 0), chapter_text, font=font_large)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    text_x = (size[0] - text_width) // 2
+    text_y = center_y - text_height // 2
+    
+    # Add glow effect
+    for offset in range(3):
+        draw.text((text_x + offset, text_y + offset), chapter_text, font=font_large, fill=(0, 0, 0, 50))
+    
+    # Main text
+    draw.text((text_x, text_y), chapter_text, font=font_large, fill=accent_color)
+    
+    # Add "Chapter" label
+    label_text = "Chapter"
+    label_bbox = draw.textbbox((0, 0), label_text, font=font_small)
+    label_width = label_bbox[2] - label_bbox[0]
+    label_x = (size[0] - label_width) // 2
+    label_y = text_y + text_height + 10
+    
+    draw.text((label_x, label_y), label_text, font=font_small, fill=(203, 213, 225))
+    
+    # Add subtle texture
+    for _ in range(50):
+        x = random.randint(0, size[0])
+        y = random.randint(0, size[1])
+        draw.point((x, y), fill=accent_color + (30,))
+    
+    # Save the image
+    img.save(output_path, 'JPEG', quality=90)
+    print(f"✅ Created: {output_path}")
+
+
+def legacy_placeholder_image(character_name, output_path, size=(400, 400)):
+    """Create a placeholder image for a Buddhist character."""
+    # Create a gradient background
+    img = Image.new('RGB', size, color='#1a1a2e')
+    draw = ImageDraw.Draw(img)
+    
+    # Create a subtle gradient
+    for i in range(size[1]):
+        alpha = i / size[1]
+        color = (
+            int(26 + alpha * 30),   # Dark purple to lighter purple
+            int(26 + alpha * 30),
+            int(46 + alpha * 40)
+        )
+        draw.line([(0, i), (size[0], i)], fill=color)
+    
+    # Add a Buddhist symbol (lotus-like circle)
+    center_x, center_y = size[0] // 2, size[1] // 2
+    circle_radius = min(size) // 4
+    
+    # Outer circle
+    draw.ellipse(
+        [center_x - circle_radius, center_y - circle_radius,
+         center_x + circle_radius, center_y + circle_radius],
+        outline='#8b5cf6', width=3
+    )
+    
+    # Inner circle
+    inner_radius = circle_radius - 20
+    draw.ellipse(
+        [center_x - inner_radius, center_y - inner_radius,
+         center_x + inner_radius, center_y + inner_radius],
+        outline='#a855f7', width=2
+    )
+    
+    # Add character name
+    try:
+        # Try to load a system font
+        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 20)
+    except:
+        # Fallback to default font
+        font = ImageFont.load_default()
+    
+    # Calculate text position
+    text_bbox = draw.textbbox((0, 0), character_name, font=font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    text_x = (size[0] - text_width) // 2
+    text_y = center_y + circle_radius + 20
+    
+    # Add text shadow
+    draw.text((text_x + 2, text_y + 2), character_name, font=font, fill='#000000')
+    # Add main text
+    draw.text((text_x, text_y), character_name, font=font, fill='#ffffff')
+    
+    # Save the image
+    img.save(output_path, 'JPEG', quality=85)
+    print(f"✅ Created placeholder: {output_path}")
+
+
+def measure(render, size, min_seconds=1.0):
+    """Return images/sec for ``render(i, output, size)`` cycled over the character list."""
+    count = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while True:
+            render(count, io.BytesIO(), (size, size))
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                return count / elapsed
+
+
+def main():
+    names = list(CHARACTERS.values())
+    cases = [
+        ('universal', lambda i, out, size: legacy_universal_placeholder(i % CHARACTER_COUNT + 1, out, size),
+         lambda i, out, size: create_universal_placeholder(i % CHARACTER_COUNT + 1, out, size)),
+        ('character', lambda i, out, size: legacy_placeholder_image(names[i % len(names)], out, size),
+         lambda i, out, size: create_placeholder_image(names[i % len(names)], out, size)),
+    ]
+    args = sys.argv[1:]
+    if '--render-only' in args:
+        args.remove('--render-only')
+        Image.Image.save = lambda self, *a, **k: None
+    sizes = [int(arg) for arg in args] or SIZES
+    print(f"{'case':<22}{'before (img/s)':>16}{'after (img/s)':>16}{'speedup':>10}")
+    print("-" * 64)
+    for name, before, after in cases:
+        for size in sizes:
+            # Warm the font and mask caches so both sides are measured in steady state
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(CHARACTER_COUNT):
+                    after(i, io.BytesIO(), (size, size))
+            old_rate = measure(before, size)
+            new_rate = measure(after, size)
+            label = f"{name} {size}px"
+            print(f"{label:<22}{old_rate:>16.1f}{new_rate:>16.1f}{new_rate / old_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the /api/status serialization paths.
+Compares the original Pydantic round-trips against the single-validation
+orjson path used by backend/server.py, at 1, 100 and 1000 rows.
+"""
+
+import asyncio
+import time
+import uuid
+import warnings
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel, Field
+
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+
+LIST_FIELD = create_response_field(name="Response_List", type_=List[StatusCheck])
+ITEM_FIELD = create_response_field(name="Response_Item", type_=StatusCheck)
+
+
+def make_rows(count):
+    start = datetime(2025, 1, 1)
+    return [
+        {"id": str(uuid.uuid4()), "client_name": f"client-{i % 50}", "timestamp": start + timedelta(seconds=i)}
+        for i in range(count)
+    ]
+
+async def get_before(rows):
+    """Original handler: one model per row, then FastAPI validates the list again."""
+    models = [StatusCheck(**row) for row in rows]
+    content = await serialize_response(field=LIST_FIELD, response_content=models, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def get_after(rows):
+    return orjson.dumps(rows)
+
+async def post_before(payload):
+    input = StatusCheckCreate(**payload)
+    status_obj = StatusCheck(**input.dict())
+    _ = status_obj.dict()
+    content = await serialize_response(field=ITEM_FIELD, response_content=status_obj, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def post_after(payload):
+    input = StatusCheckCreate(**payload)
+    status_doc = StatusCheck(client_name=input.client_name).model_dump()
+    return orjson.dumps(status_doc)
+
+async def measure(func, arg, min_seconds=0.5):
+    """Return CPU microseconds per call."""
+    iterations = 0
+    start = time.process_time()
+    while True:
+        for _ in range(10):
+            await func(arg)
+        iterations += 10
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds:
+            return elapsed / iterations * 1e6
+
+async def main():
+    # The original handler used the deprecated .dict() API; keep warning output out of the timings
+    warnings.simplefilter("ignore", DeprecationWarning)
+    print(f"{'case':<18}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    print("-" * 56)
+
+    # Both GET paths must produce the same JSON document
+    sample = make_rows(3)
+    assert orjson.loads(await get_before(sample)) == orjson.loads(await get_after(sample))
+
+    for count in (1, 100, 1000):
+        rows = make_rows(count)
+        before = await measure(get_before, rows)
+        after = await measure(get_after, rows)
+        print(f"{f'GET {count} rows':<18}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+    payload = {"client_name": "benchmark"}
+    before = await measure(post_before, payload)
+    after = await measure(post_after, payload)
+    print(f"{'POST 1 row':<18}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
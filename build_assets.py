@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Build the generated frontend assets (placeholder models, character images and
+texture-compressed copies of the source models).
+
+Runs the create_* generators in a process pool and only rebuilds outputs whose
+inputs changed: every output is recorded in a manifest with a hash of its
+generator's source and arguments. Outputs are written to a temporary file
+and renamed into place, so an interrupted build never leaves a truncated
+JPEG or GLB in frontend/public.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import create_character_images
+import create_image_variants
+import create_placeholder_models
+import compress_textures
+import create_universal_images
+import downloader
+import precompress_assets
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_PUBLIC_DIR = ROOT_DIR / 'frontend' / 'public'
+MANIFEST_NAME = '.asset-build.json'
+# Bump to force a full rebuild after changes to this driver itself
+BUILD_VERSION = 1
+
+GROUPS = ('models', 'downloads', 'characters', 'universal', 'textures', 'variants', 'compress')
+DEFAULT_GROUPS = ('models', 'characters', 'universal', 'textures', 'variants', 'compress')
+# Helper modules whose source also feeds into a generator's outputs
+MODULE_DEPENDENCIES = {
+    'create_character_images': ('placeholder_render',),
+    'create_universal_images': ('placeholder_render',),
+    'compress_textures': ('glb',),
+}
+
+# mkstemp creates files as 0600; outputs get the usual permissions for static files
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+def source_hash(module_name):
+    """Hash of a generator module's source and its helpers, so editing a script invalidates its outputs."""
+    digest = hashlib.sha256()
+    for name in (module_name,) + MODULE_DEPENDENCIES.get(module_name, ()):
+        with open(importlib.import_module(name).__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def collect_jobs(public_dir, groups):
+    """Return {output path relative to public_dir: job} in the order the scripts write them.
+
+    A job is (group, module, function, keyword arguments). As with running the
+    scripts one after another, a later job writing the same file replaces an
+    earlier one.
+    """
+    images_dir = Path('images')
+    jobs = {}
+    if 'models' in groups:
+        for i in range(1, 11):
+            name = create_placeholder_models.CHARACTER_NAMES.get(i, f"Buddhist Character {i}")
+            jobs[f"modelo{i}.glb"] = ('models', 'create_placeholder_models', 'create_minimal_glb',
+                                      {'character_name': name})
+    if 'characters' in groups:
+        for character_id, character_name in create_character_images.CHARACTERS.items():
+            jobs[str(images_dir / f"{character_id}.jpg")] = (
+                'characters', 'create_character_images', 'create_placeholder_image',
+                {'character_name': character_name, 'size': [400, 400]})
+    if 'universal' in groups:
+        for i in range(1, create_universal_images.CHARACTER_COUNT + 1):
+            jobs[str(images_dir / f"character-{i}.jpg")] = (
+                'universal', 'create_universal_images', 'create_universal_placeholder',
+                {'character_number': i, 'size': [400, 400]})
+    if 'textures' in groups:
+        # Written to models/, which the backend searches before the source models
+        for path in sorted(Path(compress_textures.DEFAULT_INPUT).glob('modelo*.glb')):
+            jobs[str(Path('models') / path.name)] = (
+                'textures', 'compress_textures', 'compress_model',
+                {'source': str(path), 'cache_dir': str(compress_textures.DEFAULT_CACHE)})
+    return jobs
+
+
+def collect_compress_jobs(public_dir, sources_dir=precompress_assets.SOURCE_MODELS_DIR):
+    """Pre-compressed variants of the source models and those under ``public_dir``; collected after the models are built.
+
+    Variants of the source models sit next to them, so their keys are relative
+    paths leading out of ``public_dir``.
+    """
+    jobs = {}
+    for path in precompress_assets.compressible_assets(public_dir, sources_dir):
+        for encoding in precompress_assets.available_encodings():
+            relative = os.path.relpath(str(path) + precompress_assets.SUFFIXES[encoding], public_dir)
+            jobs[relative] = ('compress', 'precompress_assets', 'compress_file',
+                              {'source': str(path), 'encoding': encoding})
+    return jobs
+
+
+def job_key(job, source_hashes):
+    _, module, function, kwargs = job
+    inputs = [BUILD_VERSION, module, source_hashes[module], function, kwargs]
+    if 'source' in kwargs:
+        # Jobs that transform a file are also keyed on that file's current version
+        stat = os.stat(kwargs['source'])
+        inputs.append([stat.st_size, stat.st_mtime_ns])
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('outputs', {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def atomic_write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def is_up_to_date(output_path, entry, key):
+    """Cheap check: same inputs, and the file on disk is the one the last build wrote."""
+    if not entry or entry.get('key') != key:
+        return False
+    try:
+        stat = output_path.stat()
+    except FileNotFoundError:
+        return False
+    return stat.st_size == entry.get('bytes') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+
+def run_job(output_path, job):
+    """Run one generator into a temporary file next to ``output_path`` and rename it into place.
+
+    Executed in a worker process; returns (output_path, size, mtime_ns, sha256).
+    """
+    _, module, function, kwargs = job
+    generator = getattr(importlib.import_module(module), function)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix='.tmp')
+    os.close(fd)
+    log = io.StringIO()
+    try:
+        kwargs = {k: tuple(v) if isinstance(v, list) else v for k, v in kwargs.items()}
+        with contextlib.redirect_stdout(log):
+            generator(output_path=tmp_path, **kwargs)
+        with open(tmp_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+    stat = output_path.stat()
+    return str(output_path), stat.st_size, stat.st_mtime_ns, digest
+
+
+def run_jobs(public_dir, jobs, manifest, manifest_path, workers, force):
+    """Build the stale subset of ``jobs``; returns (built, skipped, failed) counts."""
+    source_hashes = {module: source_hash(module) for _, module, _, _ in jobs.values()}
+    pending = {}
+    for relative, job in jobs.items():
+        key = job_key(job, source_hashes)
+        if not force and is_up_to_date(public_dir / relative, manifest.get(relative), key):
+            continue
+        pending[relative] = (job, key)
+
+    built = failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = {pool.submit(run_job, str(public_dir / relative), job): relative
+                       for relative, (job, _) in pending.items()}
+            try:
+                for future in as_completed(futures):
+                    relative = futures[future]
+                    job, key = pending[relative]
+                    try:
+                        _, size, mtime_ns, digest = future.result()
+                    except Exception as e:
+                        failed += 1
+                        manifest.pop(relative, None)
+                        print(f"❌ {relative}: {e}")
+                        continue
+                    built += 1
+                    manifest[relative] = {'key': key, 'group': job[0], 'bytes': size,
+                                          'mtime_ns': mtime_ns, 'sha256': digest}
+                    print(f"✅ Built: {relative}")
+            finally:
+                # Record what finished even if the build is interrupted part-way
+                atomic_write_json(manifest_path, {'version': BUILD_VERSION, 'outputs': manifest})
+    return built, len(jobs) - len(pending), failed
+
+
+def build(public_dir, groups=DEFAULT_GROUPS, workers=None, force=False,
+          sources_dir=precompress_assets.SOURCE_MODELS_DIR):
+    """Rebuild stale outputs; returns (built, skipped, failed) counts."""
+    public_dir = Path(public_dir)
+    public_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = public_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    jobs = collect_jobs(public_dir, groups)
+    built = skipped = failed = 0
+
+    if 'downloads' in groups:
+        # Network-bound, so threads rather than the process pool; the downloader keeps its own
+        # manifest of ETags and skips unchanged files. As in create_character_images.py, a
+        # placeholder written to the same name replaces the download, so those are not fetched.
+        references = [(url, filename) for url, filename in create_character_images.REFERENCE_IMAGES
+                      if str(Path('images') / filename) not in jobs]
+        results = downloader.download_all(references, public_dir / 'images', workers or 8)
+        for result in results.values():
+            if isinstance(result, downloader.DownloadError):
+                failed += 1
+            elif result == downloader.UNCHANGED:
+                skipped += 1
+            else:
+                built += 1
+
+    counts = run_jobs(public_dir, jobs, manifest, manifest_path, workers, force)
+    built, skipped, failed = (a + b for a, b in zip((built, skipped, failed), counts))
+
+    if 'variants' in groups:
+        # Runs after the images exist; variant names are keyed on source content, so this is incremental too
+        variants = create_image_variants.build_variants(public_dir / 'images', workers)
+        print(f"✅ Variants: {len(variants['images'])} images in {', '.join(variants['formats'])}")
+
+    if 'compress' in groups:
+        # Second pass, once the models it compresses are up to date
+        counts = run_jobs(public_dir, collect_compress_jobs(public_dir, sources_dir), manifest, manifest_path,
+                          workers, force)
+        built, skipped, failed = (a + b for a, b in zip((built, skipped, failed), counts))
+    return built, skipped, failed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build generated frontend assets incrementally and in parallel")
+    parser.add_argument('groups', nargs='*', metavar='group',
+                        help=f"Asset groups to build: {', '.join(GROUPS)} (default: all but downloads)")
+    parser.add_argument('--public-dir', type=Path, default=DEFAULT_PUBLIC_DIR, help="Output directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every output, ignoring the manifest")
+    parser.add_argument('--no-sources', action='store_true',
+                        help="Do not pre-compress the source models in frontend/src/data/models")
+    args = parser.parse_args()
+    unknown = [group for group in args.groups if group not in GROUPS]
+    if unknown:
+        parser.error(f"unknown asset group(s): {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    built, skipped, failed = build(args.public_dir, args.groups or DEFAULT_GROUPS, args.workers, args.force,
+                                   None if args.no_sources else precompress_assets.SOURCE_MODELS_DIR)
+    elapsed = time.perf_counter() - started
+    print(f"{'❌' if failed else '✅'} {built} built, {skipped} up to date, {failed} failed in {elapsed:.2f}s")
+    raise SystemExit(1 if failed else 0)
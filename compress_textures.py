@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Downscale and re-encode the textures embedded in the character GLB models.
+
+Every image a material uses is capped at a maximum size for its role
+(base color, normal, ...), encoded as WebP for EXT_texture_webp and, unless
+--webp-only is given, as a JPEG (or PNG, with transparency) fallback for
+viewers without WebP support. The BIN chunk is then rebuilt with corrected
+bufferView offsets. Encoded textures are cached by a hash of the source
+image and encoder settings, so an image shared by several models, or
+unchanged since the last run, is only encoded once.
+
+The rewritten models go to frontend/public/models, which the backend searches
+before the source models; build_assets.py runs this as its ``textures`` step.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image
+
+from glb import GLBReader, repack_buffer_views, write_glb
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_INPUT = ROOT_DIR / 'frontend' / 'src' / 'data' / 'models'
+DEFAULT_OUTPUT = ROOT_DIR / 'frontend' / 'public' / 'models'
+DEFAULT_CACHE = ROOT_DIR / '.texture-cache'
+
+WEBP_EXTENSION = 'EXT_texture_webp'
+DECODABLE_TYPES = ('image/png', 'image/jpeg', 'image/webp')
+
+# Longest edge per material texture role; a card-sized AR preview never needs more
+DEFAULT_MAX_SIZES = {
+    'baseColor': 1024,
+    'normal': 1024,
+    'emissive': 512,
+    'metallicRoughness': 512,
+    'occlusion': 512,
+    'other': 512,
+}
+WEBP_OPTIONS = {'quality': 80, 'method': 6}
+JPEG_OPTIONS = {'quality': 85, 'optimize': True}
+PNG_OPTIONS = {'optimize': True}
+
+
+def texture_roles(gltf):
+    """{texture index: set of roles} from the materials, e.g. {0: {'baseColor'}}."""
+    roles = {}
+
+    def visit(node):
+        for key, value in node.items():
+            if not isinstance(value, dict):
+                continue
+            if key.endswith('Texture') and isinstance(value.get('index'), int):
+                role = key[:-len('Texture')]
+                roles.setdefault(value['index'], set()).add(role if role in DEFAULT_MAX_SIZES else 'other')
+            visit(value)
+
+    for material in gltf.get('materials', []):
+        visit(material)
+    return roles
+
+
+def primary_image(texture):
+    """The image a texture is rebuilt from: its WebP source if it has one, else its core source."""
+    return texture.get('extensions', {}).get(WEBP_EXTENSION, {}).get('source', texture.get('source'))
+
+
+def has_alpha(image):
+    if image.mode not in ('RGBA', 'LA', 'PA') and 'transparency' not in image.info:
+        return False
+    return image.convert('RGBA').getchannel('A').getextrema()[0] < 255
+
+
+def encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def cache_key(data, max_size, fallback):
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(json.dumps([max_size, fallback, WEBP_OPTIONS, JPEG_OPTIONS, PNG_OPTIONS]).encode())
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def compress_image(data, mime_type, max_size, fallback, cache_dir):
+    """Encode one texture; returns {'webp', 'fallback', 'fallback_type', 'size', 'source_size', 'cached'}.
+
+    Results are cached in ``cache_dir`` by content, so every worker encoding
+    the same source image with the same settings reuses the first result.
+    """
+    key = cache_key(data, max_size, fallback)
+    webp_path = cache_dir / f"{key}.webp"
+    fallback_paths = {'image/jpeg': cache_dir / f"{key}.jpg", 'image/png': cache_dir / f"{key}.png"}
+    with Image.open(io.BytesIO(data)) as source:
+        source_size = source.size
+    cached_fallback = next(((mime, path) for mime, path in fallback_paths.items() if path.exists()), None)
+    if webp_path.exists() and (not fallback or cached_fallback):
+        webp = webp_path.read_bytes()
+        with Image.open(io.BytesIO(webp)) as encoded:
+            size = encoded.size
+        return {'webp': webp, 'fallback': cached_fallback[1].read_bytes() if fallback else None,
+                'fallback_type': cached_fallback[0] if fallback else None,
+                'size': size, 'source_size': source_size, 'cached': True}
+
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+    image = source.convert('RGBA') if has_alpha(source) else source.convert('RGB')
+    resized = max(image.size) > max_size
+    if resized:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+    webp = encode(image, 'WEBP', WEBP_OPTIONS)
+    if not resized and mime_type == 'image/webp' and len(webp) >= len(data):
+        # Already a WebP no larger than the target; re-encoding would only lose quality
+        webp = data
+    write_atomic(webp_path, webp)
+
+    result = {'webp': webp, 'fallback': None, 'fallback_type': None, 'size': image.size,
+              'source_size': source_size, 'cached': False}
+    if fallback:
+        if image.mode == 'RGBA':
+            result['fallback_type'], result['fallback'] = 'image/png', encode(image, 'PNG', PNG_OPTIONS)
+        else:
+            result['fallback_type'], result['fallback'] = 'image/jpeg', encode(image, 'JPEG', JPEG_OPTIONS)
+        write_atomic(fallback_paths[result['fallback_type']], result['fallback'])
+    return result
+
+
+def compress_model(source, output_path, max_sizes=DEFAULT_MAX_SIZES, fallback=True, cache_dir=DEFAULT_CACHE):
+    """Rewrite the GLB at ``source`` with recompressed textures; returns its report entry."""
+    path = Path(source)
+    output_path = Path(output_path)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    source_bytes = os.path.getsize(path)
+
+    with GLBReader(path) as glb:
+        gltf, binary = glb.gltf, glb.binary
+        images = gltf.get('images', [])
+        roles = texture_roles(gltf)
+
+        # Textures whose image can be decoded here are rebuilt; anything else is left alone
+        targets = {}
+        for texture_index, texture in enumerate(gltf.get('textures', [])):
+            source = primary_image(texture)
+            if source is None or 'bufferView' not in images[source]:
+                continue
+            if images[source].get('mimeType') not in DECODABLE_TYPES:
+                continue
+            targets[texture_index] = source
+
+        # Identical images, within this model or across models, are encoded once
+        encoded = {}
+        hashes = {}
+        max_size_by_hash = {}
+        for texture_index, source in targets.items():
+            data = glb.image(source)[0]
+            digest = hashes.get(source) or hashlib.blake2b(data, digest_size=16).hexdigest()
+            hashes[source] = digest
+            limit = max(max_sizes.get(role, max_sizes['other']) for role in roles.get(texture_index, {'other'}))
+            max_size_by_hash[digest] = max(limit, max_size_by_hash.get(digest, 0))
+        for source, digest in hashes.items():
+            if digest not in encoded:
+                data, mime_type = glb.image(source)
+                encoded[digest] = dict(compress_image(bytes(data), mime_type, max_size_by_hash[digest], fallback,
+                                                      cache_dir), source=source, source_bytes=len(data))
+
+        # New images, appended after the existing ones; the old ones are dropped below if nothing uses them
+        replacements = {}
+        new_images = {}
+
+        def add_image(data, mime_type, name):
+            view_index = len(gltf['bufferViews'])
+            gltf['bufferViews'].append({'buffer': 0, 'byteLength': len(data)})
+            replacements[view_index] = data
+            image = {'bufferView': view_index, 'mimeType': mime_type}
+            if name:
+                image['name'] = name
+            images.append(image)
+            return len(images) - 1
+
+        for digest, result in encoded.items():
+            name = images[result['source']].get('name')
+            webp_index = add_image(result['webp'], 'image/webp', name)
+            fallback_index = None
+            if result['fallback'] is not None:
+                fallback_index = add_image(result['fallback'], result['fallback_type'],
+                                           f"{name}_fallback" if name else None)
+            new_images[digest] = (webp_index, fallback_index)
+
+        for texture_index, source in targets.items():
+            texture = gltf['textures'][texture_index]
+            webp_index, fallback_index = new_images[hashes[source]]
+            texture.setdefault('extensions', {})[WEBP_EXTENSION] = {'source': webp_index}
+            if fallback_index is None:
+                texture.pop('source', None)
+            else:
+                texture['source'] = fallback_index
+
+        # Keep only referenced images, renumbering the texture sources that point at them
+        used = sorted(({primary_image(t) for t in gltf.get('textures', [])} |
+                       {t['source'] for t in gltf.get('textures', []) if 'source' in t}) - {None})
+        renumber = {old: new for new, old in enumerate(used)}
+        gltf['images'] = [images[old] for old in used]
+        for texture in gltf.get('textures', []):
+            if 'source' in texture:
+                texture['source'] = renumber[texture['source']]
+            webp = texture.get('extensions', {}).get(WEBP_EXTENSION)
+            if webp:
+                webp['source'] = renumber[webp['source']]
+
+        if targets:
+            used_extensions = gltf.setdefault('extensionsUsed', [])
+            if WEBP_EXTENSION not in used_extensions:
+                used_extensions.append(WEBP_EXTENSION)
+            required = [e for e in gltf.get('extensionsRequired', []) if e != WEBP_EXTENSION]
+            if not fallback:
+                required.append(WEBP_EXTENSION)
+            if required:
+                gltf['extensionsRequired'] = required
+            else:
+                gltf.pop('extensionsRequired', None)
+
+        parts = repack_buffer_views(gltf, binary, replacements)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.name}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            size = write_glb(tmp_path, gltf, parts)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return {
+        'source': path.name,
+        'output': str(output_path),
+        'bytes_before': source_bytes,
+        'bytes_after': size,
+        'textures': [{
+            'name': images[result['source']].get('name'),
+            'size_before': list(result['source_size']),
+            'size_after': list(result['size']),
+            'bytes_before': result['source_bytes'],
+            'webp_bytes': len(result['webp']),
+            'fallback_bytes': len(result['fallback']) if result['fallback'] is not None else None,
+            'cached': result['cached'],
+        } for result in encoded.values()],
+    }
+
+
+def parse_max_sizes(values):
+    """--max-size 1024 sets every role; --max-size normal=2048 sets one."""
+    sizes = dict(DEFAULT_MAX_SIZES)
+    for value in values or ():
+        role, _, size = value.rpartition('=')
+        if role and role not in sizes:
+            raise ValueError(f"Unknown texture role {role!r} (one of {', '.join(sizes)})")
+        for key in ([role] if role else sizes):
+            sizes[key] = int(size)
+    return sizes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Downscale and re-encode the textures embedded in GLB models")
+    parser.add_argument('models', nargs='*', help="GLB files to process (default: every modelo*.glb in --input)")
+    parser.add_argument('--input', type=Path, default=DEFAULT_INPUT, help="Directory with the source models")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help="Directory for the rewritten models")
+    parser.add_argument('--in-place', action='store_true', help="Replace the source models instead")
+    parser.add_argument('--max-size', action='append', metavar='[ROLE=]PIXELS',
+                        help=f"Longest texture edge, for every role or one of {', '.join(DEFAULT_MAX_SIZES)}; "
+                             "repeatable")
+    parser.add_argument('--webp-only', action='store_true',
+                        help=f"Skip the JPEG/PNG fallback and mark {WEBP_EXTENSION} as required")
+    parser.add_argument('--cache', type=Path, default=DEFAULT_CACHE, help="Directory for encoded textures")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    try:
+        args.max_sizes = parse_max_sizes(args.max_size)
+    except ValueError as e:
+        parser.error(f"--max-size: {e}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    models = [Path(m) for m in args.models] or sorted(args.input.glob('modelo*.glb'))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count()) as pool:
+        futures = {pool.submit(compress_model, model, model if args.in_place else args.output / model.name,
+                               args.max_sizes, not args.webp_only, args.cache): model for model in models}
+        for future in as_completed(futures):
+            entry = future.result()
+            results.append(entry)
+            saved = entry['bytes_before'] - entry['bytes_after']
+            print(f"{entry['source']}: {entry['bytes_before'] / 1024:.0f} KB -> {entry['bytes_after'] / 1024:.0f} KB "
+                  f"({saved / 1024:.0f} KB saved, {saved / max(entry['bytes_before'], 1):.0%})")
+            for texture in entry['textures']:
+                fallback = (f", fallback {texture['fallback_bytes'] / 1024:.0f} KB"
+                            if texture['fallback_bytes'] is not None else "")
+                print(f"  {texture['name'] or 'image'}: {'x'.join(map(str, texture['size_before']))} -> "
+                      f"{'x'.join(map(str, texture['size_after']))}, {texture['bytes_before'] / 1024:.0f} KB -> "
+                      f"webp {texture['webp_bytes'] / 1024:.0f} KB{fallback}{' (cached)' if texture['cached'] else ''}")
+
+    before = sum(entry['bytes_before'] for entry in results)
+    after = sum(entry['bytes_after'] for entry in results)
+    print(f"✅ {len(results)} model(s): {before / 1024:.0f} KB -> {after / 1024:.0f} KB "
+          f"({(before - after) / 1024:.0f} KB saved, {(before - after) / max(before, 1):.0%})")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Create responsive variants of the character images.
+
+Every JPEG in frontend/public/images is resized to a few display widths and
+encoded as AVIF and WebP, with a JPEG fallback. Filenames carry a hash of the
+source image and encoder settings (character-7-card.3f9a1c2b7d.webp), so they
+can be served as immutable and unchanged sources are never re-encoded.
+A manifest.json next to the variants lists dimensions and byte sizes.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, features
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_IMAGES_DIR = ROOT_DIR / 'frontend' / 'public' / 'images'
+VARIANTS_DIRNAME = 'variants'
+MANIFEST_NAME = 'manifest.json'
+
+# Display widths; a variant is never upscaled past its source
+VARIANTS = (
+    ('thumb', 160),
+    ('card', 320),
+    ('detail', 800),
+)
+
+# Listed in order of preference for clients that accept several
+FORMATS = {
+    'avif': ('AVIF', {'quality': 55, 'speed': 6}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+HASH_LENGTH = 10
+
+
+def available_formats():
+    supported = {'avif': features.check('avif'), 'webp': features.check('webp'), 'jpg': True}
+    return [ext for ext in FORMATS if supported[ext]]
+
+
+def variant_hash(source_bytes, variant, width, ext):
+    digest = hashlib.blake2b(source_bytes, digest_size=16)
+    digest.update(json.dumps([variant, width, ext, FORMATS[ext][1]], sort_keys=True).encode())
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def write_atomic(image, path, image_format, options):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, image_format, **options)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def create_variants(source_path, output_dir, formats):
+    """Encode every variant of one image; returns its manifest entry."""
+    source_path = Path(source_path)
+    output_dir = Path(output_dir)
+    source_bytes = source_path.read_bytes()
+    with Image.open(source_path) as image:
+        image.load()
+    image = image.convert('RGB')
+
+    entry = {'source': source_path.name, 'width': image.width, 'height': image.height, 'variants': {}}
+    for variant, width in VARIANTS:
+        width = min(width, image.width)
+        height = round(image.height * width / image.width)
+        resized = None
+        files = {}
+        for ext in formats:
+            path = output_dir / f"{source_path.stem}-{variant}.{variant_hash(source_bytes, variant, width, ext)}.{ext}"
+            if not path.exists():
+                if resized is None:
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                image_format, options = FORMATS[ext]
+                write_atomic(resized, path, image_format, options)
+            files[ext] = {'file': path.name, 'bytes': path.stat().st_size}
+        entry['variants'][variant] = {'width': width, 'height': height, 'formats': files}
+    return entry
+
+
+def build_variants(images_dir=DEFAULT_IMAGES_DIR, workers=None, prune=True):
+    """Create variants for every JPEG in ``images_dir`` and write the manifest; returns the manifest."""
+    images_dir = Path(images_dir)
+    output_dir = images_dir / VARIANTS_DIRNAME
+    output_dir.mkdir(parents=True, exist_ok=True)
+    formats = available_formats()
+    sources = sorted(images_dir.glob('*.jpg'))
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        entries = list(pool.map(create_variants, sources, [output_dir] * len(sources), [formats] * len(sources)))
+
+    manifest = {
+        'formats': formats,
+        'variants': dict(VARIANTS),
+        'images': {Path(entry['source']).stem: entry for entry in entries},
+    }
+    if prune:
+        # Drop variants of sources that changed or disappeared since the last run
+        current = {f['file'] for entry in entries for v in entry['variants'].values() for f in v['formats'].values()}
+        for path in output_dir.iterdir():
+            if path.suffix.lstrip('.') in FORMATS and path.name not in current:
+                path.unlink()
+
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f".{MANIFEST_NAME}.", suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create AVIF/WebP/JPEG width variants of the character images")
+    parser.add_argument('--images-dir', type=Path, default=DEFAULT_IMAGES_DIR, help="Directory with the source JPEGs")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--keep-stale', action='store_true', help="Do not delete variants of old sources")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    manifest = build_variants(args.images_dir, args.workers, prune=not args.keep_stale)
+    sources = sum(os.path.getsize(args.images_dir / entry['source']) for entry in manifest['images'].values())
+    cards = sum(entry['variants']['card']['formats'][manifest['formats'][0]]['bytes']
+                for entry in manifest['images'].values())
+    print(f"✅ {len(manifest['images'])} images, formats: {', '.join(manifest['formats'])}")
+    print(f"   source JPEGs {sources / 1024:.0f} KB, {manifest['formats'][0]} card variants {cards / 1024:.0f} KB")
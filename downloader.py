@@ -0,0 +1,258 @@
+"""
+Concurrent, resumable downloads for the reference images.
+
+Files are fetched in parallel over one pooled requests.Session and streamed
+to <name>.part in chunks, so memory use does not grow with file size. A
+manifest next to the downloads records each file's ETag and Last-Modified:
+later runs send conditional requests and keep the file on a 304, and an
+interrupted transfer continues from its .part file with a Range request
+guarded by If-Range. Timeouts, dropped connections, 429 and 5xx responses
+are retried with exponential backoff.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MANIFEST_NAME = '.downloads.json'
+MANIFEST_VERSION = 1
+PART_SUFFIX = '.part'
+FILE_MODE = 0o644
+
+CHUNK_SIZE = 256 * 1024
+TIMEOUT = (5, 30)  # connect, read (seconds)
+RETRIES = 4
+BACKOFF = 0.5  # seconds before the first retry; doubles after each failure
+MAX_BACKOFF = 30
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# download() results
+DOWNLOADED = 'downloaded'
+RESUMED = 'resumed'
+UNCHANGED = 'unchanged'
+
+
+class DownloadError(Exception):
+    """Raised when a file could not be downloaded, after any retries."""
+
+
+class RetryableError(DownloadError):
+    """A failure worth another attempt; ``retry_after`` is the server's requested delay, if any."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def make_session(pool_size):
+    """A Session whose connection pool has room for ``pool_size`` concurrent requests per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def parse_retry_after(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def resume_validator(validators):
+    """The value to send as If-Range, or None when the response cannot be safely resumed."""
+    etag = validators.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return validators.get('last_modified')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Downloader:
+    """Downloads files into ``directory``, tracking their validators in a manifest there.
+
+    Safe to use from several threads; each file should only be downloaded by
+    one thread at a time.
+    """
+
+    def __init__(self, directory, workers=8, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT,
+                 chunk_size=CHUNK_SIZE, session=None):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.session = session or make_session(workers)
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return data.get('files', {}) if data.get('version') == MANIFEST_VERSION else {}
+
+    def _record(self, filename, entry):
+        with self._lock:
+            if entry is None:
+                self._manifest.pop(filename, None)
+            else:
+                self._manifest[filename] = entry
+            data = {'version': MANIFEST_VERSION, 'files': self._manifest}
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{MANIFEST_NAME}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, sort_keys=True)
+                os.chmod(tmp_path, FILE_MODE)
+                os.replace(tmp_path, self.manifest_path)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(tmp_path)
+                raise
+
+    def entry(self, filename):
+        with self._lock:
+            return dict(self._manifest.get(filename, {}))
+
+    def download(self, url, filename):
+        """Fetch ``url`` into ``directory/filename``; returns DOWNLOADED, RESUMED or UNCHANGED."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for attempt in range(self.retries + 1):
+            try:
+                # A retry continues from whatever reached the .part file
+                return self._fetch(url, filename)
+            except (RetryableError, requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == self.retries:
+                    raise DownloadError(f"{e} (gave up after {attempt + 1} attempts)") from e
+                delay = getattr(e, 'retry_after', None)
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt * random.uniform(1, 1.5)
+                time.sleep(min(delay, MAX_BACKOFF))
+            except requests.RequestException as e:
+                raise DownloadError(str(e)) from e
+
+    def _part_path(self, filename):
+        return self.directory / (filename + PART_SUFFIX)
+
+    def _fetch(self, url, filename):
+        path = self.directory / filename
+        part_path = self._part_path(filename)
+        entry = self.entry(filename)
+        if entry.get('url') != url:
+            entry = {}
+
+        # Byte offsets must refer to the stored bytes, not a transfer encoding of them
+        headers = {'Accept-Encoding': 'identity'}
+        partial = entry.get('partial')
+        offset = part_path.stat().st_size if partial and part_path.exists() else 0
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = resume_validator(partial)
+        elif 'bytes' in entry and path.exists() and path.stat().st_size == entry['bytes']:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return UNCHANGED
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {response.status_code}",
+                                     parse_retry_after(response.headers.get('Retry-After')))
+            if response.status_code == 416 and offset:
+                # The .part file no longer matches the remote file; start over
+                part_path.unlink()
+                self._record(filename, {k: v for k, v in entry.items() if k != 'partial'} or None)
+                raise RetryableError("HTTP 416 for a resumed download")
+            response.raise_for_status()
+
+            if response.status_code == 206 and offset:
+                start = response.headers.get('Content-Range', '').partition(' ')[2].partition('-')[0]
+                if start != str(offset):
+                    raise RetryableError(f"unexpected Content-Range {response.headers.get('Content-Range')!r}")
+                mode = 'ab'
+                validators = partial
+            else:
+                # A full response: the server ignored the Range or the file changed since
+                offset = 0
+                mode = 'wb'
+                validators = {'etag': response.headers.get('ETag'),
+                              'last_modified': response.headers.get('Last-Modified')}
+                if resume_validator(validators):
+                    self._record(filename, {**entry, 'url': url, 'partial': validators})
+                elif partial:
+                    self._record(filename, {k: v for k, v in entry.items() if k != 'partial'} or None)
+
+            length = response.headers.get('Content-Length')
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        size = part_path.stat().st_size
+        if length is not None and size != offset + int(length):
+            raise RetryableError(f"short read: {size - offset} of {length} bytes")
+        os.chmod(part_path, FILE_MODE)
+        os.replace(part_path, path)
+        self._record(filename, {'url': url, 'etag': validators.get('etag'),
+                                'last_modified': validators.get('last_modified'),
+                                'bytes': size, 'sha256': file_sha256(path)})
+        return RESUMED if mode == 'ab' else DOWNLOADED
+
+
+def download_all(items, directory, workers=8, **options):
+    """Download (url, filename) pairs into ``directory`` in parallel.
+
+    Returns {filename: status or DownloadError}; failures, including local I/O
+    errors, are reported, not raised.
+    """
+    items = list(items)
+    downloader = Downloader(directory, workers=workers, **options)
+
+    def fetch(item):
+        url, filename = item
+        try:
+            return downloader.download(url, filename)
+        except DownloadError as e:
+            return e
+        except OSError as e:
+            # Disk full, permissions and the like fail this file only, not the whole batch
+            error = DownloadError(f"{type(e).__name__}: {e}")
+            error.__cause__ = e
+            return error
+
+    with downloader.session, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip((filename for _, filename in items), pool.map(fetch, items)))
+    for filename, result in results.items():
+        if isinstance(result, DownloadError):
+            print(f"❌ Failed to download {filename}: {result}")
+        elif result == UNCHANGED:
+            print(f"✅ Up to date: {filename}")
+        else:
+            print(f"✅ {result.capitalize()}: {filename}")
+    return results
+
@@ -10,9 +10,35 @@ export class CharacterDataLoader {
   }
 
   /**
-   * Load and parse the CSV data
+   * Load character data, preferring the backend API (parsed once server-side)
+   * and falling back to parsing the CSV in the browser
    */
   async loadCharacters() {
+    const backendUrl = process.env.REACT_APP_BACKEND_URL;
+    if (backendUrl) {
+      try {
+        const response = await fetch(`${backendUrl}/api/characters`);
+        if (response.ok) {
+          // Model URLs from the API are served by the backend, with the recompressed models first
+          this.characters = (await response.json()).map((character) => (
+            character.modelUrl?.startsWith('/api/')
+              ? { ...character, modelUrl: `${backendUrl}${character.modelUrl}` }
+              : character
+          ));
+          this.loaded = true;
+          return this.characters;
+        }
+      } catch (error) {
+        console.warn('Character API unavailable, falling back to CSV:', error);
+      }
+    }
+    return this.loadCharactersFromCsv();
+  }
+
+  /**
+   * Load and parse the CSV data
+   */
+  async loadCharactersFromCsv() {
     try {
       const response = await fetch('/src/data/caps.csv');
       const csvText = await response.text();
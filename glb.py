@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Read and write binary glTF (GLB) files.
+
+Uses the same header / JSON chunk / BIN chunk layout as create_placeholder_models.py.
+Parsing that container and summarizing a model is left to backend/glb_container.py,
+which the backend's /api/models/{name}/meta uses too. Writing goes straight
+from NumPy arrays: each bufferView is a memoryview over its array, and the file is written with a single writev, so mesh data
+is never expanded into Python objects or concatenated. Reading maps the file
+with mmap; accessors come back as NumPy views into the mapping, so only the
+pages actually inspected are read from disk.
+
+Run directly to print a summary of one or more GLB files:
+
+    python glb.py frontend/src/data/models/*.glb
+"""
+
+import importlib.util
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+
+
+def _load_glb_container():
+    """backend/glb_container.py, loaded by path so importing this module leaves sys.path alone.
+
+    Putting backend/ on sys.path would make every root tool importing glb resolve
+    top-level names such as ``settings`` or ``images`` to backend modules. The
+    module is registered under its usual name, so the backend shares it.
+    """
+    module = sys.modules.get('glb_container')
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'glb_container.py')
+        spec = importlib.util.spec_from_file_location('glb_container', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['glb_container'] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules['glb_container']
+            raise
+    return module
+
+
+glb_container = _load_glb_container()
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+COMPONENT_DTYPES = {
+    5120: np.int8,     # BYTE
+    5121: np.uint8,    # UNSIGNED_BYTE
+    5122: np.int16,    # SHORT
+    5123: np.uint16,   # UNSIGNED_SHORT
+    5125: np.uint32,   # UNSIGNED_INT
+    5126: np.float32,  # FLOAT
+}
+DTYPE_COMPONENTS = {np.dtype(dtype): component for component, dtype in COMPONENT_DTYPES.items()}
+TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+SIZE_TYPES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}
+
+# Linux caps a single writev at IOV_MAX buffers
+IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names else 1024
+ZEROS = bytes(4)
+
+
+def pad4(length):
+    return (4 - length % 4) % 4
+
+
+def _writev_all(fd, buffers):
+    """os.writev every buffer, resuming after short writes and in IOV_MAX-sized groups."""
+    pending = [memoryview(b).cast('B') for b in buffers if len(b)]
+    written_total = 0
+    while pending:
+        batch = pending[:IOV_MAX]
+        written = os.writev(fd, batch)
+        written_total += written
+        # Drop fully written buffers, trim a partially written one
+        while written and pending:
+            head = pending[0]
+            if written >= len(head):
+                written -= len(head)
+                pending.pop(0)
+            else:
+                pending[0] = head[written:]
+                written = 0
+    return written_total
+
+
+def glb_buffers(gltf, binary):
+    """Header, JSON chunk and BIN chunk of a GLB as a list of buffers ready for writev.
+
+    ``binary`` is a bytes-like object or a sequence of them (e.g. BinaryBuilder.finish()).
+    """
+    json_bytes = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_bytes += b' ' * pad4(len(json_bytes))
+    parts = [binary] if isinstance(binary, (bytes, bytearray, memoryview)) else list(binary)
+    parts = [memoryview(part).cast('B') for part in parts]
+    bin_length = sum(len(part) for part in parts)
+    bin_padding = pad4(bin_length)
+    if bin_padding:
+        parts.append(memoryview(ZEROS[:bin_padding]))
+        bin_length += bin_padding
+
+    total_length = glb_container.HEADER.size + glb_container.CHUNK_HEADER.size + len(json_bytes)
+    buffers = [None, glb_container.CHUNK_HEADER.pack(len(json_bytes), glb_container.CHUNK_JSON), json_bytes]
+    if bin_length:
+        total_length += glb_container.CHUNK_HEADER.size + bin_length
+        buffers.append(glb_container.CHUNK_HEADER.pack(bin_length, glb_container.CHUNK_BIN))
+        buffers.extend(parts)
+    buffers[0] = glb_container.HEADER.pack(glb_container.GLB_MAGIC, glb_container.GLB_VERSION, total_length)
+    return buffers, total_length
+
+
+def write_glb(path, gltf, binary):
+    """Write a GLB with a JSON chunk and, if ``binary`` is non-empty, a BIN chunk; returns its size."""
+    buffers, total_length = glb_buffers(gltf, binary)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        if hasattr(os, 'writev'):
+            _writev_all(fd, buffers)
+        else:
+            for buffer in buffers:
+                os.write(fd, buffer)
+    finally:
+        os.close(fd)
+    return total_length
+
+
+def buffer_view_bytes(gltf, binary, view_index):
+    view = gltf['bufferViews'][view_index]
+    if view.get('buffer', 0) != 0:
+        raise ValueError("Only the GLB-embedded buffer 0 is supported")
+    start = view.get('byteOffset', 0)
+    return binary[start:start + view['byteLength']]
+
+
+def _buffer_view_references(node):
+    """Yield (container, key) for every ``bufferView`` reference in the glTF JSON.
+
+    Covers accessors (and their sparse storage), images and extensions such
+    as KHR_draco_mesh_compression alike.
+    """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'bufferView' and isinstance(value, int):
+                yield node, key
+            else:
+                yield from _buffer_view_references(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _buffer_view_references(value)
+
+
+def repack_buffer_views(gltf, binary, replacements=None):
+    """Rebuild the BIN chunk from the bufferViews still referenced; returns it as a list of buffers.
+
+    ``replacements`` maps bufferView indices to new contents, e.g. re-encoded
+    images or views just appended to ``gltf['bufferViews']``. Unreferenced
+    views are dropped, the rest are renumbered and laid out again on 4-byte
+    boundaries, and ``gltf`` is updated in place. Unchanged views are
+    memoryviews into ``binary``, which must stay open until the GLB is written.
+    """
+    replacements = replacements or {}
+    references = list(_buffer_view_references({k: v for k, v in gltf.items() if k != 'bufferViews'}))
+    old_views = gltf.get('bufferViews', [])
+    renumber = {}
+    views = []
+    parts = []
+    length = 0
+    for old_index in sorted({container[key] for container, key in references}):
+        if old_index in replacements:
+            data = memoryview(replacements[old_index]).cast('B')
+        else:
+            data = buffer_view_bytes(gltf, binary, old_index)
+        padding = pad4(length)
+        if padding:
+            parts.append(memoryview(ZEROS[:padding]))
+            length += padding
+        view = dict(old_views[old_index], buffer=0, byteOffset=length, byteLength=len(data))
+        renumber[old_index] = len(views)
+        views.append(view)
+        parts.append(data)
+        length += len(data)
+
+    for container, key in references:
+        container[key] = renumber[container[key]]
+    gltf['bufferViews'] = views
+    buffers = gltf.get('buffers') or [{}]
+    gltf['buffers'] = [dict(buffers[0], byteLength=length)] + buffers[1:]
+    return parts
+
+
+def read_accessor(gltf, binary, accessor_index):
+    """Decode an accessor into a NumPy array of shape (count,) or (count, components).
+
+    Tightly packed accessors are returned as read-only views into ``binary``.
+    Normalized integer accessors are returned as float32 in [0, 1] / [-1, 1].
+    """
+    accessor = gltf['accessors'][accessor_index]
+    if 'sparse' in accessor:
+        raise ValueError("Sparse accessors are not supported")
+    dtype = np.dtype(COMPONENT_DTYPES[accessor['componentType']]).newbyteorder('<')
+    components = TYPE_SIZES[accessor['type']]
+    count = accessor['count']
+    view = gltf['bufferViews'][accessor['bufferView']]
+    data = buffer_view_bytes(gltf, binary, accessor['bufferView'])
+    offset = accessor.get('byteOffset', 0)
+    element_size = dtype.itemsize * components
+    stride = view.get('byteStride', element_size)
+
+    if stride == element_size:
+        array = np.frombuffer(data, dtype=dtype, count=count * components, offset=offset)
+        array = array.reshape(count, components) if components > 1 else array
+    else:
+        raw = np.frombuffer(data, dtype=np.uint8, count=stride * (count - 1) + element_size, offset=offset)
+        rows = np.lib.stride_tricks.as_strided(raw, shape=(count, element_size), strides=(stride, 1))
+        array = np.ascontiguousarray(rows).view(dtype).reshape(count, components)
+        array = array if components > 1 else array[:, 0]
+
+    if accessor.get('normalized'):
+        info = np.iinfo(dtype)
+        array = array.astype(np.float32) / info.max
+        if info.min < 0:
+            array = np.maximum(array, -1.0)
+    return array
+
+
+class BinaryBuilder:
+    """Accumulates bufferViews and accessors for a single GLB BIN chunk.
+
+    Data is kept as memoryviews over the caller's arrays (plus padding) until
+    written, so building a buffer for millions of vertices costs no copies.
+    """
+
+    def __init__(self, gltf):
+        self.gltf = gltf
+        self.gltf['accessors'] = []
+        self.gltf['bufferViews'] = []
+        self.parts = []
+        self.length = 0
+
+    def add_bytes(self, data, target=None, byte_stride=None):
+        padding = pad4(self.length)
+        if padding:
+            self.parts.append(memoryview(ZEROS[:padding]))
+            self.length += padding
+        data = memoryview(data).cast('B')
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        if byte_stride is not None:
+            view['byteStride'] = byte_stride
+        self.parts.append(data)
+        self.length += len(data)
+        self.gltf['bufferViews'].append(view)
+        return len(self.gltf['bufferViews']) - 1
+
+    def add_accessor(self, array, target=None, normalized=False, min_max=False, pad_to=None):
+        """Append ``array`` as a new bufferView + accessor and return the accessor index.
+
+        ``pad_to`` widens each element to that many bytes (vertex attributes must
+        start on 4-byte boundaries, e.g. int16 VEC3 is stored with a stride of 8).
+        """
+        array = np.asarray(array)
+        if array.dtype.byteorder == '>':
+            array = array.astype(array.dtype.newbyteorder('<'))
+        array = np.ascontiguousarray(array)
+        components = 1 if array.ndim == 1 else array.shape[1]
+        count = array.shape[0]
+        byte_stride = None
+        if pad_to and array.itemsize * components < pad_to:
+            padded = np.zeros((count, pad_to // array.itemsize), dtype=array.dtype)
+            padded[:, :components] = array.reshape(count, components)
+            data = padded
+            byte_stride = pad_to
+        else:
+            data = array
+            if target == ARRAY_BUFFER and components > 1:
+                byte_stride = array.itemsize * components
+
+        accessor = {
+            'bufferView': self.add_bytes(data, target, byte_stride),
+            'componentType': DTYPE_COMPONENTS[np.dtype(array.dtype.type)],
+            'count': count,
+            'type': SIZE_TYPES[components],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if min_max:
+            flat = array.reshape(count, components)
+            accessor['min'] = flat.min(axis=0).tolist()
+            accessor['max'] = flat.max(axis=0).tolist()
+        self.gltf['accessors'].append(accessor)
+        return len(self.gltf['accessors']) - 1
+
+    def finish(self):
+        """Record the buffer length and return the BIN chunk as a list of buffers."""
+        self.gltf['buffers'] = [{'byteLength': self.length}]
+        return self.parts
+
+
+class GLBReader:
+    """Memory-mapped GLB reader.
+
+    Opening parses only the header and JSON chunk; accessors, bufferViews and
+    images are views into the mapping, paged in on access. Views returned by
+    the reader are only valid until it is closed.
+
+        with GLBReader(path) as glb:
+            positions = glb.accessor(glb.gltf['meshes'][0]['primitives'][0]['attributes']['POSITION'])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a GLB file")
+        try:
+            self.gltf, self.binary = glb_container.parse_chunks(self._mmap)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if getattr(self, 'binary', None) is not None:
+            self.binary.release()
+            self.binary = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Arrays handed out still reference the mapping; it is unmapped once they are gone
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def buffer_view(self, index):
+        return buffer_view_bytes(self.gltf, self.binary, index)
+
+    def accessor(self, index):
+        return read_accessor(self.gltf, self.binary, index)
+
+    def image(self, index):
+        """(data, mime type) of an embedded image."""
+        image = self.gltf['images'][index]
+        if 'bufferView' not in image:
+            raise ValueError(f"Image {index} is not embedded in the GLB")
+        return self.buffer_view(image['bufferView']), image.get('mimeType')
+
+    def summary(self):
+        """glb_container.summarize() of this file: meshes, triangle counts, bounds and embedded images."""
+        return glb_container.summarize(self.gltf, os.path.getsize(self.path), len(self.binary))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with GLBReader(path) as glb:
+            info = glb.summary()
+        image_bytes = sum(image['bytes'] or 0 for image in info['images'])
+        print(f"{path}: {info['bytes'] / 1024:.0f} KB, {len(info['meshes'])} mesh(es), "
+              f"{info['triangles']} triangles, {len(info['images'])} image(s) ({image_bytes / 1024:.0f} KB)")
+        for mesh in info['meshes']:
+            for primitive in mesh['primitives']:
+                print(f"  {mesh['name']}: {primitive['vertices']} vertices, {primitive['triangles']} triangles, "
+                      f"{', '.join(primitive['attributes'])}")
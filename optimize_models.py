@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Build optimized, progressively loadable variants of the character GLB models.
+
+For every modelo{N}.glb this writes modelo{N}.lod{K}.glb files, from LOD0
+(full detail, quantized) down to coarse vertex-clustered meshes, plus a
+manifest.json listing byte sizes and triangle counts so viewers can load a
+small LOD first and upgrade once the larger ones arrive.
+"""
+
+import argparse
+import copy
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from glb import (ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, BinaryBuilder, GLBReader, buffer_view_bytes,
+                 read_accessor, write_glb)
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_INPUT = ROOT_DIR / 'frontend' / 'src' / 'data' / 'models'
+DEFAULT_OUTPUT = ROOT_DIR / 'frontend' / 'public' / 'models'
+
+# Fraction of the original triangle count kept by each LOD; LOD0 is the full mesh
+DEFAULT_LOD_RATIOS = (1.0, 0.5, 0.25, 0.1)
+# Vertices whose texture coordinates differ by more than this are never merged,
+# so clustering does not smear textures across UV seams
+UV_SEAM_TOLERANCE = 1.0 / 64
+TRIANGLES = 4
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+
+
+def identity_matrix():
+    return np.eye(4)
+
+
+def cluster_vertices(positions, texcoords, cells, uv_tolerance=UV_SEAM_TOLERANCE):
+    """Map every vertex to a cluster on a ``cells``-per-axis grid over the bounding box.
+
+    Returns (cluster id per vertex, number of clusters).
+    """
+    lo = positions.min(axis=0)
+    extent = np.maximum(positions.max(axis=0) - lo, 1e-12)
+    grid = np.minimum(((positions - lo) / extent * cells).astype(np.int64), cells - 1)
+    key = (grid[:, 0] * cells + grid[:, 1]) * cells + grid[:, 2]
+    if texcoords is not None and uv_tolerance:
+        uv = np.floor(texcoords / uv_tolerance).astype(np.int64)
+        uv -= uv.min(axis=0)
+        uv_span = int(uv.max()) + 1
+        key = (key * uv_span + uv[:, 0]) * uv_span + uv[:, 1]
+    _, cluster = np.unique(key, return_inverse=True)
+    return cluster.ravel(), int(cluster.max()) + 1
+
+
+def collapse(triangles, cluster):
+    """Remap triangles onto clusters and drop the ones that became degenerate or duplicated."""
+    remapped = cluster[triangles]
+    keep = ((remapped[:, 0] != remapped[:, 1]) &
+            (remapped[:, 1] != remapped[:, 2]) &
+            (remapped[:, 0] != remapped[:, 2]))
+    remapped = remapped[keep]
+    # Same three corners in any order is the same face; keep the first occurrence's winding
+    corners = np.ascontiguousarray(np.sort(remapped, axis=1).astype(np.int64))
+    if len(corners) and corners.max() < 1 << 21:
+        # Packing the sorted corners into one int64 is much faster than a row-wise unique
+        keys = (corners[:, 0] << 42) | (corners[:, 1] << 21) | corners[:, 2]
+    else:
+        # Cluster ids too wide to pack: compare the three columns as one opaque 24-byte value
+        keys = corners.view(np.dtype((np.void, corners.itemsize * 3))).ravel()
+    _, first = np.unique(keys, return_index=True)
+    return remapped[np.sort(first)]
+
+
+def average_by_cluster(values, cluster, n_clusters):
+    counts = np.bincount(cluster, minlength=n_clusters).astype(np.float64)
+    columns = [np.bincount(cluster, weights=values[:, c], minlength=n_clusters) / counts
+               for c in range(values.shape[1])]
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+def decimate(attributes, triangles, target_triangles):
+    """Vertex-clustering decimation down to roughly ``target_triangles``.
+
+    The grid resolution is found by bisection; every step is a handful of
+    vectorized NumPy passes over the vertex and triangle arrays.
+    """
+    positions = attributes['POSITION']
+    texcoords = attributes.get('TEXCOORD_0')
+    if len(triangles) <= target_triangles:
+        return attributes, triangles
+
+    best = None
+    # If seams keep the mesh above the target even on the coarsest grid, merge across wider UV gaps
+    for uv_tolerance in (UV_SEAM_TOLERANCE, UV_SEAM_TOLERANCE * 4, UV_SEAM_TOLERANCE * 16, None):
+        lo, hi = 2, 1024
+        while lo <= hi:
+            cells = (lo + hi) // 2
+            cluster, n_clusters = cluster_vertices(positions, texcoords, cells, uv_tolerance)
+            collapsed = collapse(triangles, cluster)
+            if len(collapsed) > target_triangles:
+                hi = cells - 1
+            else:
+                best = (cluster, n_clusters, collapsed)
+                lo = cells + 1
+        if best is not None:
+            break
+    if best is None:
+        cluster, n_clusters = cluster_vertices(positions, None, 2)
+        best = (cluster, n_clusters, collapse(triangles, cluster))
+    cluster, n_clusters, collapsed = best
+
+    merged = {name: average_by_cluster(values.reshape(len(values), -1), cluster, n_clusters)
+              for name, values in attributes.items()}
+    if 'NORMAL' in merged:
+        lengths = np.linalg.norm(merged['NORMAL'], axis=1, keepdims=True)
+        merged['NORMAL'] /= np.maximum(lengths, 1e-12)
+
+    # Drop clusters no surviving triangle references
+    used, compact = np.unique(collapsed, return_inverse=True)
+    merged = {name: values[used] for name, values in merged.items()}
+    return merged, compact.reshape(-1, 3)
+
+
+def quantize_unorm16(values):
+    return np.round(np.clip(values, 0.0, 1.0) * 65535).astype(np.uint16)
+
+
+def quantize_snorm(values, dtype):
+    scale = np.iinfo(dtype).max
+    return np.round(np.clip(values, -1.0, 1.0) * scale).astype(dtype)
+
+
+def dequantize_matrix(bounds):
+    """Node transform mapping normalized int16 positions back onto the ``(lo, hi)`` box.
+
+    The scale is uniform so normals stay valid without being touched.
+    """
+    lo, hi = bounds
+    matrix = identity_matrix()
+    matrix[:3, :3] *= max(float((hi - lo).max()) / 2, 1e-12)
+    matrix[:3, 3] = (lo + hi) / 2
+    return matrix
+
+
+def write_primitive(builder, attributes, triangles, dequantize=None):
+    """Append a primitive's attributes and indices; returns (attributes dict, indices accessor).
+
+    With a ``dequantize`` matrix, positions, normals and texture coordinates
+    are stored as normalized integers (KHR_mesh_quantization).
+    """
+    accessors = {}
+    quantize = dequantize is not None
+    positions = attributes['POSITION'].astype(np.float64)
+
+    for name, values in attributes.items():
+        if quantize and name == 'POSITION':
+            normalized = (positions - dequantize[:3, 3]) / dequantize[0, 0]
+            quantized = quantize_snorm(normalized, np.int16)
+            accessors[name] = builder.add_accessor(quantized, ARRAY_BUFFER, normalized=True, min_max=True, pad_to=8)
+        elif quantize and name == 'NORMAL':
+            accessors[name] = builder.add_accessor(quantize_snorm(values, np.int8), ARRAY_BUFFER,
+                                                   normalized=True, pad_to=4)
+        elif quantize and name.startswith('TEXCOORD_') and values.min() >= 0.0 and values.max() <= 1.0:
+            accessors[name] = builder.add_accessor(quantize_unorm16(values), ARRAY_BUFFER, normalized=True)
+        else:
+            accessors[name] = builder.add_accessor(values.astype(np.float32), ARRAY_BUFFER,
+                                                   min_max=(name == 'POSITION'))
+
+    flat = triangles.ravel()
+    index_dtype = np.uint16 if len(positions) <= 0xFFFF else np.uint32
+    indices = builder.add_accessor(flat.astype(index_dtype), ELEMENT_ARRAY_BUFFER)
+    return accessors, indices
+
+
+def check_supported(gltf):
+    for key in ('skins', 'animations'):
+        if gltf.get(key):
+            raise ValueError(f"Models with {key} are not supported")
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            if primitive.get('mode', TRIANGLES) != TRIANGLES:
+                raise ValueError("Only triangle-list primitives are supported")
+            if 'targets' in primitive:
+                raise ValueError("Morph targets are not supported")
+            if 'KHR_draco_mesh_compression' in primitive.get('extensions', {}):
+                raise ValueError("Draco-compressed primitives are not supported")
+
+
+def load_meshes(gltf, binary):
+    """Decode every primitive into (float attribute arrays, triangle index array)."""
+    meshes = []
+    for mesh in gltf.get('meshes', []):
+        primitives = []
+        for primitive in mesh['primitives']:
+            attributes = {name: read_accessor(gltf, binary, index).astype(np.float32)
+                          for name, index in primitive['attributes'].items()}
+            if 'indices' in primitive:
+                indices = read_accessor(gltf, binary, primitive['indices']).astype(np.int64)
+            else:
+                indices = np.arange(len(attributes['POSITION']), dtype=np.int64)
+            primitives.append((attributes, indices.reshape(-1, 3)))
+        meshes.append(primitives)
+    return meshes
+
+
+def build_lod(gltf, binary, meshes, ratio, quantize):
+    """Return (gltf, binary, triangle count, vertex count) for one LOD."""
+    out = copy.deepcopy(gltf)
+    builder = BinaryBuilder(out)
+
+    # Images are carried over byte-for-byte; texture recompression is a separate step
+    for image in out.get('images', []):
+        if 'bufferView' in image:
+            image['bufferView'] = builder.add_bytes(buffer_view_bytes(gltf, binary, image['bufferView']))
+
+    triangle_count = vertex_count = 0
+    dequantize_by_mesh = {}
+    for mesh_index, (mesh, primitives) in enumerate(zip(out.get('meshes', []), meshes)):
+        # One dequantization transform per mesh, shared by all of its primitives
+        dequantize = None
+        if quantize:
+            combined = np.concatenate([attributes['POSITION'] for attributes, _ in primitives]).astype(np.float64)
+            dequantize = dequantize_matrix((combined.min(axis=0), combined.max(axis=0)))
+            dequantize_by_mesh[mesh_index] = dequantize
+        for primitive, (attributes, triangles) in zip(mesh['primitives'], primitives):
+            if ratio < 1.0:
+                attributes, triangles = decimate(attributes, triangles, max(int(len(triangles) * ratio), 1))
+            primitive['attributes'], primitive['indices'] = write_primitive(builder, attributes, triangles, dequantize)
+            triangle_count += len(triangles)
+            vertex_count += len(attributes['POSITION'])
+
+    if quantize:
+        # The mesh moves to a new child node carrying the dequantization transform, so the
+        # original node's own transform, and with it every child it has, is left untouched
+        nodes = out.get('nodes', [])
+        for node in list(nodes):
+            if 'mesh' not in node:
+                continue
+            mesh_index = node.pop('mesh')
+            node.setdefault('children', []).append(len(nodes))
+            nodes.append({'mesh': mesh_index, 'matrix': dequantize_by_mesh[mesh_index].T.ravel().tolist()})
+        used = out.setdefault('extensionsUsed', [])
+        required = out.setdefault('extensionsRequired', [])
+        for extensions in (used, required):
+            if QUANTIZATION_EXTENSION not in extensions:
+                extensions.append(QUANTIZATION_EXTENSION)
+
+    out.setdefault('asset', {})['generator'] = 'optimize_models.py'
+    return out, builder.finish(), triangle_count, vertex_count
+
+
+def optimize_model(path, output_dir, lod_ratios=DEFAULT_LOD_RATIOS, quantize=True):
+    """Write every LOD of one model and return its manifest entry."""
+    with GLBReader(path) as glb:
+        gltf, binary = glb.gltf, glb.binary
+        check_supported(gltf)
+        meshes = load_meshes(gltf, binary)
+        stem = Path(path).stem
+
+        lods = []
+        for level, ratio in enumerate(lod_ratios):
+            out, out_binary, triangles, vertices = build_lod(gltf, binary, meshes, ratio, quantize)
+            filename = f"{stem}.lod{level}.glb"
+            size = write_glb(Path(output_dir) / filename, out, out_binary)
+            lods.append({
+                'level': level,
+                'file': filename,
+                'bytes': size,
+                'triangles': triangles,
+                'vertices': vertices,
+                'ratio': ratio,
+            })
+
+    source_triangles = sum(len(triangles) for primitives in meshes for _, triangles in primitives)
+    return {
+        'source': Path(path).name,
+        'bytes': os.path.getsize(path),
+        'triangles': source_triangles,
+        'lods': lods,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate quantized LOD variants of the character GLB models")
+    parser.add_argument('models', nargs='*', help="GLB files to process (default: every modelo*.glb in --input)")
+    parser.add_argument('--input', type=Path, default=DEFAULT_INPUT, help="Directory with the source models")
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help="Directory for the LODs and manifest.json")
+    parser.add_argument('--ratios', type=lambda s: tuple(float(r) for r in s.split(',')), default=DEFAULT_LOD_RATIOS,
+                        help="Comma-separated triangle ratios, one per LOD (default: 1,0.5,0.25,0.1)")
+    parser.add_argument('--no-quantize', action='store_true', help="Keep float32 vertex attributes")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    models = [Path(m) for m in args.models] or sorted(args.input.glob('modelo*.glb'))
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    manifest = {'models': {}}
+    for model in models:
+        entry = optimize_model(model, args.output, args.ratios, quantize=not args.no_quantize)
+        manifest['models'][model.stem] = entry
+        sizes = ', '.join(f"lod{lod['level']} {lod['bytes'] / 1024:.0f} KB / {lod['triangles']} tris"
+                          for lod in entry['lods'])
+        print(f"{model.name}: {entry['bytes'] / 1024:.0f} KB / {entry['triangles']} tris -> {sizes}")
+
+    with open(args.output / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ Wrote {len(models)} model(s) and manifest.json to {args.output}")
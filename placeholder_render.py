@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+NumPy rendering primitives shared by the placeholder image generators.
+
+Images are composed as uint8 (height, width, 4) RGBX arrays, PIL's own
+in-memory pixel layout, so handing them over is a plain copy: a broadcast
+gradient, cached outline and text masks painted with one vectorized
+operation each over their bounding box only, and seeded scatter noise. Only
+the final array is turned into a PIL image.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+BOLD_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+REGULAR_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+def vertical_gradient(size, top, bottom):
+    """Top-to-bottom gradient, row ``i`` being int(top + i / height * (bottom - top)) like the old per-row lines."""
+    width, height = size
+    alpha = np.arange(height, dtype=np.float64)[:, None] / height
+    top = np.asarray(top, dtype=np.float64)
+    rows = np.zeros((height, 4), dtype=np.uint8)
+    rows[:, :3] = top + alpha * (np.asarray(bottom, dtype=np.float64) - top)
+    # Broadcasting one 32-bit pixel per row is several times faster than copying 3-byte pixels
+    return np.broadcast_to(rows.view(np.uint32), (height, width)).copy().view(np.uint8).reshape(height, width, 4)
+
+
+@lru_cache(maxsize=None)
+def load_font(path, font_size):
+    try:
+        return ImageFont.truetype(path, font_size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def text_size(text, font):
+    left, top, right, bottom = font.getbbox(text)
+    return right - left, bottom - top
+
+
+class Mask:
+    """Coverage for a region of the image: ``alpha`` (float32 in [0, 1]) placed at ``(x, y)``."""
+
+    __slots__ = ('alpha', 'x', 'y', '_points')
+
+    def __init__(self, image, x=0, y=0):
+        bbox = image.getbbox()
+        if bbox is None:
+            self.alpha, self.x, self.y, self._points = np.zeros((0, 0), dtype=np.float32), x, y, None
+            return
+        self.alpha = np.asarray(image.crop(bbox), dtype=np.float32) / 255.0
+        self.x, self.y = x + bbox[0], y + bbox[1]
+        self._points = None
+
+    def points(self, canvas):
+        """Canvas coordinates of every covered pixel, clipped to the canvas."""
+        if self._points is None:
+            ys, xs = np.nonzero(self.alpha)
+            self._points = ys + self.y, xs + self.x
+        ys, xs = self._points
+        height, width = canvas.shape[:2]
+        inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+        return ys[inside], xs[inside]
+
+    def region(self, canvas):
+        """Canvas view under the mask and the matching part of the mask, clipped to the canvas."""
+        height, width = canvas.shape[:2]
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1 = min(self.x + self.alpha.shape[1], width)
+        y1 = min(self.y + self.alpha.shape[0], height)
+        if x1 <= x0 or y1 <= y0:
+            return None, None
+        alpha = self.alpha[y0 - self.y:y1 - self.y, x0 - self.x:x1 - self.x]
+        return canvas[y0:y1, x0:x1, :3], alpha
+
+
+@lru_cache(maxsize=128)
+def outline_mask(size, shape, outlines, width):
+    """Hard-edged outlines (``'ellipse'``, ``'rectangle'`` or ``'polygon'``), drawn once per size."""
+    image = Image.new('L', size, 0)
+    draw = ImageDraw.Draw(image)
+    for coords in outlines:
+        getattr(draw, shape)(list(coords), outline=255, width=width)
+    return Mask(image)
+
+
+@lru_cache(maxsize=512)
+def text_mask(xy, text, font_path, font_size):
+    """Anti-aliased coverage of ``text`` drawn at ``xy``, rendered only over the text's bounding box."""
+    font = load_font(font_path, font_size)
+    left, top, right, bottom = font.getbbox(text)
+    image = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(image).text((-left, -top), text, font=font, fill=255)
+    return Mask(image, xy[0] + left, xy[1] + top)
+
+
+def fill_mask(canvas, mask, color):
+    """Paint ``color`` wherever a hard-edged mask is set; thin outlines touch few pixels, so index them directly."""
+    ys, xs = mask.points(canvas)
+    canvas[ys, xs, :3] = color
+
+
+def blend_mask(canvas, mask, color):
+    """Paint ``color`` through a coverage mask, like ImageDraw does for anti-aliased text."""
+    region, alpha = mask.region(canvas)
+    if region is not None:
+        covered = region.astype(np.float32)
+        covered += alpha[:, :, None] * (np.asarray(color, dtype=np.float32) - covered)
+        region[...] = np.rint(covered)
+
+
+def scatter_points(canvas, color, count, rng):
+    """Set ``count`` random pixels to ``color``; like random.randint, coordinates may land one past the edge."""
+    height, width = canvas.shape[:2]
+    xs = rng.integers(0, width + 1, count)
+    ys = rng.integers(0, height + 1, count)
+    inside = (xs < width) & (ys < height)
+    canvas[ys[inside], xs[inside], :3] = color
+
+
+def to_image(canvas):
+    height, width = canvas.shape[:2]
+    return Image.frombuffer('RGB', (width, height), canvas, 'raw', 'RGBX', 0, 1)
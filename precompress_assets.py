@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pre-compress the GLB models so the backend can serve them with Content-Encoding.
+
+Writes <model>.glb.gz (gzip -9) and, when the brotli package is installed,
+<model>.glb.br (quality 11) next to every source model in
+frontend/src/data/models and every model in the public directory. The
+backend picks the best variant the client accepts; compression happens
+here, once, instead of on every request. --no-sources skips the source models.
+"""
+
+import argparse
+import gzip
+import os
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_PUBLIC_DIR = ROOT_DIR / 'frontend' / 'public'
+SOURCE_MODELS_DIR = ROOT_DIR / 'frontend' / 'src' / 'data' / 'models'
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compressible_assets(public_dir=DEFAULT_PUBLIC_DIR, sources_dir=SOURCE_MODELS_DIR):
+    """The source models in ``sources_dir``, then the GLBs under ``public_dir`` (placeholders and generated LODs).
+
+    The source models are the ones the backend serves first (``Settings.models_dirs``),
+    so they are included by default; pass ``sources_dir=None`` to leave the
+    source tree untouched.
+    """
+    public_dir = Path(public_dir)
+    directories = [public_dir, public_dir / 'models']
+    if sources_dir is not None:
+        directories.insert(0, Path(sources_dir))
+    paths = []
+    for directory in directories:
+        paths.extend(sorted(directory.glob('*.glb')))
+    return paths
+
+
+def compress_file(source, encoding, output_path):
+    """Write ``source`` compressed with ``encoding`` ('gzip' or 'br') to ``output_path``."""
+    with open(source, 'rb') as f:
+        data = f.read()
+    if encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    elif encoding == 'br':
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        compressed = brotli.compress(data, quality=11, lgwin=24)
+    else:
+        raise ValueError(f"Unknown encoding {encoding}")
+    with open(output_path, 'wb') as f:
+        f.write(compressed)
+    print(f"✅ Compressed: {source} ({encoding}) {len(data) / 1024:.0f} KB -> {len(compressed) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write .gz/.br variants of the GLB models")
+    parser.add_argument('--public-dir', type=Path, default=DEFAULT_PUBLIC_DIR)
+    parser.add_argument('--no-sources', action='store_true',
+                        help=f"Skip the source models in {SOURCE_MODELS_DIR.relative_to(ROOT_DIR)}")
+    args = parser.parse_args()
+    for path in compressible_assets(args.public_dir, None if args.no_sources else SOURCE_MODELS_DIR):
+        for encoding in available_encodings():
+            output_path = str(path) + SUFFIXES[encoding]
+            compress_file(path, encoding, output_path + '.tmp')
+            os.replace(output_path + '.tmp', output_path)
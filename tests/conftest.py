@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).parent.parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+# The backend modules import each other as top-level modules, like `uvicorn server:app` runs them
+for path in (BACKEND_DIR, ROOT_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+def mock_client(settings, listeners):
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app against mongomock-motor; keyword arguments override Settings fields."""
+    import server
+    from settings import Settings
+
+    def make(**overrides):
+        overrides.setdefault('db_name', 'test')
+        return server.create_app(Settings(**overrides), mongo_client_factory=mock_client)
+    return make
+
+
+@pytest.fixture
+async def client(make_app):
+    """An httpx client for a started default app; the app is ``client.app``."""
+    import httpx
+    import server
+
+    app = make_app()
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            client.app = app
+            yield client
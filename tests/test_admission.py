@@ -0,0 +1,245 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from admission import SWEEP_STEP, AdmissionLimiter, Overloaded, RateLimiter, TokenBuckets
+from metrics import MetricsRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+def test_token_bucket_burst_then_rate():
+    buckets = TokenBuckets(rate=10, burst=3)
+    assert [buckets.acquire('a', now=0.0) for _ in range(3)] == [0, 0, 0]
+    assert buckets.acquire('a', now=0.0) == pytest.approx(0.1)
+    # Refills at ``rate`` tokens per second
+    assert buckets.acquire('a', now=0.1) == 0
+    assert buckets.acquire('a', now=0.1) > 0
+    # Keys are independent
+    assert buckets.acquire('b', now=0.1) == 0
+
+
+def test_token_buckets_are_bounded():
+    buckets = TokenBuckets(rate=1, burst=5, max_keys=3)
+    for n in range(10):
+        buckets.acquire(n, now=0.0)
+    assert len(buckets) <= 3
+    # The most recently used keys survive
+    assert buckets.acquire(9, now=0.0) == 0 and len(buckets) <= 3
+
+    # Buckets idle long enough to be full again are swept
+    buckets.acquire('late', now=100.0)
+    assert len(buckets) == 1
+
+
+def test_token_buckets_stay_cheap_when_full():
+    buckets = TokenBuckets(rate=1, burst=5, max_keys=1000)
+    for n in range(1000):
+        buckets.acquire(n, now=n / 1000)
+    # A new key evicts only the least recently used one
+    buckets.acquire('new', now=1.0)
+    assert len(buckets) == 1000 and 0 not in buckets._buckets and 1 in buckets._buckets
+
+    # Once they are idle, a single acquire sweeps a bounded number of them
+    buckets.acquire('later', now=100.0)
+    assert len(buckets) == 1000 - SWEEP_STEP
+    for n in range(10):
+        buckets.acquire(f"more-{n}", now=100.0)
+    assert len(buckets) == 11
+
+
+def test_rate_limiter_by_client_and_address():
+    registry = MetricsRegistry()
+    limiter = RateLimiter(client_rate=1, client_burst=1, address_rate=0, address_burst=0, registry=registry)
+    assert limiter.check('10.0.0.1', 'a') == 0
+    assert limiter.check('10.0.0.2', 'a') > 0
+    assert limiter.check('10.0.0.1', 'b') == 0
+    # The address limit is disabled, and requests without a client_name are not limited
+    assert limiter.check('10.0.0.1', None) == 0
+    assert 'rate_limit_rejections_total{key="client_name"} 1' in registry.render()
+
+
+async def settle():
+    """Let woken waiters run; a granted slot takes a few loop iterations to reach its waiter."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_admission_queues_in_order_then_sheds():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=2, max_wait=5)
+    await limiter.acquire()
+    order = []
+
+    async def waiter(name):
+        await limiter.acquire()
+        order.append(name)
+
+    waiters = [asyncio.ensure_future(waiter(name)) for name in ('first', 'second')]
+    await asyncio.sleep(0)
+    assert limiter.depth == 2
+    with pytest.raises(Overloaded) as shed:
+        await limiter.acquire()
+    assert str(shed.value) == 'queue_full' and shed.value.retry_after >= 1
+
+    limiter.release()
+    await settle()
+    assert order == ['first'] and limiter.in_flight == 1
+    limiter.release()
+    await asyncio.gather(*waiters)
+    assert order == ['first', 'second']
+    limiter.release()
+    assert limiter.in_flight == 0 and limiter.depth == 0
+
+
+async def test_admission_sheds_after_max_wait():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10, max_wait=0.01)
+    async with limiter.slot():
+        with pytest.raises(Overloaded, match='queue_timeout'):
+            await limiter.acquire()
+        assert limiter.depth == 0
+    assert limiter.in_flight == 0
+
+
+async def test_cancelled_waiter_leaves_queue():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=10, max_wait=5)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.depth == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_status_writes_are_rate_limited(make_app):
+    import httpx
+
+    app = make_app(rate_limit_client_per_s=1, rate_limit_client_burst=2)
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            statuses = [(await client.post('/api/status', json={'client_name': 'noisy'})).status_code
+                        for _ in range(3)]
+            other = await client.post('/api/status', json={'client_name': 'quiet'})
+            limited = await client.post('/api/status', json={'client_name': 'noisy'})
+    assert statuses == [200, 200, 429]
+    assert other.status_code == 200
+    assert int(limited.headers['retry-after']) >= 1
+
+
+async def test_batch_items_are_charged_to_their_client(make_app):
+    import httpx
+
+    app = make_app(rate_limit_client_per_s=1, rate_limit_client_burst=2)
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            response = await client.post('/api/status/batch', json=[{'client_name': 'noisy'}] * 3
+                                         + [{'client_name': 'quiet'}])
+            single = await client.post('/api/status', json={'client_name': 'noisy'})
+    body = response.json()
+    assert body['inserted'] == 3 and body['failed'] == 1
+    assert body['results'][2] == {'index': 2, 'error': 'Too many requests'}
+    # The batch used up the burst a single write would have had
+    assert single.status_code == 429
+
+
+async def test_status_body_is_decoded_once(client, monkeypatch):
+    import starlette.requests
+
+    calls = []
+    loads = json.loads
+
+    def counting_loads(*args, **kwargs):
+        calls.append(args)
+        return loads(*args, **kwargs)
+
+    # Both FastAPI's body parsing and limit_status_rate go through Request.json()
+    monkeypatch.setattr(starlette.requests.json, 'loads', counting_loads)
+    response = await client.post('/api/status', json={'client_name': 'once'})
+    assert response.status_code == 200
+    assert len(calls) == 1
+
+
+async def test_overloaded_reads_are_shed(client):
+    admission = client.app.state.resources.admission
+    admission.max_concurrency = 0
+    admission.max_wait = 0.01
+    response = await client.get('/api/status')
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
+    assert admission.in_flight == 0 and admission.depth == 0
+
+
+async def test_cached_pages_are_served_when_overloaded(client):
+    await client.post('/api/status', json={'client_name': 'cached'})
+    page = await client.get('/api/status')
+    admission = client.app.state.resources.admission
+    admission.max_concurrency = 0
+    admission.max_wait = 0.01
+    assert (await client.get('/api/status')).content == page.content
+    revalidated = await client.get('/api/status', headers={'If-None-Match': page.headers['etag']})
+    assert revalidated.status_code == 304
+    # A page that needs a query still waits for a slot
+    assert (await client.get('/api/status', params={'limit': 5})).status_code == 503
+
+
+async def call_asgi(app, path, query_string, send):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query_string, 'root_path': '',
+        'headers': [(b'host', b'test')], 'client': ('127.0.0.1', 1234), 'server': ('test', 80),
+    }
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    return await app(scope, receive, send), disconnected
+
+
+async def test_ndjson_stream_holds_its_admission_slot(client):
+    for n in range(3):
+        await client.post('/api/status', json={'client_name': f'client-{n}'})
+    admission = client.app.state.resources.admission
+    first_chunk = asyncio.Event()
+    resume = asyncio.Event()
+    body = []
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and message.get('body'):
+            body.append(message['body'])
+            if not first_chunk.is_set():
+                first_chunk.set()
+                # Hold the stream open, as a slow client would
+                await resume.wait()
+
+    stream = asyncio.ensure_future(call_asgi(client.app, '/api/status', b'format=ndjson', send))
+    await asyncio.wait_for(first_chunk.wait(), 5)
+    assert admission.in_flight == 1
+    resume.set()
+    await asyncio.wait_for(stream, 5)
+    assert admission.in_flight == 0
+    assert len(b''.join(body).splitlines()) == 3
+
+
+async def test_abandoned_ndjson_stream_releases_its_slot(client):
+    await client.post('/api/status', json={'client_name': 'a'})
+    admission = client.app.state.resources.admission
+    blocked = asyncio.Event()
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and message.get('body'):
+            blocked.set()
+            await asyncio.Event().wait()
+
+    stream = asyncio.ensure_future(call_asgi(client.app, '/api/status', b'format=ndjson', send))
+    await asyncio.wait_for(blocked.wait(), 5)
+    assert admission.in_flight == 1
+    stream.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await stream
+    assert admission.in_flight == 0
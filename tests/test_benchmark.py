@@ -0,0 +1,26 @@
+import logging
+
+import pytest
+
+from backend_test import BackendBenchmark, percentile
+
+
+@pytest.mark.parametrize('values, pct, expected', [
+    ([1, 2, 3, 4, 5], 50, 3),
+    ([1, 2, 3, 4], 50, 2),
+    (list(range(1, 101)), 95, 95),
+    (list(range(1, 11)), 99, 10),
+    ([7], 1, 7),
+    ([], 50, None),
+])
+def test_percentile_is_nearest_rank(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+
+def test_offline_run_does_not_log_each_request(caplog):
+    benchmark = BackendBenchmark(workers=2, duration=0.3, offline=True)
+    with caplog.at_level(logging.INFO):
+        results = benchmark.run()
+    assert sum(stats['requests'] for stats in results['endpoints'].values()) > 0
+    assert not [record for record in caplog.records if record.name == 'httpx']
+    assert logging.getLogger('httpx').level == logging.NOTSET
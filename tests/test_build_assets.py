@@ -0,0 +1,74 @@
+import gzip
+
+import build_assets
+
+MODEL = b'glTF' + bytes(range(256)) * 16
+
+
+def write_models(directory, *names):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (directory / name).write_bytes(MODEL)
+
+
+def test_source_models_are_compressed_by_default(tmp_path):
+    public_dir, sources_dir = tmp_path / 'public', tmp_path / 'src' / 'models'
+    write_models(public_dir, 'modelo1.glb')
+    write_models(sources_dir, 'modelo4.glb')
+    built, _, failed = build_assets.build(public_dir, ('compress',), workers=1, sources_dir=sources_dir)
+    assert failed == 0 and built > 0
+    assert gzip.decompress((sources_dir / 'modelo4.glb.gz').read_bytes()) == MODEL
+    assert (public_dir / 'modelo1.glb.gz').exists()
+
+
+def test_sources_can_be_left_alone(tmp_path):
+    public_dir, sources_dir = tmp_path / 'public', tmp_path / 'src' / 'models'
+    write_models(public_dir, 'modelo1.glb')
+    write_models(sources_dir, 'modelo4.glb')
+    build_assets.build(public_dir, ('compress',), workers=1, sources_dir=None)
+    assert (public_dir / 'modelo1.glb.gz').exists()
+    assert not list(sources_dir.glob('*.gz'))
+
+
+def output_stats(public_dir):
+    return {path: path.stat().st_mtime_ns for path in public_dir.rglob('*') if path.is_file()}
+
+
+def test_second_build_is_a_no_op(tmp_path):
+    public_dir = tmp_path / 'public'
+    groups = ('models', 'characters', 'universal')
+    built, skipped, failed = build_assets.build(public_dir, groups, workers=2)
+    assert failed == skipped == 0 and built == len(build_assets.collect_jobs(public_dir, groups))
+    before = output_stats(public_dir)
+
+    assert build_assets.build(public_dir, groups, workers=2) == (0, built, 0)
+    # Nothing was rewritten, not even the manifest
+    assert output_stats(public_dir) == before
+
+
+def test_only_changed_or_missing_outputs_are_rebuilt(tmp_path):
+    public_dir = tmp_path / 'public'
+    build_assets.build(public_dir, ('models',), workers=2)
+    (public_dir / 'modelo1.glb').unlink()
+    with open(public_dir / 'modelo2.glb', 'ab') as f:
+        f.write(b'edited by hand')
+    before = output_stats(public_dir)
+    built, skipped, _ = build_assets.build(public_dir, ('models',), workers=2)
+    assert (built, skipped) == (2, 8)
+    after = output_stats(public_dir)
+    changed = {path.name for path in after if before.get(path) != after[path]}
+    assert changed == {'modelo1.glb', 'modelo2.glb', build_assets.MANIFEST_NAME}
+
+    # --force ignores the manifest
+    assert build_assets.build(public_dir, ('models',), workers=2, force=True) == (10, 0, 0)
+
+
+def test_editing_a_generator_rebuilds_its_outputs(tmp_path, monkeypatch):
+    public_dir = tmp_path / 'public'
+    groups = ('models', 'universal')
+    build_assets.build(public_dir, groups, workers=2)
+    source_hash = build_assets.source_hash
+    monkeypatch.setattr(build_assets, 'source_hash',
+                        lambda module: source_hash(module) + ('edited' if module == 'create_placeholder_models' else ''))
+    built, skipped, _ = build_assets.build(public_dir, groups, workers=2)
+    assert built == 10 and skipped == len(build_assets.collect_jobs(public_dir, ('universal',)))
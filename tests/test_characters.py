@@ -0,0 +1,68 @@
+import csv
+
+import httpx
+import orjson
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+COLUMNS = ['Capítulo', 'PERSONAGEM CENTRAL', 'LOCALIZAÇÃO', 'ENSINAMENTO PRINCIPAL']
+ROWS = [
+    ['CAPÍTULO 1', 'Buda Shakyamuni', 'Pico do Abutre', 'O Veículo Único'],
+    ['', '', '', ''],
+    ['CAPÍTULO 2', 'Shariputra', 'Assembleia', 'Meios hábeis'],
+    # A chapter spanning two rows: the first one wins
+    ['CAPÍTULO 2', 'Outro', '', ''],
+]
+
+
+@pytest.fixture
+async def characters(make_app, tmp_path):
+    path = tmp_path / 'caps.csv'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(ROWS)
+    app = make_app(characters_csv=path)
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            yield client
+
+
+async def test_list_and_field_projection(characters):
+    full = (await characters.get('/api/characters')).json()
+    assert [(c['chapter'], c['name'], c['location']) for c in full] == [
+        (1, 'Buda Shakyamuni', 'Pico do Abutre'), (2, 'Shariputra', 'Assembleia'), (2, 'Outro', '')]
+    assert full[0]['modelUrl'] == '/api/models/modelo1.glb'
+    assert full[0]['tags'] and full[0]['description'].startswith('O Veículo Único')
+
+    projected = await characters.get('/api/characters', params={'fields': 'name, id,name'})
+    assert projected.json()[0] == {'name': 'Buda Shakyamuni', 'id': 'character-1'}
+    assert projected.headers['etag'] != (await characters.get('/api/characters')).headers['etag']
+    assert (await characters.get('/api/characters', params={'fields': 'id,secret'})).status_code == 400
+
+
+async def test_chapter_lookup_and_404(characters):
+    response = await characters.get('/api/characters/2', params={'fields': 'chapter,name'})
+    assert response.json() == {'chapter': 2, 'name': 'Shariputra'}
+    missing = await characters.get('/api/characters/99')
+    assert missing.status_code == 404
+
+
+async def test_etag_revalidation_and_gzip(characters):
+    response = await characters.get('/api/characters', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['cache-control'] == server.CHARACTERS_CACHE_CONTROL
+    assert response.headers['vary'] == 'Accept-Encoding'
+    etag = response.headers['etag']
+    # The gzipped and identity bodies are the same JSON under one ETag
+    identity = await characters.get('/api/characters', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in identity.headers and identity.headers['etag'] == etag
+    assert orjson.loads(identity.content) == response.json()
+
+    not_modified = await characters.get('/api/characters', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304 and not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+    assert (await characters.get('/api/characters', headers={'If-None-Match': '"stale"'})).status_code == 200
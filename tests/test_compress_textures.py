@@ -0,0 +1,89 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+import build_assets
+import compress_textures
+from compress_textures import WEBP_EXTENSION, compress_model
+from glb import ARRAY_BUFFER, BinaryBuilder, GLBReader, write_glb
+from settings import Settings
+
+
+def encode(color, image_format, size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def write_model(path):
+    """A quad whose base color and normal textures share one PNG, plus an unused JPEG and a KTX2 texture."""
+    positions = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+    gltf = {'asset': {'version': '2.0'}, 'nodes': [{'mesh': 0}]}
+    builder = BinaryBuilder(gltf)
+    gltf['meshes'] = [{'primitives': [{'attributes': {'POSITION': builder.add_accessor(positions, ARRAY_BUFFER)},
+                                       'material': 0}]}]
+    png = encode('red', 'PNG')
+    gltf['images'] = [
+        {'bufferView': builder.add_bytes(encode('blue', 'JPEG')), 'mimeType': 'image/jpeg', 'name': 'unused'},
+        {'bufferView': builder.add_bytes(png), 'mimeType': 'image/png', 'name': 'albedo'},
+        {'bufferView': builder.add_bytes(b'KTX2 data'), 'mimeType': 'image/ktx2', 'name': 'basis'},
+        {'bufferView': builder.add_bytes(png), 'mimeType': 'image/png', 'name': 'albedo copy'},
+    ]
+    gltf['textures'] = [{'source': 1}, {'source': 3}, {'source': 2}]
+    gltf['materials'] = [{
+        'pbrMetallicRoughness': {'baseColorTexture': {'index': 0}},
+        'normalTexture': {'index': 1},
+        'emissiveTexture': {'index': 2},
+    }]
+    write_glb(path, gltf, builder.finish())
+    return positions
+
+
+def test_textures_are_reencoded_and_the_bin_chunk_repacked(tmp_path):
+    source = tmp_path / 'modelo1.glb'
+    positions = write_model(source)
+    output = tmp_path / 'out' / 'modelo1.glb'
+    sizes = dict(compress_textures.DEFAULT_MAX_SIZES, baseColor=16, normal=32)
+    report = compress_model(source, output, sizes, cache_dir=tmp_path / 'cache')
+    # The two identical PNGs are encoded once, at the larger of their roles' limits
+    assert [texture['size_after'] for texture in report['textures']] == [[32, 32]]
+
+    with GLBReader(output) as glb:
+        gltf = glb.gltf
+        # The unused JPEG and the replaced PNGs are gone; what is left is renumbered
+        assert [image['mimeType'] for image in gltf['images']] == ['image/ktx2', 'image/webp', 'image/jpeg']
+        base_color, normal, basis = gltf['textures']
+        assert base_color == normal == {'source': 2, 'extensions': {WEBP_EXTENSION: {'source': 1}}}
+        assert basis == {'source': 0}
+        assert bytes(glb.image(0)[0]) == b'KTX2 data'
+        with Image.open(io.BytesIO(bytes(glb.image(1)[0]))) as webp:
+            assert webp.format == 'WEBP' and webp.size == (32, 32)
+        with Image.open(io.BytesIO(bytes(glb.image(2)[0]))) as fallback:
+            assert fallback.format == 'JPEG'
+        np.testing.assert_array_equal(glb.accessor(0), positions)
+
+        # One bufferView per accessor and image, laid out back to back on 4-byte boundaries
+        views = gltf['bufferViews']
+        assert len(views) == 4
+        end = 0
+        for view in sorted(views, key=lambda v: v['byteOffset']):
+            assert view['byteOffset'] % 4 == 0 and view['byteOffset'] >= end
+            end = view['byteOffset'] + view['byteLength']
+        assert gltf['buffers'][0]['byteLength'] == end <= len(glb.binary)
+        assert gltf['extensionsUsed'] == [WEBP_EXTENSION] and 'extensionsRequired' not in gltf
+
+
+def test_build_serves_the_recompressed_models_first(tmp_path, monkeypatch):
+    sources = tmp_path / 'sources'
+    sources.mkdir()
+    write_model(sources / 'modelo1.glb')
+    monkeypatch.setattr(compress_textures, 'DEFAULT_INPUT', sources)
+    monkeypatch.setattr(compress_textures, 'DEFAULT_CACHE', tmp_path / 'cache')
+    public_dir = tmp_path / 'public'
+    assert build_assets.build(public_dir, ('textures',), workers=1) == (1, 0, 0)
+    assert build_assets.build(public_dir, ('textures',), workers=1) == (0, 1, 0)
+    with GLBReader(public_dir / 'models' / 'modelo1.glb') as glb:
+        assert WEBP_EXTENSION in glb.gltf['extensionsUsed']
+    # The backend looks in the tool's output directory before the source models
+    assert Settings().models_dirs[0] == compress_textures.DEFAULT_OUTPUT
@@ -0,0 +1,145 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import downloader
+from downloader import DOWNLOADED, RESUMED, UNCHANGED, DownloadError, Downloader, download_all
+
+
+class Origin:
+    """What the stand-in server serves, and the headers of every request it received."""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        # Paths whose next full response is cut off after this many bytes
+        self.drop_after = {}
+
+    def publish(self, path, data):
+        self.files[path] = (data, '"' + hashlib.sha256(data).hexdigest()[:16] + '"')
+
+
+def make_handler(origin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            origin.requests.append((self.path, dict(self.headers)))
+            if self.path not in origin.files:
+                self.send_error(404)
+                return
+            data, etag = origin.files[self.path]
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            range_header = self.headers.get('Range')
+            if range_header and self.headers.get('If-Range', etag) == etag:
+                start = int(range_header.removeprefix('bytes=').rstrip('-'))
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+                body = data[start:]
+            else:
+                self.send_response(200)
+                body = data
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+
+            drop_after = origin.drop_after.pop(self.path, None)
+            if drop_after is not None and len(body) == len(data):
+                # Simulate a dropped connection part-way through the body
+                self.wfile.write(body[:drop_after])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture
+def origin():
+    origin = Origin()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(origin))
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    origin.url = f'http://127.0.0.1:{httpd.server_address[1]}'
+    yield origin
+    httpd.shutdown()
+    httpd.server_close()
+
+
+DATA = bytes(range(256)) * 4096
+# Bytes are kept a whole chunk at a time, so drops are placed on chunk boundaries
+CHUNK = 1024
+
+
+def test_resumes_dropped_transfer(origin, tmp_path):
+    origin.publish('/a.jpg', DATA)
+    origin.drop_after['/a.jpg'] = 300 * CHUNK
+    result = Downloader(tmp_path, backoff=0, chunk_size=CHUNK).download(origin.url + '/a.jpg', 'a.jpg')
+
+    assert result == RESUMED
+    assert (tmp_path / 'a.jpg').read_bytes() == DATA
+    assert not (tmp_path / 'a.jpg.part').exists()
+    (_, first), (_, resumed) = origin.requests
+    assert 'Range' not in first
+    assert resumed['Range'] == f'bytes={300 * CHUNK}-'
+    assert resumed['If-Range'] == origin.files['/a.jpg'][1]
+
+
+def test_repeat_run_is_unchanged(origin, tmp_path):
+    origin.publish('/a.jpg', DATA)
+    assert Downloader(tmp_path).download(origin.url + '/a.jpg', 'a.jpg') == DOWNLOADED
+    stat = (tmp_path / 'a.jpg').stat()
+
+    # A new Downloader reads the validators back from the manifest
+    assert Downloader(tmp_path).download(origin.url + '/a.jpg', 'a.jpg') == UNCHANGED
+    assert origin.requests[-1][1]['If-None-Match'] == origin.files['/a.jpg'][1]
+    assert (tmp_path / 'a.jpg').stat().st_mtime_ns == stat.st_mtime_ns
+    assert (tmp_path / 'a.jpg').read_bytes() == DATA
+
+
+def test_if_range_mismatch_restarts_from_scratch(origin, tmp_path):
+    origin.publish('/a.jpg', DATA)
+    origin.drop_after['/a.jpg'] = 2 * CHUNK
+    with pytest.raises(DownloadError):
+        Downloader(tmp_path, retries=0, chunk_size=CHUNK).download(origin.url + '/a.jpg', 'a.jpg')
+    assert (tmp_path / 'a.jpg.part').stat().st_size == 2 * CHUNK
+
+    # The file changed since the partial transfer, so the server answers the Range with a full 200
+    changed = DATA[::-1]
+    origin.publish('/a.jpg', changed)
+    assert Downloader(tmp_path).download(origin.url + '/a.jpg', 'a.jpg') == DOWNLOADED
+    assert origin.requests[-1][1]['Range'] == f'bytes={2 * CHUNK}-'
+    assert (tmp_path / 'a.jpg').read_bytes() == changed
+
+
+def test_download_all_reports_failures(origin, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'BACKOFF', 0)
+    origin.publish('/a.jpg', DATA)
+    results = download_all([(origin.url + '/a.jpg', 'a.jpg'), (origin.url + '/missing.jpg', 'b.jpg')], tmp_path, 2)
+    assert results['a.jpg'] == DOWNLOADED
+    assert isinstance(results['b.jpg'], DownloadError)
+    assert not (tmp_path / 'b.jpg').exists()
+
+
+def test_download_all_reports_local_io_errors(origin, tmp_path):
+    origin.publish('/a.jpg', DATA)
+    origin.publish('/b.jpg', DATA)
+    # Renaming the finished .part onto a directory fails with an OSError
+    (tmp_path / 'b.jpg').mkdir()
+    results = download_all([(origin.url + '/a.jpg', 'a.jpg'), (origin.url + '/b.jpg', 'b.jpg')], tmp_path, 2)
+    assert results['a.jpg'] == DOWNLOADED
+    assert isinstance(results['b.jpg'], DownloadError)
+    assert isinstance(results['b.jpg'].__cause__, OSError)
+    assert (tmp_path / 'a.jpg').read_bytes() == DATA
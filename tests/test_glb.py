@@ -0,0 +1,109 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from glb import ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, BinaryBuilder, GLBReader, repack_buffer_views, write_glb
+from glb_container import read_glb_json
+
+
+def build_mesh():
+    positions = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype=np.float32)
+    normals = np.array([[0, 0, 32767]] * 4, dtype=np.int16)
+    indices = np.array([0, 1, 2, 2, 1, 3], dtype=np.uint16)
+    gltf = {'asset': {'version': '2.0'}, 'nodes': [{'name': 'quad', 'mesh': 0}]}
+    builder = BinaryBuilder(gltf)
+    attributes = {
+        'POSITION': builder.add_accessor(positions, ARRAY_BUFFER, min_max=True),
+        # int16 VEC3 is 6 bytes, so it is stored with a stride of 8
+        'NORMAL': builder.add_accessor(normals, ARRAY_BUFFER, normalized=True, pad_to=8),
+    }
+    primitive = {'attributes': attributes, 'indices': builder.add_accessor(indices, ELEMENT_ARRAY_BUFFER)}
+    gltf['meshes'] = [{'name': 'quad', 'primitives': [primitive]}]
+    gltf['images'] = [{'bufferView': builder.add_bytes(b'\x89PNG fake'), 'mimeType': 'image/png'}]
+    return gltf, builder.finish(), positions, indices
+
+
+def test_write_and_read_round_trip(tmp_path):
+    gltf, binary, positions, indices = build_mesh()
+    path = tmp_path / 'quad.glb'
+    size = write_glb(path, gltf, binary)
+    assert size == path.stat().st_size and size % 4 == 0
+
+    with GLBReader(path) as glb:
+        mesh = glb.gltf['meshes'][0]['primitives'][0]
+        np.testing.assert_array_equal(glb.accessor(mesh['attributes']['POSITION']), positions)
+        np.testing.assert_array_equal(glb.accessor(mesh['indices']), indices)
+        normals = glb.accessor(mesh['attributes']['NORMAL'])
+        assert normals.shape == (4, 3) and normals.dtype == np.float32
+        np.testing.assert_allclose(normals[:, 2], 1.0)
+        data, mime_type = glb.image(0)
+        assert bytes(data) == b'\x89PNG fake' and mime_type == 'image/png'
+        summary = glb.summary()
+    assert summary['triangles'] == 2
+    assert summary['meshes'][0]['primitives'][0]['vertices'] == 4
+    assert summary['images'][0]['bytes'] == len(b'\x89PNG fake')
+    assert summary['bounds'] == {'min': [0, 0, 0], 'max': [1, 1, 0]}
+
+    gltf, total_length, bin_length = read_glb_json(path)
+    assert gltf['nodes'] == [{'name': 'quad', 'mesh': 0}]
+    assert total_length == size and bin_length == summary['binBytes']
+
+
+def test_repack_drops_unreferenced_views(tmp_path):
+    gltf, binary, _, _ = build_mesh()
+    write_glb(tmp_path / 'quad.glb', gltf, binary)
+    with GLBReader(tmp_path / 'quad.glb') as glb:
+        gltf = glb.gltf
+        image_view = gltf['images'][0]['bufferView']
+        del gltf['images']
+        parts = repack_buffer_views(gltf, glb.binary, {0: np.zeros((4, 3), dtype=np.float32)})
+        assert len(gltf['bufferViews']) == image_view
+        write_glb(tmp_path / 'repacked.glb', gltf, parts)
+    with GLBReader(tmp_path / 'repacked.glb') as glb:
+        assert 'images' not in glb.gltf
+        assert not glb.accessor(0).any()
+        np.testing.assert_array_equal(glb.accessor(2), [0, 1, 2, 2, 1, 3])
+
+
+def test_json_only_glb(tmp_path):
+    path = tmp_path / 'empty.glb'
+    write_glb(path, {'asset': {'version': '2.0'}}, b'')
+    with GLBReader(path) as glb:
+        assert glb.gltf == {'asset': {'version': '2.0'}} and len(glb.binary) == 0
+
+
+@pytest.mark.parametrize('data', [b'', b'not a glb at all', b'glTF\x01\x00\x00\x00\x0c\x00\x00\x00'])
+def test_rejects_non_glb(tmp_path, data):
+    path = tmp_path / 'bad.glb'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        GLBReader(path)
+    with pytest.raises(ValueError):
+        read_glb_json(path)
+
+
+@pytest.mark.anyio
+async def test_model_metadata_endpoint(make_app, tmp_path):
+    import httpx
+    import server
+
+    gltf, binary, _, _ = build_mesh()
+    write_glb(tmp_path / 'modelo7.glb', gltf, binary)
+    app = make_app(models_dirs=(tmp_path,))
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            response = await client.get('/api/models/7/meta')
+    assert response.status_code == 200
+    metadata = response.json()
+    assert metadata['triangles'] == 2 and metadata['nodes'] == ['quad']
+    assert metadata['url'].startswith('/api/models/modelo7.glb?v=')
+
+
+def test_import_leaves_sys_path_alone():
+    # Root tools importing glb must not start resolving top-level names to backend modules
+    script = ("import sys; before = list(sys.path); import glb; "
+              "assert sys.path == before, sys.path; assert glb.glb_container.__name__ == 'glb_container'")
+    subprocess.run([sys.executable, '-c', script], cwd=Path(__file__).parent.parent, check=True)
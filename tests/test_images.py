@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from images import ImageVariants, parse_accept
+
+CHROME_ACCEPT = 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
+
+
+@pytest.fixture
+def variants(tmp_path):
+    files = {ext: {'file': f'character-1-card.0123456789.{ext}', 'bytes': 1} for ext in ('avif', 'webp', 'jpg')}
+    manifest = {'formats': ['avif', 'webp', 'jpg'],
+                'images': {'character-1': {'variants': {'card': {'width': 1, 'height': 1, 'formats': files}}}}}
+    (tmp_path / 'manifest.json').write_text(json.dumps(manifest))
+    return ImageVariants(tmp_path)
+
+
+def test_parse_accept():
+    assert parse_accept('image/AVIF;q=0, image/webp ; q=0.5,*/*') == {'image/avif': 0.0, 'image/webp': 0.5, '*/*': 1.0}
+    assert parse_accept('image/webp;q=x') == {'image/webp': 0.0}
+    assert parse_accept('') == {}
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (CHROME_ACCEPT, 'avif'),
+    ('image/webp,*/*', 'webp'),
+    ('image/avif;q=0, image/webp', 'webp'),
+    ('image/webp;q=0.9, image/avif;q=0.5', 'webp'),
+    ('image/jpeg, image/avif;q=0.5', 'jpg'),
+    # Wildcards do not claim AVIF or WebP support
+    ('image/*', 'jpg'),
+    ('*/*', 'jpg'),
+    (None, 'jpg'),
+    # Nothing acceptable still gets the JPEG rather than nothing
+    ('image/avif;q=0, image/webp;q=0, image/jpeg;q=0', 'jpg'),
+])
+def test_negotiate(variants, accept, expected):
+    assert variants.negotiate('character-1', 'card', accept).endswith('.' + expected)
+
+
+def test_negotiate_unknown_image(variants):
+    assert variants.negotiate('character-2', 'card', CHROME_ACCEPT) is None
+    assert variants.negotiate('character-1', 'hero', CHROME_ACCEPT) is None
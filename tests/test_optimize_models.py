@@ -0,0 +1,46 @@
+import numpy as np
+
+from glb import ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, BinaryBuilder, GLBReader, write_glb
+from optimize_models import build_lod, collapse, load_meshes
+
+
+def test_collapse_drops_degenerate_and_duplicate_faces():
+    triangles = np.array([[0, 1, 2], [2, 0, 1], [0, 0, 1], [3, 4, 5]])
+    cluster = np.arange(6)
+    assert collapse(triangles, cluster).tolist() == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_collapse_keeps_distinct_faces_with_wide_cluster_ids():
+    # These sorted corners packed into one int64 (21 bits per corner) would collide
+    wide = (1 << 21) + 2, (1 << 22) + 3
+    cluster = np.arange((1 << 22) + 4)
+    triangles = np.array([[1, 2, 3], [0, wide[0], wide[1]]])
+    assert collapse(triangles, cluster).tolist() == triangles.tolist()
+
+
+def test_quantization_leaves_node_transforms_alone(tmp_path):
+    positions = np.array([[-2, 0, 1], [4, 0, 1], [-2, 3, 1], [4, 3, 1]], dtype=np.float32)
+    body = {'name': 'body', 'mesh': 0, 'translation': [0, 0, 5], 'children': [1]}
+    hat = {'name': 'hat', 'translation': [0, 1, 0]}
+    gltf = {'asset': {'version': '2.0'}, 'scenes': [{'nodes': [0]}], 'nodes': [body, hat]}
+    builder = BinaryBuilder(gltf)
+    primitive = {'attributes': {'POSITION': builder.add_accessor(positions, ARRAY_BUFFER, min_max=True)},
+                 'indices': builder.add_accessor(np.array([0, 1, 2, 2, 1, 3], dtype=np.uint16),
+                                                 ELEMENT_ARRAY_BUFFER)}
+    gltf['meshes'] = [{'primitives': [primitive]}]
+    binary = b''.join(builder.finish())
+
+    out, out_binary, _, _ = build_lod(gltf, binary, load_meshes(gltf, binary), 1.0, quantize=True)
+    body_out, hat_out, carrier = out['nodes']
+    # The mesh node and its child keep their transforms; the mesh hangs off a new child
+    assert body_out == {'name': 'body', 'translation': [0, 0, 5], 'children': [1, 2]}
+    assert hat_out == hat
+    assert carrier['mesh'] == 0
+
+    write_glb(tmp_path / 'quantized.glb', out, out_binary)
+    with GLBReader(tmp_path / 'quantized.glb') as glb:
+        accessor = glb.gltf['meshes'][0]['primitives'][0]['attributes']['POSITION']
+        normalized = glb.accessor(accessor).astype(np.float64)
+    matrix = np.array(carrier['matrix']).reshape(4, 4).T
+    restored = normalized @ matrix[:3, :3].T + matrix[:3, 3]
+    np.testing.assert_allclose(restored, positions, atol=1e-3)
@@ -0,0 +1,42 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import benchmark_placeholders
+from create_character_images import CHARACTERS, create_placeholder_image
+from create_universal_images import CHARACTER_COUNT, create_universal_placeholder
+
+SIZES = [(400, 400), (333, 257)]
+
+
+def render(monkeypatch, generator, *args):
+    """The image ``generator`` would save, as an array, without encoding it."""
+    saved = []
+    monkeypatch.setattr(Image.Image, 'save', lambda image, *a, **k: saved.append(np.asarray(image.convert('RGB'))))
+    generator(*args)
+    monkeypatch.undo()
+    [image] = saved
+    return image
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_universal_placeholders_match_the_old_renderer(monkeypatch, size):
+    for number in range(1, CHARACTER_COUNT + 1):
+        # The old renderer drew its noise from random.randint as x, y pairs; feed it the seeded points
+        rng = np.random.default_rng(number)
+        xs, ys = rng.integers(0, size[0] + 1, 50), rng.integers(0, size[1] + 1, 50)
+        coordinates = iter(int(value) for pair in zip(xs, ys) for value in pair)
+        monkeypatch.setattr(random, 'randint', lambda low, high: next(coordinates))
+        old = render(monkeypatch, benchmark_placeholders.legacy_universal_placeholder, number, None, size)
+        new = render(monkeypatch, create_universal_placeholder, number, None, size)
+        assert np.array_equal(old, new), f"character {number} at {size}"
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_character_placeholders_match_the_old_renderer(monkeypatch, size):
+    for name in CHARACTERS.values():
+        old = render(monkeypatch, benchmark_placeholders.legacy_placeholder_image, name, None, size)
+        new = render(monkeypatch, create_placeholder_image, name, None, size)
+        assert np.array_equal(old, new), f"{name} at {size}"
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from response_cache import ENTRY_OVERHEAD, ResponseCache, etag_matches
+
+pytestmark = pytest.mark.anyio
+
+
+class Filler:
+    """A fill function that counts calls and, with ``gate``, blocks until released."""
+
+    def __init__(self, gate: asyncio.Event = None):
+        self.calls = 0
+        self.gate = gate
+
+    async def __call__(self):
+        self.calls += 1
+        body = b'body-%d' % self.calls
+        if self.gate is not None:
+            await self.gate.wait()
+        return body, {'X-Fill': str(self.calls)}
+
+
+async def test_concurrent_misses_share_one_fill():
+    cache = ResponseCache(ttl=10)
+    fill = Filler(asyncio.Event())
+    waiters = [asyncio.ensure_future(cache.get_or_fill('k', fill)) for _ in range(10)]
+    await asyncio.sleep(0)
+    fill.gate.set()
+    entries = await asyncio.gather(*waiters)
+    assert fill.calls == 1
+    assert {entry.body for entry in entries} == {b'body-1'}
+    assert (await cache.get_or_fill('k', fill)).body == b'body-1'
+    assert cache.hits == 1 and cache.misses == 10
+
+
+async def test_cancelled_waiter_does_not_cancel_fill():
+    cache = ResponseCache(ttl=10)
+    fill = Filler(asyncio.Event())
+    first = asyncio.ensure_future(cache.get_or_fill('k', fill))
+    second = asyncio.ensure_future(cache.get_or_fill('k', fill))
+    await asyncio.sleep(0)
+    first.cancel()
+    fill.gate.set()
+    assert (await second).body == b'body-1'
+    assert fill.calls == 1
+
+
+async def test_invalidate_drops_entries_and_in_flight_fills():
+    cache = ResponseCache(ttl=10)
+    fill = Filler(asyncio.Event())
+    stale = asyncio.ensure_future(cache.get_or_fill('k', fill))
+    await asyncio.sleep(0)
+    cache.invalidate()
+    fill.gate.set()
+    # The fill that started before the invalidation still answers its waiter, but is not cached
+    assert (await stale).body == b'body-1'
+    assert len(cache) == 0
+    assert (await cache.get_or_fill('k', fill)).body == b'body-2'
+    cache.invalidate()
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+async def test_entries_expire():
+    cache = ResponseCache(ttl=0.01)
+    fill = Filler()
+    await cache.get_or_fill('k', fill)
+    await asyncio.sleep(0.02)
+    await cache.get_or_fill('k', fill)
+    assert fill.calls == 2
+
+
+async def test_byte_cap_evicts_least_recently_used():
+    fill = Filler()
+    entry_size = len(b'body-1') + ENTRY_OVERHEAD
+    cache = ResponseCache(ttl=10, max_bytes=2 * entry_size)
+    await cache.get_or_fill('a', fill)
+    await cache.get_or_fill('b', fill)
+    await cache.get_or_fill('a', fill)
+    await cache.get_or_fill('c', fill)
+    assert len(cache) == 2 and cache.size_bytes <= cache.max_bytes
+    calls = fill.calls
+    await cache.get_or_fill('a', fill)
+    assert fill.calls == calls
+    await cache.get_or_fill('b', fill)
+    assert fill.calls == calls + 1
+
+
+async def test_etag_is_stable_per_body():
+    cache = ResponseCache(ttl=10)
+    first = await cache.get_or_fill('a', Filler())
+    second = await cache.get_or_fill('b', Filler())
+    assert first.etag == second.etag
+    assert first.etag.startswith('"') and first.etag.endswith('"')
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('', False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('*', True),
+    ('"other"', False),
+    ('abc', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+async def test_status_page_revalidation(client):
+    await client.post('/api/status', json={'client_name': 'a'})
+    first = await client.get('/api/status')
+    assert first.status_code == 200 and len(first.json()) == 1
+    etag = first.headers['etag']
+    assert (await client.get('/api/status', headers={'If-None-Match': etag})).status_code == 304
+
+    # A write invalidates the cached page, so the old ETag no longer matches
+    await client.post('/api/status', json={'client_name': 'b'})
+    second = await client.get('/api/status', headers={'If-None-Match': etag})
+    assert second.status_code == 200 and len(second.json()) == 2
+    assert second.headers['etag'] != etag
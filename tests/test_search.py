@@ -0,0 +1,81 @@
+import pytest
+
+from search import SearchIndex, fold, stem
+
+DOCUMENTS = [
+    {'id': 1, 'chapter': 1, 'name': 'Manjuśrī', 'description': 'O bodisatva da sabedoria ensina no jardim.',
+     'tags': ['sabedoria']},
+    {'id': 2, 'chapter': 2, 'name': 'Sudhana', 'description': 'Um peregrino encontra muitos mestres.',
+     'mainTeaching': 'A sabedoria nasce da compaixão.'},
+    {'id': 3, 'chapter': 3, 'name': 'Megha', 'description': 'Um monge medita nas montanhas sobre compaixões.',
+     'location': 'Montanha'},
+    {'id': 4, 'chapter': 4, 'name': 'Sagaramegha', 'description': 'Contempla o oceano <sem fim>.'},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex(DOCUMENTS)
+
+
+def ids(hits):
+    return [hit['id'] for hit in hits]
+
+
+def test_fold_and_stem():
+    assert fold('Mañjuśrī') == 'manjusri'
+    assert stem('compaixoes') == stem('compaixao')
+    assert stem('montanhas') == stem('montanha')
+
+
+def test_field_weights_rank_name_and_tags_first(index):
+    # "sabedoria" is in the tags of chapter 1 but only in the teaching of chapter 2
+    assert ids(index.search('sabedoria', prefix=False)) == [1, 2]
+
+
+def test_diacritics_and_plurals_match(index):
+    assert ids(index.search('manjusri', prefix=False)) == [1]
+    assert set(ids(index.search('compaixao', prefix=False))) == {2, 3}
+
+
+def test_stopwords_only_query_finds_nothing(index):
+    assert index.search('o da no', prefix=False) == []
+
+
+def test_prefix_expansion_of_last_word(index):
+    assert ids(index.search('peregr')) == [2]
+    assert index.search('peregr', prefix=False) == []
+    # Only the last word is a prefix
+    assert index.search('peregr sudhana', prefix=True)[0]['id'] == 2
+
+
+def test_exact_match_outranks_completion(index):
+    hits = index.search('mont')
+    assert ids(hits) == [3]
+    exact = index.search('montanha', prefix=False)
+    assert exact[0]['score'] > hits[0]['score']
+
+
+def test_k_limits_results(index):
+    assert len(index.search('sabedoria', k=1)) == 1
+
+
+def test_snippet_marks_matches_and_escapes_html(index):
+    hit = index.search('oceano', prefix=False)[0]
+    assert hit['field'] == 'description'
+    assert '<mark>oceano</mark>' in hit['snippet']
+    assert '&lt;sem fim&gt;' in hit['snippet']
+
+
+def test_suggest_returns_display_forms(index):
+    assert index.suggest('manj') == ['Manjuśrī']
+    assert index.suggest('   ') == []
+
+
+@pytest.mark.anyio
+async def test_search_endpoint(client):
+    response = await client.get('/api/search', params={'q': 'a', 'k': 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['query'] == 'a' and len(body['results']) <= 3
+    assert (await client.get('/api/search', params={'q': ''})).status_code == 422
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+
+import pytest
+
+import serve
+from characters import FIELDS, CharacterStore
+from settings import Settings
+from shared_state import SharedCounter, Snapshot, write_snapshot
+
+ROWS = [(1, 'one', ['a']), (2, 'dois', [])]
+BODIES = {'list': (b'[1,2]', b'gz list', '"list"'), 'chapter/1': (b'{"id":1}', b'gz one', '"one"')}
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'characters.snapshot'
+    write_snapshot(path, ROWS, BODIES)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+    snapshot = Snapshot(path)
+    assert snapshot.rows() == [(1, 'one', ['a']), (2, 'dois', [])]
+    bodies = snapshot.bodies()
+    assert all(isinstance(part, memoryview) for body, gzipped, _ in bodies.values() for part in (body, gzipped))
+    assert {key: (bytes(body), bytes(gzipped), etag) for key, (body, gzipped, etag) in bodies.items()} == BODIES
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a snapshot at all')
+    with pytest.raises(ValueError):
+        Snapshot(path)
+
+
+def test_character_store_from_snapshot_serves_the_same_bodies(tmp_path):
+    store = CharacterStore.from_csv(Settings().characters_csv)
+    path = tmp_path / 'characters.snapshot'
+    write_snapshot(path, store.rows, store.shared_bodies())
+    attached = CharacterStore.from_snapshot(Snapshot(path))
+    assert attached.rows == store.rows
+    shared, built = attached.list_body(FIELDS), store.list_body(FIELDS)
+    # The default projection is served straight from the mapping
+    assert isinstance(shared.body, memoryview)
+    assert (bytes(shared.body), bytes(shared.gzipped), shared.etag) == (built.body, built.gzipped, built.etag)
+    chapter = next(iter(store.by_chapter))
+    assert bytes(attached.chapter_body(chapter, FIELDS).body) == store.chapter_body(chapter, FIELDS).body
+    # Other projections are still built locally
+    fields = ('id', 'name')
+    assert attached.list_body(fields).body == store.list_body(fields).body
+
+
+def increment(path, times):
+    counter = SharedCounter(path)
+    for _ in range(times):
+        counter.increment()
+    counter.close()
+
+
+def test_shared_counter_is_shared_between_processes(tmp_path):
+    path = tmp_path / 'generation'
+    reader = SharedCounter(path)
+    assert reader.value == 0
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=increment, args=(path, 200)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+        assert process.exitcode == 0
+    # No increment is lost, and the first mapping sees every other process's writes
+    assert reader.value == 800
+    assert reader.increment() == 801
+    reader.close()
+    assert SharedCounter(path).value == 801
+
+
+@pytest.mark.parametrize('cpu_max, expected', [
+    ('max 100000\n', 8),
+    ('200000 100000\n', 2),
+    ('150000 100000\n', 1),
+    ('10000 100000\n', 1),
+    ('1600000 100000\n', 8),
+    ('garbage\n', 8),
+    (None, 8),
+])
+def test_cpu_count_honours_the_cgroup_quota(tmp_path, monkeypatch, cpu_max, expected):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(8)), raising=False)
+    path = tmp_path / 'cpu.max'
+    if cpu_max is not None:
+        path.write_text(cpu_max)
+    monkeypatch.setattr(serve, 'CGROUP_CPU_MAX', path)
+    assert serve.cpu_count() == expected
@@ -0,0 +1,10 @@
+from backend_test import STARTUP_IMPORT_BUDGET_MS, STARTUP_READY_BUDGET_MS, StartupBenchmark
+
+
+def test_cold_start_within_budget():
+    # The same probe and budgets as `python backend_test.py --startup`, against mongomock-motor
+    benchmark = StartupBenchmark(runs=3)
+    runs, median, failures = benchmark.measure()
+    assert not failures, f"Over budget: {', '.join(failures)}; median {median}"
+    assert median['import_ms'] <= STARTUP_IMPORT_BUDGET_MS
+    assert median['ready_ms'] <= STARTUP_READY_BUDGET_MS
@@ -0,0 +1,108 @@
+import gzip
+import os
+
+import httpx
+import pytest
+
+import server
+from static_assets import parse_range
+
+DATA = bytes(range(256)) * 40
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('bytes=0-9', (0, 9)),
+    ('bytes=10-', (10, 99)),
+    ('bytes=90-200', (90, 99)),
+    ('bytes=-10', (90, 99)),
+    ('bytes=-500', (0, 99)),
+    # Not honoured: the whole file is sent instead
+    ('bytes=0-1,5-6', None),
+    ('bytes=-', None),
+    ('items=0-9', None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=100-', 'bytes=200-300', 'bytes=10-5', 'bytes=-0'])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+@pytest.fixture
+async def assets(make_app, tmp_path):
+    model = tmp_path / 'modelo1.glb'
+    model.write_bytes(DATA)
+    gz = tmp_path / 'modelo1.glb.gz'
+    gz.write_bytes(gzip.compress(DATA))
+    stat = model.stat()
+    os.utime(gz, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    app = make_app(models_dirs=(tmp_path,))
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            yield client
+
+
+@pytest.mark.anyio
+async def test_range_request(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.content == DATA[10:20]
+    assert response.headers['content-range'] == f'bytes 10-19/{len(DATA)}'
+    assert 'content-encoding' not in response.headers
+
+
+@pytest.mark.anyio
+async def test_suffix_range(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={'Range': 'bytes=-5'})
+    assert response.status_code == 206 and response.content == DATA[-5:]
+
+
+@pytest.mark.anyio
+async def test_multi_range_gets_full_file(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={'Range': 'bytes=0-1,5-6',
+                                                                     'Accept-Encoding': 'identity'})
+    assert response.status_code == 200 and response.content == DATA
+
+
+@pytest.mark.anyio
+async def test_unsatisfiable_range(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={'Range': f'bytes={len(DATA)}-'})
+    assert response.status_code == 416
+    assert response.headers['content-range'] == f'bytes */{len(DATA)}'
+
+
+@pytest.mark.anyio
+async def test_if_range_mismatch_sends_full_file(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={
+        'Range': 'bytes=0-9', 'If-Range': '"stale"', 'Accept-Encoding': 'identity'})
+    assert response.status_code == 200 and response.content == DATA
+
+
+@pytest.mark.anyio
+async def test_precompressed_variant_and_revalidation(assets):
+    response = await assets.get('/api/models/modelo1.glb', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.content == DATA
+    etag = response.headers['etag']
+    assert etag.endswith('-gzip"')
+
+    identity = await assets.get('/api/models/modelo1.glb', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'content-encoding' not in identity.headers and identity.headers['etag'] != etag
+
+    revalidated = await assets.get('/api/models/modelo1.glb', headers={'Accept-Encoding': 'gzip',
+                                                                        'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.anyio
+async def test_head_and_unknown_files(assets):
+    response = await assets.head('/api/models/modelo1.glb', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200 and response.content == b''
+    assert response.headers['content-length'] == str(len(DATA))
+    assert (await assets.get('/api/models/modelo2.glb')).status_code == 404
+    assert (await assets.get('/api/models/..%2Fsecret.glb')).status_code == 404
@@ -0,0 +1,84 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+import server
+from settings import Settings
+
+pytestmark = pytest.mark.anyio
+
+DAY = 86400
+
+
+class RecordingDB:
+    """A mongomock database that records what it lacks: create_collection options, collMod and list_collections."""
+
+    def __init__(self):
+        self.db = AsyncMongoMockClient()['test']
+        self.created = {}
+        self.commands = []
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def __getitem__(self, name):
+        return self.db[name]
+
+    async def list_collection_names(self):
+        return sorted(set(await self.db.list_collection_names()) | set(self.created))
+
+    async def create_collection(self, name, **options):
+        self.created[name] = options
+
+    def list_collections(self, filter):
+        info = [{'name': filter['name'], 'type': 'timeseries'}] if 'timeseries' in self.created.get(
+            filter['name'], {}) else []
+
+        class Result:
+            async def to_list(self, length):
+                return info
+        return Result()
+
+    async def command(self, name, collection, **options):
+        self.commands.append((name, collection, options))
+
+
+async def test_indexes_and_ttl_are_created():
+    db = RecordingDB()
+    await server.ensure_status_collection(db, Settings(status_retention_days=1))
+    indexes = await db.status_checks.index_information()
+    assert list(indexes['timestamp_id_desc']['key']) == server.STATUS_SORT
+    assert list(indexes['client_timestamp']['key']) == [('client_name', 1), ('timestamp', -1)]
+    assert indexes['id_unique']['unique']
+    assert indexes[server.STATUS_TTL_INDEX_NAME]['expireAfterSeconds'] == DAY
+    await db.status_checks.insert_one({'id': 'check-1'})
+    with pytest.raises(DuplicateKeyError):
+        await db.status_checks.insert_one({'id': 'check-1'})
+
+
+async def test_retention_changes_in_place_and_can_be_turned_off():
+    db = RecordingDB()
+    await server.ensure_status_collection(db, Settings(status_retention_days=1))
+    # Unchanged settings leave everything as it is
+    await server.ensure_status_collection(db, Settings(status_retention_days=1))
+    assert db.commands == []
+    await server.ensure_status_collection(db, Settings(status_retention_days=2))
+    assert db.commands == [('collMod', 'status_checks',
+                            {'index': {'keyPattern': {'timestamp': -1}, 'expireAfterSeconds': 2 * DAY}})]
+    await server.ensure_status_collection(db, Settings(status_retention_days=0))
+    assert server.STATUS_TTL_INDEX_NAME not in await db.status_checks.index_information()
+
+
+async def test_timeseries_collection_expires_itself():
+    db = RecordingDB()
+    await server.ensure_status_collection(db, Settings(status_timeseries=True, status_retention_days=1))
+    assert db.created['status_checks'] == {
+        'timeseries': {'timeField': 'timestamp', 'metaField': 'client_name', 'granularity': 'seconds'},
+        'expireAfterSeconds': DAY,
+    }
+    indexes = await db.status_checks.index_information()
+    # No unique index (time-series collections refuse them) and no TTL index: retention is the collection's
+    assert {'timestamp_id_desc', 'client_timestamp'} <= set(indexes)
+    assert 'id_unique' not in indexes and server.STATUS_TTL_INDEX_NAME not in indexes
+    await server.ensure_status_collection(db, Settings(status_timeseries=True, status_retention_days=3))
+    assert db.commands[-1] == ('collMod', 'status_checks', {'expireAfterSeconds': 3 * DAY})
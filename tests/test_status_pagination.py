@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1)
+
+
+async def seed(client):
+    # check-b and check-c share a timestamp, so the cursor must break the tie on id
+    offsets = {'check-a': 0, 'check-b': 1, 'check-c': 1, 'check-d': 2, 'check-e': 3}
+    await client.app.state.resources.db.status_checks.insert_many([
+        {'id': check_id, 'client_name': 'pager', 'timestamp': START + timedelta(seconds=seconds)}
+        for check_id, seconds in offsets.items()])
+    return ['check-e', 'check-d', 'check-c', 'check-b', 'check-a']
+
+
+async def test_cursor_pages_through_every_check_once(client):
+    expected = await seed(client)
+    pages = []
+    params = {'limit': 2}
+    while True:
+        response = await client.get('/api/status', params=params)
+        assert response.status_code == 200
+        pages.append([check['id'] for check in response.json()])
+        if 'x-next-cursor' not in response.headers:
+            break
+        params = {'limit': 2, 'cursor': response.headers['x-next-cursor']}
+    assert pages == [expected[:2], expected[2:4], expected[4:]]
+
+
+async def test_full_last_page_ends_with_an_empty_one(client):
+    expected = await seed(client)
+    first = await client.get('/api/status', params={'limit': 5})
+    assert [check['id'] for check in first.json()] == expected
+    last = await client.get('/api/status', params={'limit': 5, 'cursor': first.headers['x-next-cursor']})
+    assert last.json() == [] and 'x-next-cursor' not in last.headers
+
+
+async def test_ndjson_continues_from_a_cursor(client):
+    expected = await seed(client)
+    first = await client.get('/api/status', params={'limit': 3})
+    response = await client.get('/api/status', params={'format': 'ndjson', 'cursor': first.headers['x-next-cursor']})
+    assert [orjson.loads(line)['id'] for line in response.text.splitlines()] == expected[3:]
+
+
+def test_cursor_round_trip():
+    doc = {'id': 'check|with|bars', 'timestamp': START + timedelta(microseconds=5)}
+    assert server.parse_status_cursor(server.encode_status_cursor(doc)) == (doc['timestamp'], doc['id'])
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'bm8tc2VwYXJhdG9y', 'bm90LWEtZGF0ZXxpZA=='])
+async def test_invalid_cursor_is_rejected(client, cursor):
+    assert (await client.get('/api/status', params={'cursor': cursor})).status_code == 400
@@ -0,0 +1,206 @@
+import asyncio
+import fcntl
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from status_spool import (CHECKPOINT_NAME, LOCK_NAME, MIN_SEGMENT_SIZE, RECORD_HEADER, SEGMENT_SUFFIX, RecordTooLarge,
+                          StatusSpool, encode_record, insert_status_docs, upsert_status_docs)
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1)
+
+
+def make_docs(first, count):
+    return [{'id': f"check-{n}", 'client_name': f"client-{n}", 'timestamp': START + timedelta(seconds=n)}
+            for n in range(first, first + count)]
+
+
+async def run_spool(directory, write_batch, docs=(), drain_timeout=5.0):
+    """Open a spool, append ``docs`` one batch at a time, and close it."""
+    spool = StatusSpool(directory)
+    spool.open()
+    spool.start(write_batch, batch_size=2)
+    for doc in docs:
+        await asyncio.wait_for(spool.append([doc]), 5)
+    await spool.close(drain_timeout=drain_timeout)
+    return spool
+
+
+async def stalled(docs):
+    # Stands in for a MongoDB that never answers, so everything stays spooled
+    await asyncio.Event().wait()
+
+
+async def spool_without_replay(directory, docs):
+    await run_spool(directory, stalled, docs, drain_timeout=0.05)
+
+
+def only_segment(directory):
+    [segment] = directory.glob('*' + SEGMENT_SUFFIX)
+    return segment
+
+
+def record_offsets(docs):
+    """Start offset of each record in a segment holding ``docs``, plus the end offset."""
+    offsets = [0]
+    for doc in docs:
+        offsets.append(offsets[-1] + len(encode_record(doc)))
+    return offsets
+
+
+async def replay(directory):
+    replayed = []
+
+    async def write_batch(docs):
+        replayed.extend(docs)
+
+    await run_spool(directory, write_batch)
+    return replayed
+
+
+async def test_replays_what_was_spooled(tmp_path):
+    docs = make_docs(0, 5)
+    await spool_without_replay(tmp_path, docs)
+    assert await replay(tmp_path) == docs
+    # Fully replayed, so a further restart has nothing to do
+    assert await replay(tmp_path) == []
+
+
+async def test_truncated_record_ends_replay(tmp_path):
+    docs = make_docs(0, 5)
+    await spool_without_replay(tmp_path, docs)
+    segment = only_segment(tmp_path)
+    offsets = record_offsets(docs)
+    # A crash in the middle of writing the fourth record
+    os.truncate(segment, offsets[3] + RECORD_HEADER.size + 2)
+    assert await replay(tmp_path) == docs[:3]
+
+
+async def test_checksum_mismatch_ends_replay(tmp_path):
+    docs = make_docs(0, 5)
+    await spool_without_replay(tmp_path, docs)
+    segment = only_segment(tmp_path)
+    offsets = record_offsets(docs)
+    with open(segment, 'r+b') as f:
+        f.seek(offsets[2] + 4)
+        crc = f.read(1)
+        f.seek(offsets[2] + 4)
+        f.write(bytes([crc[0] ^ 0xFF]))
+    # Nothing after a damaged record can be trusted, so only the prefix before it is replayed
+    assert await replay(tmp_path) == docs[:2]
+
+
+async def test_resumes_from_checkpoint_without_duplicates(tmp_path):
+    collection = AsyncMongoMockClient()['test'].status_checks
+    written = []
+
+    async def write_batch(docs):
+        written.append(await upsert_status_docs(collection, docs))
+
+    await run_spool(tmp_path, write_batch, make_docs(0, 5))
+    await run_spool(tmp_path, write_batch, make_docs(5, 3))
+    new_ids = [doc['id'] for batch in written for doc in batch]
+    assert new_ids == [f"check-{n}" for n in range(8)]
+    assert await collection.count_documents({}) == 8
+
+    # A crash after a batch reached MongoDB but before its checkpoint was written
+    spooled = make_docs(8, 4)
+    await spool_without_replay(tmp_path, spooled)
+    await collection.insert_many([dict(doc) for doc in spooled[:2]])
+    (tmp_path / CHECKPOINT_NAME).unlink()
+    written.clear()
+    await run_spool(tmp_path, write_batch)
+    assert [doc['id'] for batch in written for doc in batch] == ['check-10', 'check-11']
+    assert await collection.count_documents({}) == 12
+    assert await collection.count_documents({'id': 'check-8'}) == 1
+
+
+async def test_second_spool_cannot_claim_the_same_directory(tmp_path):
+    docs = make_docs(0, 3)
+    await spool_without_replay(tmp_path, docs)
+    first = StatusSpool(tmp_path)
+    first.open()
+    try:
+        with open(tmp_path / LOCK_NAME, 'rb') as f:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        second = StatusSpool(tmp_path)
+        second.open()
+        try:
+            # Refused the base directory, the second spool never sees the first one's records
+            assert second.directory == tmp_path / 'worker-1'
+            assert second.backlog_records == 0
+            assert first.backlog_records == len(docs)
+        finally:
+            await second.close()
+    finally:
+        await first.close()
+    third = StatusSpool(tmp_path)
+    third.open()
+    assert third.directory == tmp_path
+    await third.close()
+
+
+async def test_record_larger_than_a_segment_is_refused(tmp_path):
+    replayed = []
+
+    async def write_batch(docs):
+        replayed.extend(docs)
+
+    spool = StatusSpool(tmp_path, segment_size=MIN_SEGMENT_SIZE)
+    spool.open()
+    spool.start(write_batch)
+    [small] = make_docs(0, 1)
+    huge = dict(small, id='huge', client_name='x' * MIN_SEGMENT_SIZE)
+    with pytest.raises(RecordTooLarge):
+        await spool.append([small, huge])
+    # Nothing of the rejected batch was counted or written
+    assert spool.backlog_bytes == 0 and spool.backlog_records == 0
+    await asyncio.wait_for(spool.append([small]), 5)
+    await spool.close()
+    assert replayed == [small]
+    assert spool.backlog_bytes == 0 and spool.backlog_records == 0
+
+
+class RejectingCollection:
+    """insert_many stores every document but those with an id in ``rejected``, and raises like PyMongo."""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+        self.stored = []
+
+    async def insert_many(self, docs, ordered=True):
+        from pymongo.errors import BulkWriteError
+
+        errors = [{'index': index, 'code': 2, 'errmsg': 'rejected'}
+                  for index, doc in enumerate(docs) if doc['id'] in self.rejected]
+        self.stored.extend(doc for doc in docs if doc['id'] not in self.rejected)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+
+
+async def test_partly_rejected_insert_is_not_retried(tmp_path):
+    collection = RejectingCollection({'check-1'})
+    written = []
+
+    async def write_batch(docs):
+        written.extend(await insert_status_docs(collection, docs))
+
+    docs = make_docs(0, 3)
+    spool = await run_spool(tmp_path, write_batch, docs)
+    # The rejected document is dropped and the batch is not inserted again
+    assert collection.stored == [docs[0], docs[2]]
+    assert written == [docs[0], docs[2]]
+    assert spool.backlog_records == 0
+
+
+async def test_overlong_client_name_is_rejected(client):
+    name = 'x' * (server.CLIENT_NAME_MAX_LENGTH + 1)
+    assert (await client.post('/api/status', json={'client_name': name})).status_code == 422
+    response = await client.post('/api/status/batch', json=[{'client_name': name}, {'client_name': 'ok'}])
+    assert response.json()['inserted'] == 1 and response.json()['failed'] == 1
@@ -0,0 +1,206 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+import server
+from metrics import MetricsRegistry
+from status_stream import OVERFLOW, StatusBroadcaster
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1)
+
+
+def status_doc(n, timestamp=None):
+    return {'id': f"check-{n}", 'client_name': 'dashboard', 'timestamp': timestamp or START + timedelta(seconds=n)}
+
+
+def test_reconnect_replays_in_publish_order():
+    broadcaster = StatusBroadcaster(history_size=10)
+    # Stamped later but committed first, e.g. by a spool replay or another worker's batch
+    broadcaster.publish(status_doc(1, START + timedelta(seconds=5)))
+    broadcaster.publish(status_doc(2, START))
+    broadcaster.publish(status_doc(3))
+    first, second, third = broadcaster.history
+    _, missed = broadcaster.subscribe(after=first.id)
+    assert [event.doc['id'] for event in missed] == ['check-2', 'check-3']
+    assert broadcaster.subscribe(after=third.id)[1] == []
+
+
+def test_unknown_or_expired_ids_are_not_replayed():
+    broadcaster = StatusBroadcaster(history_size=2)
+    for n in range(3):
+        broadcaster.publish(status_doc(n))
+    oldest = broadcaster.history[0]
+    broadcaster.publish(status_doc(3))
+    assert broadcaster.subscribe(after=oldest.id)[1] is None
+    # Ids from another process or an earlier run are never mistaken for this one's
+    other = StatusBroadcaster()
+    other.publish(status_doc(0))
+    assert broadcaster.subscribe(after=other.history[0].id)[1] is None
+    assert len(broadcaster._sequence) == 2
+
+
+def test_change_stream_tokens_are_event_ids():
+    broadcaster = StatusBroadcaster()
+    broadcaster.publish(status_doc(1), '8263A1')
+    broadcaster.publish(status_doc(2), '8263A2')
+    assert b"id: 8263A2\n" in broadcaster.history[1].sse
+    assert [event.id for event in broadcaster.subscribe(after='8263A1')[1]] == ['8263A2']
+
+
+async def test_slow_subscriber_overflows():
+    registry = MetricsRegistry()
+    broadcaster = StatusBroadcaster(queue_size=2, registry=registry)
+    subscription, _ = broadcaster.subscribe()
+    for n in range(3):
+        broadcaster.publish(status_doc(n))
+    assert await subscription.get(1) is OVERFLOW
+    assert subscription not in broadcaster.subscribers
+    assert 'status_stream_dropped_total 1' in registry.render()
+
+
+class EventStream:
+    """GET /api/status/stream driven over raw ASGI, since httpx buffers whole responses."""
+
+    def __init__(self, app, last_event_id=None, blocked=None):
+        headers = [(b'host', b'test')]
+        if last_event_id:
+            headers.append((b'last-event-id', last_event_id.encode()))
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': '/api/status/stream', 'raw_path': b'/api/status/stream', 'query_string': b'', 'root_path': '',
+            'headers': headers, 'client': ('127.0.0.1', 1234), 'server': ('test', 80),
+        }
+        self.app = app
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.buffer = b''
+        # Until this is set, the client stops reading after the first chunk past ``retry``
+        self.blocked = blocked
+        self.disconnected = asyncio.Event()
+        self.sent = 0
+        self.task = None
+
+    async def __aenter__(self):
+        async def receive():
+            await self.disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                await self.chunks.put(message.get('body', b''))
+                self.sent += 1
+                if self.blocked is not None and self.sent > 1:
+                    await self.blocked.wait()
+
+        self.task = asyncio.ensure_future(self.app(self.scope, receive, send))
+        assert await self.next_event() == {'retry': '2000'}
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+    async def next_event(self) -> dict:
+        while b'\n\n' not in self.buffer:
+            self.buffer += await asyncio.wait_for(self.chunks.get(), 5)
+        block, self.buffer = self.buffer.split(b'\n\n', 1)
+        event = {}
+        for line in block.decode().splitlines():
+            if line.startswith(':'):
+                event['comment'] = line[1:].strip()
+                continue
+            field, _, value = line.partition(': ')
+            event[field] = value
+        return event
+
+
+async def post_status(client, name):
+    response = await client.post('/api/status', json={'client_name': name})
+    return response.json()['id']
+
+
+async def test_reconnecting_client_gets_what_it_missed(client):
+    async with EventStream(client.app) as stream:
+        await post_status(client, 'first')
+        await post_status(client, 'second')
+        events = [await stream.next_event(), await stream.next_event()]
+    assert [orjson.loads(event['data'])['client_name'] for event in events] == ['first', 'second']
+    assert all(event['event'] == 'status' for event in events)
+
+    missed = await post_status(client, 'missed')
+    async with EventStream(client.app, last_event_id=events[-1]['id']) as stream:
+        replayed = await stream.next_event()
+        live_id = await post_status(client, 'live')
+        live = await stream.next_event()
+    assert orjson.loads(replayed['data'])['id'] == missed
+    assert orjson.loads(live['data'])['id'] == live_id
+    assert len({event['id'] for event in events + [replayed, live]}) == 4
+
+
+async def test_unknown_last_event_id_resets(client):
+    await post_status(client, 'before')
+    async with EventStream(client.app, last_event_id='not-an-event') as stream:
+        assert (await stream.next_event())['event'] == 'reset'
+
+
+async def post_status_directly(app, name):
+    """Write a status check without POST /api/status, which would wait for an admission slot."""
+    resources = app.state.resources
+    doc = server.StatusCheck(client_name=name).model_dump()
+    await resources.status_writer.submit(doc)
+    await resources.status_written([doc])
+
+
+async def test_stream_replay_needs_no_admission_slot(client):
+    await post_status(client, 'a')
+    [event] = client.app.state.resources.status_stream.history
+    admission = client.app.state.resources.admission
+    # Replay is served from memory, so it needs no admission slot
+    admission.max_concurrency = 0
+    await post_status_directly(client.app, 'b')
+    async with EventStream(client.app, last_event_id=event.id) as stream:
+        assert orjson.loads((await stream.next_event())['data'])['client_name'] == 'b'
+
+
+async def test_slow_stream_is_ended_with_overflow(make_app):
+    import httpx
+
+    app = make_app(status_stream_queue_size=2)
+    async with server.lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            blocked = asyncio.Event()
+            async with EventStream(app, blocked=blocked) as stream:
+                for n in range(4):
+                    await post_status(client, f"client-{n}")
+                blocked.set()
+                events = []
+                while not events or events[-1].get('event') == 'status':
+                    events.append(await stream.next_event())
+                await asyncio.wait_for(stream.task, 5)
+    assert events[-1]['event'] == 'overflow'
+    assert len(events) <= 3
+
+
+async def test_heartbeats_keep_idle_streams_open(make_app):
+    app = make_app(status_stream_heartbeat_s=0.01)
+    async with server.lifespan(app):
+        async with EventStream(app) as stream:
+            assert await stream.next_event() == {'comment': 'heartbeat'}
+
+
+def test_websocket_resumes_after_reconnect(make_app):
+    from starlette.testclient import TestClient
+
+    with TestClient(make_app()) as client:
+        with client.websocket_connect('/api/status/ws') as ws:
+            client.post('/api/status', json={'client_name': 'first'})
+            first = ws.receive_json()
+        assert first['type'] == 'status' and first['status']['client_name'] == 'first'
+        client.post('/api/status', json={'client_name': 'missed'})
+        with client.websocket_connect(f"/api/status/ws?after={first['id']}") as ws:
+            assert ws.receive_json()['status']['client_name'] == 'missed'
+        with client.websocket_connect('/api/status/ws?after=unknown') as ws:
+            assert ws.receive_json() == {'type': 'reset'}
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from settings import Settings
+
+pytestmark = pytest.mark.anyio
+
+HOUR = datetime(2026, 3, 1, 10)
+
+
+def checks(client_name, *timestamps):
+    return [{'id': f"{client_name}-{n}", 'client_name': client_name, 'timestamp': ts}
+            for n, ts in enumerate(timestamps)]
+
+
+class App:
+    """An app started against a given mongomock client, so tests can seed it before startup."""
+
+    def __init__(self, mongo, **overrides):
+        self.app = server.create_app(Settings(db_name='test', **overrides), mongo_client_factory=lambda *_: mongo)
+        self.resources = self.app.state.resources
+
+    async def __aenter__(self):
+        self.lifespan = server.lifespan(self.app)
+        await self.lifespan.__aenter__()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url='http://test')
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        await self.lifespan.__aexit__(*exc_info)
+
+
+async def test_summary_buckets_by_client_and_hour():
+    mongo = AsyncMongoMockClient()
+    await mongo.test.status_checks.insert_many(
+        checks('a', HOUR, HOUR + timedelta(minutes=5), HOUR + timedelta(hours=1, minutes=1))
+        + checks('b', HOUR + timedelta(minutes=59, seconds=59), HOUR + timedelta(hours=3)))
+    async with App(mongo) as app:
+        params = {'bucket': 'hour', 'since': HOUR.isoformat(), 'until': (HOUR + timedelta(hours=2)).isoformat()}
+        response = await app.client.get('/api/status/summary', params=params)
+        only_a = await app.client.get('/api/status/summary', params={**params, 'client_name': 'a'})
+    assert response.json() == [
+        {'client_name': 'a', 'bucket': '2026-03-01T10:00:00', 'count': 2},
+        {'client_name': 'b', 'bucket': '2026-03-01T10:00:00', 'count': 1},
+        {'client_name': 'a', 'bucket': '2026-03-01T11:00:00', 'count': 1},
+    ]
+    assert 'x-truncated' not in response.headers
+    assert [bucket['count'] for bucket in only_a.json()] == [2, 1]
+
+
+async def test_summary_flags_truncation():
+    mongo = AsyncMongoMockClient()
+    await mongo.test.status_checks.insert_many(checks('a', *(HOUR + timedelta(minutes=n) for n in range(3))))
+    async with App(mongo, status_summary_max_buckets=2) as app:
+        response = await app.client.get('/api/status/summary', params={
+            'since': HOUR.isoformat(), 'until': (HOUR + timedelta(hours=1)).isoformat()})
+    assert [bucket['bucket'] for bucket in response.json()] == ['2026-03-01T10:00:00', '2026-03-01T10:01:00']
+    assert response.headers['x-truncated'] == 'true'
+
+
+async def test_clients_counts_and_last_seen():
+    mongo = AsyncMongoMockClient()
+    await mongo.test.status_checks.insert_many(checks('b', HOUR) + checks('a', HOUR, HOUR + timedelta(hours=2)))
+    async with App(mongo) as app:
+        response = await app.client.get('/api/status/clients')
+    assert response.json() == [
+        {'client_name': 'a', 'last_seen': '2026-03-01T12:00:00', 'count': 2},
+        {'client_name': 'b', 'last_seen': '2026-03-01T10:00:00', 'count': 1},
+    ]
+
+
+async def settle_backfill(resources):
+    if resources._rollup_backfill is not None:
+        await asyncio.wait_for(resources._rollup_backfill, 5)
+
+
+async def test_rollups_count_checks_from_before_they_were_enabled():
+    # Recent enough to outlive the one-day retention (mongomock applies TTL indexes)
+    earlier = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    mongo = AsyncMongoMockClient()
+    await mongo.test.status_checks.insert_many(checks('old', earlier, earlier + timedelta(minutes=1)))
+    async with App(mongo, status_rollups=True, status_retention_days=1) as app:
+        await settle_backfill(app.resources)
+        await app.client.post('/api/status', json={'client_name': 'new'})
+        await app.client.post('/api/status', json={'client_name': 'old'})
+        clients = (await app.client.get('/api/status/clients')).json()
+        summary = (await app.client.get('/api/status/summary', params={
+            'bucket': 'day', 'since': earlier.isoformat(), 'client_name': 'old'})).json()
+        assert app.resources.rollup_state['backfilled']
+    assert {client['client_name']: client['count'] for client in clients} == {'new': 1, 'old': 3}
+    assert sum(bucket['count'] for bucket in summary) == 3
+    # The backfilled minutes live in status_rollups, and expire with the checks they count
+    assert await mongo.test.status_rollups.count_documents({'minute': {'$lt': earlier + timedelta(hours=1)}}) == 2
+    rollup_indexes = await mongo.test.status_rollups.index_information()
+    assert rollup_indexes[server.ROLLUP_TTL_INDEX_NAME]['expireAfterSeconds'] == 86400
+
+    # A restart neither backfills again nor counts anything twice
+    async with App(mongo, status_rollups=True) as app:
+        assert app.resources._rollup_backfill is None
+        clients = (await app.client.get('/api/status/clients')).json()
+    assert {client['client_name']: client['count'] for client in clients} == {'new': 1, 'old': 3}
+
+
+async def test_rollups_fall_back_to_checks_until_backfilled(monkeypatch):
+    async def failing_backfill(db, before):
+        raise RuntimeError("backfill interrupted")
+
+    monkeypatch.setattr(server, 'backfill_status_rollups', failing_backfill)
+    mongo = AsyncMongoMockClient()
+    await mongo.test.status_checks.insert_many(checks('old', HOUR, HOUR + timedelta(minutes=1)))
+    async with App(mongo, status_rollups=True) as app:
+        await settle_backfill(app.resources)
+        assert not app.resources.rollup_state['backfilled']
+        clients = (await app.client.get('/api/status/clients')).json()
+    assert clients == [{'client_name': 'old', 'last_seen': '2026-03-01T10:01:00', 'count': 2}]
+
+    # Turning rollups off forgets the state, so turning them on again starts over
+    async with App(mongo):
+        pass
+    assert await mongo.test.status_meta.count_documents({}) == 0
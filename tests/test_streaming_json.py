@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from streaming_json import MAX_ITEM_BYTES, StreamingJSONError, iter_json_array, iter_ndjson
+
+pytestmark = pytest.mark.anyio
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+@pytest.mark.parametrize('size', [1, 3, 1024])
+async def test_json_array_across_chunk_boundaries(size):
+    values = [{'client_name': 'ä' * 3}, [1, 2], 'x', 12.5, -3e-05, 10, None, {}]
+    assert await collect(iter_json_array(chunked(json.dumps(values).encode(), size))) == values
+
+
+async def test_empty_json_array():
+    assert await collect(iter_json_array(chunked(b' [ ] ', 2))) == []
+
+
+@pytest.mark.parametrize('body', [b'{"client_name": "a"}', b'[1, 2', b'[1 2]', b'[1,]', b'[1] 2', b''])
+async def test_malformed_json_array(body):
+    with pytest.raises(StreamingJSONError):
+        await collect(iter_json_array(chunked(body, 2)))
+
+
+async def test_truncated_array_yields_complete_items_first():
+    seen = []
+    with pytest.raises(StreamingJSONError):
+        async for item in iter_json_array(chunked(b'[{"a": 1}, {"b": 2}, {"c":', 4)):
+            seen.append(item)
+    assert seen == [{'a': 1}, {'b': 2}]
+
+
+async def test_json_array_item_size_cap():
+    body = b'["' + b'x' * (MAX_ITEM_BYTES + 1) + b'"]'
+    with pytest.raises(StreamingJSONError, match='exceeds'):
+        await collect(iter_json_array(chunked(body, 4096)))
+
+
+async def test_ndjson_lines():
+    body = b'{"a": 1}\n\n{"b": 2}\r\n{"c": 3}'
+    assert await collect(iter_ndjson(chunked(body, 3))) == [{'a': 1}, {'b': 2}, {'c': 3}]
+
+
+async def test_ndjson_bad_line_fails_only_itself():
+    items = await collect(iter_ndjson(chunked(b'{"a": 1}\nnot json\n{"b": 2}\n', 5)))
+    assert items[0] == {'a': 1} and items[2] == {'b': 2}
+    assert isinstance(items[1], ValueError)
+
+
+async def test_ndjson_line_size_cap():
+    body = b'{"a": "' + b'x' * (MAX_ITEM_BYTES + 1) + b'"}\n'
+    with pytest.raises(StreamingJSONError, match='exceeds'):
+        await collect(iter_ndjson(chunked(body, 4096)))
+
+
+async def test_batch_rejects_non_array_body(client):
+    response = await client.post('/api/status/batch', content=b'{"client_name": "a"}',
+                                 headers={'Content-Type': 'application/json'})
+    assert response.status_code == 400
+
+
+async def test_batch_keeps_items_before_truncation(client):
+    response = await client.post('/api/status/batch', content=b'[{"client_name": "a"}, {"client_name": "b"}, {"cl',
+                                 headers={'Content-Type': 'application/json'})
+    assert response.status_code == 400
+    assert response.json()['inserted'] == 2
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from write_buffer import WriteBuffer, WriteBufferFull
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingCollection:
+    """Counts insert_many calls; ``gate`` holds every insert until it is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def insert_many(self, docs, ordered=True):
+        await self.gate.wait()
+        self.batches.append(list(docs))
+
+
+async def test_flushes_when_batch_is_full():
+    collection = RecordingCollection()
+    buffer = WriteBuffer(collection, max_batch=3, flush_interval=60)
+    buffer.start()
+    await asyncio.wait_for(asyncio.gather(*(buffer.submit({'n': n}) for n in range(6))), 5)
+    assert [len(batch) for batch in collection.batches] == [3, 3]
+    await buffer.close()
+
+
+async def test_flushes_after_interval():
+    collection = RecordingCollection()
+    buffer = WriteBuffer(collection, max_batch=100, flush_interval=0.01)
+    buffer.start()
+    await asyncio.wait_for(asyncio.gather(buffer.submit({'n': 1}), buffer.submit({'n': 2})), 5)
+    assert collection.batches == [[{'n': 1}, {'n': 2}]]
+    await buffer.close()
+
+
+async def test_full_queue_raises():
+    collection = RecordingCollection()
+    collection.gate.clear()
+    buffer = WriteBuffer(collection, max_batch=1, flush_interval=0, max_queue=1, enqueue_timeout=0.01)
+    buffer.start()
+    # One document is held by the stalled insert and one fills the queue
+    pending = [asyncio.ensure_future(buffer.submit({'n': n})) for n in range(2)]
+    await asyncio.sleep(0.01)
+    with pytest.raises(WriteBufferFull):
+        await buffer.submit({'n': 2})
+    collection.gate.set()
+    await asyncio.gather(*pending)
+    await buffer.close()
+
+
+async def test_close_drains_queued_writes():
+    collection = RecordingCollection()
+    collection.gate.clear()
+    buffer = WriteBuffer(collection, max_batch=2, flush_interval=60)
+    buffer.start()
+    pending = [asyncio.ensure_future(buffer.submit({'n': n})) for n in range(5)]
+    await asyncio.sleep(0)
+    closing = asyncio.ensure_future(buffer.close())
+    await asyncio.sleep(0)
+    with pytest.raises(RuntimeError):
+        await buffer.submit({'n': 5})
+    collection.gate.set()
+    await asyncio.wait_for(closing, 5)
+    await asyncio.gather(*pending)
+    assert sorted(doc['n'] for batch in collection.batches for doc in batch) == [0, 1, 2, 3, 4]
+
+
+async def test_duplicate_fails_only_its_writer():
+    collection = AsyncMongoMockClient()['test']['docs']
+    await collection.create_index('key', unique=True)
+    flushed = []
+
+    async def on_flush(docs):
+        flushed.extend(doc['key'] for doc in docs)
+
+    buffer = WriteBuffer(collection, max_batch=3, flush_interval=60, on_flush=on_flush)
+    buffer.start()
+    results = await asyncio.gather(*(buffer.submit({'key': key}) for key in ('a', 'a', 'b')), return_exceptions=True)
+    assert [isinstance(result, Exception) for result in results] == [False, True, False]
+    assert flushed == ['a', 'b']
+    await buffer.close()
+
+
+async def test_post_status_sheds_when_queue_is_full(client):
+    writer = client.app.state.resources.status_writer
+
+    async def full(doc):
+        raise WriteBufferFull("full")
+
+    writer.submit = full
+    response = await client.post('/api/status', json={'client_name': 'test'})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'